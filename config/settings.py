@@ -44,9 +44,11 @@ USE_L10N = True
 USE_TZ = True
 
 # Explicitly define test runner to avoid warning messages on test execution
-TEST_RUNNER = "django.test.runner.DiscoverRunner"
+TEST_RUNNER = "pokemon_v2.runner.TestRunner"
 
 MIDDLEWARE = [
+    "pokemon_v2.middleware.MetricsMiddleware",
+    "pokemon_v2.middleware.QueryInstrumentationMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -127,10 +129,31 @@ CORS_ALLOW_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
 
 CORS_URLS_REGEX = r"^/api/.*$"
 
+# "orjson" encodes and decodes JSON with orjson, "stdlib" with the json module.
+# Both render the same bytes.
+JSON_BACKEND = os.environ.get("JSON_BACKEND", "orjson")
+
+JSON_CLASSES = {
+    "orjson": (
+        "pokemon_v2.renderers.ORJSONRenderer",
+        "pokemon_v2.renderers.ORJSONParser",
+    ),
+    "stdlib": (
+        "rest_framework.renderers.JSONRenderer",
+        "rest_framework.parsers.JSONParser",
+    ),
+}
+
+JSON_RENDERER, JSON_PARSER = JSON_CLASSES[JSON_BACKEND]
+
+# Requests running more SQL queries than this are logged as warnings by
+# pokemon_v2.middleware.QueryInstrumentationMiddleware.
+QUERY_BUDGET = int(os.environ.get("QUERY_BUDGET", "100"))
+
 REST_FRAMEWORK = {
-    "DEFAULT_RENDERER_CLASSES": ("rest_framework.renderers.JSONRenderer",),
+    "DEFAULT_RENDERER_CLASSES": (JSON_RENDERER,),
     "DEFAULT_PARSER_CLASSES": (
-        "rest_framework.parsers.JSONParser",
+        JSON_PARSER,
         "rest_framework.parsers.FormParser",
         "rest_framework.parsers.MultiPartParser",
     ),
@@ -402,6 +425,10 @@ if IS_RAILWAY:
                 'class': 'logging.StreamHandler',
                 'formatter': 'simple',
             },
+            # without the level, so that every line is JSON
+            'query_log': {
+                'class': 'logging.StreamHandler',
+            },
         },
         'root': {
             'handlers': ['console'],
@@ -413,6 +440,12 @@ if IS_RAILWAY:
                 'level': 'WARNING',
                 'propagate': False,
             },
+            # the JSON line QueryInstrumentationMiddleware logs for every request
+            'pokemon_v2.middleware': {
+                'handlers': ['query_log'],
+                'level': 'INFO',
+                'propagate': False,
+            },
         },
     }
 
@@ -423,3 +456,21 @@ if IS_RAILWAY:
 else:
     print("⚠️  Railway not detected - using local configuration")
 
+    # The JSON line QueryInstrumentationMiddleware logs for every request.
+    LOGGING = {
+        "version": 1,
+        "disable_existing_loggers": False,
+        "handlers": {
+            "console": {
+                "class": "logging.StreamHandler",
+            },
+        },
+        "loggers": {
+            "pokemon_v2.middleware": {
+                "handlers": ["console"],
+                "level": "INFO",
+                "propagate": False,
+            },
+        },
+    }
+
@@ -1,6 +1,7 @@
 from django.urls import include, re_path as url
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from pokemon_v2 import urls as pokemon_v2_urls
+from pokemon_v2.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, render_metrics
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 
 # pylint: disable=invalid-name
@@ -55,10 +56,17 @@ def health_check(request):
         'timestamp': str(__import__('datetime').datetime.now())
     })
 
+def metrics(request):
+    """Prometheus metrics of every worker"""
+    return HttpResponse(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
 urlpatterns = [
     # Health check endpoint for Railway
     url(r'^health/$', health_check, name='health-check'),
 
+    # Prometheus metrics
+    url(r'^metrics$', metrics, name='metrics'),
+
     # Root endpoint
     url(r'^$', api_root, name='api-root'),
 
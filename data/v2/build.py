@@ -9,15 +9,32 @@
 #
 #  Each time the build script is run it will iterate over each table in the database,
 #  wipe it and rewrite each row using the data found in data/v2/csv.
+#
+#  build_all(incremental=True) only rewrites the tables whose CSV files changed since
+#  the last build, and the tables that depend on them.
 
 
 import csv
+import hashlib
+import io
+import multiprocessing
 import os
 import os.path
 import re
 import json
-from django.db import connection
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from cachalot.api import cachalot_disabled, invalidate
+from django.db import connection, connections, transaction
 from pokemon_v2.models import *
+from pokemon_v2.evolutions import refresh_evolution_chains
+from pokemon_v2.namesearch import invalidate_name_indexes
+from pokemon_v2.responsecache import invalidate_all_responses
+from pokemon_v2.search import refresh_search_index
+from pokemon_v2.typechart import invalidate_type_chart
 
 
 # why this way? how about use `__file__`
@@ -44,23 +61,128 @@ SOUND_DIR = "{prefix}{{file_name}}".format(
 )
 IMAGE_DIR = os.getcwd() + "/data/v2/sprites/sprites/"
 CRIES_DIR = os.getcwd() + "/data/v2/cries/cries/"
-RESOURCE_IMAGES = []
-RESOURCE_CRIES = []
 
-for root, dirs, files in os.walk(IMAGE_DIR):
-    for file in files:
-        image_path = os.path.join(root.replace(IMAGE_DIR, ""), file)
-        image_path = image_path.replace("\\", "/")  # convert Windows-style path to Unix
-        RESOURCE_IMAGES.append(image_path)
 
-for root, dirs, files in os.walk(CRIES_DIR):
-    for file in files:
-        cry_path = os.path.join(root.replace(CRIES_DIR, ""), file)
-        cry_path = cry_path.replace("\\", "/")  # convert Windows-style path to Unix
-        RESOURCE_CRIES.append(cry_path)
+class ResourceManifest:
+    """
+    The set of files under ``directory``, as paths relative to it. The set
+    is kept in ``manifest_path``, along with the directories of the tree, and
+    only listed again when the mtime of one of those directories changed, as
+    it does when a file or a directory is added to, removed from or renamed
+    in it. Checking the manifest stats the directories, without listing them.
+    """
+
+    def __init__(self, directory, manifest_path):
+        self.directory = directory
+        self.manifest_path = manifest_path
+        self._files = None
+        self._hash = None
+
+    def __contains__(self, file_name):
+        return file_name in self.files
+
+    @property
+    def files(self):
+        if self._files is None:
+            self.load()
+        return self._files
+
+    @property
+    def hash(self):
+        """Hash of the file list, to tell when the tree changed."""
+
+        if self._hash is None:
+            self.load()
+        return self._hash
+
+    def get_signature(self, mtimes):
+        """Hash of the (relative path, mtime) pairs of the directories."""
+
+        digest = hashlib.sha256()
+        for directory, mtime in mtimes:
+            digest.update("{}\0{}\n".format(directory, mtime).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get_current_signature(self, directories):
+        """The signature of ``directories`` now, or None if one is gone."""
+
+        try:
+            return self.get_signature(
+                (directory, self.get_mtime(directory)) for directory in directories
+            )
+        except FileNotFoundError:
+            return None
+
+    def get_mtime(self, directory):
+        return os.stat(os.path.join(self.directory, directory)).st_mtime_ns
+
+    def load(self):
+        try:
+            with open(self.manifest_path, "rt", encoding="utf8") as manifest_file:
+                manifest = json.load(manifest_file)
+        except (OSError, ValueError):
+            manifest = None
+
+        if manifest is None or manifest.get("signature") != self.get_current_signature(
+            manifest.get("directories", [])
+        ):
+            manifest = self.scan()
+
+        self._files = frozenset(manifest["files"])
+        self._hash = manifest["hash"]
+
+    def scan(self):
+        files = []
+        # (path relative to the tree, mtime) of every directory, the mtime
+        # read before listing it so that a change while scanning is seen
+        mtimes = []
+
+        pending = [""] if os.path.isdir(self.directory) else []
+        while pending:
+            directory = pending.pop()
+            mtimes.append((directory, self.get_mtime(directory)))
+
+            with os.scandir(os.path.join(self.directory, directory)) as entries:
+                for entry in entries:
+                    # like os.walk, which doesn't follow the symbolic links
+                    if entry.is_dir():
+                        if not entry.is_symlink():
+                            pending.append(os.path.join(directory, entry.name))
+                        continue
+
+                    path = os.path.join(directory, entry.name)
+                    path = path.replace("\\", "/")  # convert Windows-style path to Unix
+                    files.append(path)
+        files.sort()
+
+        manifest = {
+            "signature": self.get_signature(mtimes),
+            "directories": [directory for directory, _ in mtimes],
+            "hash": hashlib.sha256("\n".join(files).encode("utf-8")).hexdigest(),
+            "files": files,
+        }
+
+        # nothing worth keeping without the tree
+        if mtimes:
+            # several build workers may scan at once
+            temporary_path = "{}.{}".format(self.manifest_path, os.getpid())
+            with open(temporary_path, "wt", encoding="utf8") as manifest_file:
+                json.dump(manifest, manifest_file)
+            os.replace(temporary_path, self.manifest_path)
+
+        return manifest
+
+
+RESOURCE_IMAGES = ResourceManifest(
+    IMAGE_DIR, os.getcwd() + "/data/v2/sprites-manifest.json"
+)
+RESOURCE_CRIES = ResourceManifest(
+    CRIES_DIR, os.getcwd() + "/data/v2/cries-manifest.json"
+)
 
 
 def file_path_or_none(file_name, image_file=True):
+    record_input("cries" if not image_file else "sprites")
     if not image_file:
         return (
             SOUND_DIR.format(file_name=file_name)
@@ -81,6 +203,7 @@ def with_iter(context, iterable=None):
 
 
 def load_data(file_name):
+    record_input(file_name)
     # with_iter closes the file when it has finished
     return csv.reader(
         with_iter(open(DATA_LOCATION + file_name, "rt", encoding="utf8")), delimiter=","
@@ -106,27 +229,281 @@ def clear_table(model):
         )
 
 
-def build_generic(model_classes, file_name, csv_record_to_objects):
-    batches = {}
+# Rows are written in batches of this size, with COPY on PostgreSQL, a single
+# executemany on SQLite and bulk_create anywhere else.
+BATCH_SIZE = 2000
+
+
+def get_insert_fields(model_class, with_pk):
+    return [
+        field
+        for field in model_class._meta.concrete_fields
+        if with_pk or not field.primary_key
+    ]
+
+
+def get_insert_row(obj, fields):
+    return tuple(
+        field.get_db_prep_save(field.pre_save(obj, True), connection)
+        for field in fields
+    )
+
+
+def copy_value(value):
+    # text format of COPY
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def write_copy_rows(buffer, rows):
+    """Write ``rows`` to ``buffer`` in the text format of COPY."""
+
+    for row in rows:
+        buffer.write("\t".join(copy_value(value) for value in row))
+        buffer.write("\n")
+
+
+def insert_objects(model_class, objects):
+    if DB_VENDOR not in ("postgresql", "sqlite"):
+        model_class.objects.bulk_create(objects)
+        return
+
+    fields = get_insert_fields(model_class, objects[0].pk is not None)
+    table_name = connection.ops.quote_name(model_class._meta.db_table)
+    columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+    rows = (get_insert_row(obj, fields) for obj in objects)
+
+    if DB_VENDOR == "postgresql":
+        buffer = io.StringIO()
+        write_copy_rows(buffer, rows)
+        buffer.seek(0)
+
+        DB_CURSOR.copy_expert(
+            "COPY {} ({}) FROM STDIN".format(table_name, columns), buffer
+        )
+    else:
+        # one transaction for the whole batch rather than one per row
+        with transaction.atomic():
+            DB_CURSOR.executemany(
+                "INSERT INTO {} ({}) VALUES ({})".format(
+                    table_name, columns, ", ".join(["%s"] * len(fields))
+                ),
+                list(rows),
+            )
+
+
+##########################
+#  INCREMENTAL REBUILDS  #
+##########################
+
+# Every table that is built gets a BuildState row recording the content hash
+# of each CSV (or sprite tree) its rows were read from, and the other tables
+# queried while building it. An incremental build only rebuilds the tables
+# whose inputs changed since, and the tables that point to or read from a
+# table rebuilt by the same build. Clearing a table deletes the rows pointing
+# to it, so those have to be rebuilt anyway.
+#
+# The build ids of the rows are also how the API processes tell that the data
+# changed (see pokemon_v2/versions.py).
+
+BUILD = {"id": uuid.uuid4().hex, "incremental": False}
+
+TABLE_RGX = r'"(pokemon_v2_\w+)"'
+
+# table being built: {"inputs": set of input names, "reads": set of tables}
+_building = {}
+
+# content hashes of the inputs, computed once per process
+_input_hashes = {}
+
+
+def record_input(name):
+    if _building:
+        _building["inputs"].add(name)
+
+
+def get_input_hash(name):
+    if name not in _input_hashes:
+        digest = hashlib.sha256()
+
+        if name in ("sprites", "cries"):
+            resources = RESOURCE_IMAGES if name == "sprites" else RESOURCE_CRIES
+            digest.update(resources.hash.encode("utf-8"))
+        elif os.path.exists(DATA_LOCATION + name):
+            with open(DATA_LOCATION + name, "rb") as file:
+                for chunk in iter(lambda: file.read(1 << 16), b""):
+                    digest.update(chunk)
+        else:
+            digest = None
+
+        _input_hashes[name] = digest.hexdigest() if digest else None
+
+    return _input_hashes[name]
+
+
+def get_referenced_tables(model_classes):
+    return {
+        field.related_model._meta.db_table
+        for model_class in model_classes
+        for field in model_class._meta.concrete_fields
+        if field.is_relation
+    }
+
+
+def needs_build(model_classes):
+    """Whether the tables of ``model_classes`` have to be (re)built."""
+
+    if not BUILD["incremental"]:
+        return True
+
+    tables = [model_class._meta.db_table for model_class in model_classes]
+    states = list(BuildState.objects.filter(table__in=tables))
+
+    if len(states) < len(tables):
+        return True
+
+    dependencies = get_referenced_tables(model_classes)
+    for state in states:
+        for name, input_hash in state.inputs.items():
+            if get_input_hash(name) != input_hash:
+                return True
+        dependencies.update(state.reads)
+
+    dependencies.difference_update(tables)
+    rebuilt = BuildState.objects.filter(table__in=dependencies, build=BUILD["id"])
+
+    if rebuilt.exists():
+        return True
+
+    for table in tables:
+        print("skipping " + table + " (up to date)")
+    return False
+
+
+def record_reads(execute, sql, params, many, context):
+    if sql.lstrip()[:6].upper() == "SELECT":
+        _building["reads"].update(re.findall(TABLE_RGX, sql))
+    return execute(sql, params, many, context)
+
+
+# profile of every table built by this process since the step started
+_table_profiles = []
+
+
+def new_table_profile(tables, file_name):
+    return {
+        "tables": tables,
+        "file": file_name,
+        "rows_read": 0,
+        "rows_inserted": 0,
+        "clear_time": 0.0,
+        "parse_time": 0.0,
+        "construct_time": 0.0,
+        "insert_time": 0.0,
+        "total_time": 0.0,
+        "rows_per_second": 0.0,
+    }
+
+
+@contextmanager
+def rebuild_tables(model_classes, file_name=None):
+    """
+    Clear the tables of ``model_classes`` for the block to fill, then
+    record what was read while filling them. The block gets the profile
+    of the tables to fill in.
+    """
+
+    tables = [model_class._meta.db_table for model_class in model_classes]
+    profile = new_table_profile(tables, file_name)
+    start = time.perf_counter()
+
+    # a build that fails halfway leaves the tables without a state
+    BuildState.objects.filter(table__in=tables).delete()
+
     for model_class in model_classes:
         clear_table(model_class)
-        batches[model_class] = []  # one batch per model class
 
-    csv_data = load_data(file_name)
-    next(csv_data, None)  # skip header
+    profile["clear_time"] = time.perf_counter() - start
+
+    _building.update(inputs=set(), reads=set())
+    try:
+        # queries answered from the cache wouldn't be seen
+        with cachalot_disabled(), connection.execute_wrapper(record_reads):
+            yield profile
+        inputs = {name: get_input_hash(name) for name in _building["inputs"]}
+        reads = sorted(_building["reads"].difference(tables))
+    finally:
+        _building.clear()
+
+    BuildState.objects.bulk_create(
+        BuildState(table=table, inputs=inputs, reads=reads, build=BUILD["id"])
+        for table in tables
+    )
+
+    profile["total_time"] = time.perf_counter() - start
+    if profile["total_time"]:
+        profile["rows_per_second"] = profile["rows_inserted"] / profile["total_time"]
+    _table_profiles.append(profile)
+
+
+def build_generic(model_classes, file_name, csv_record_to_objects):
+    """Load ``file_name`` into the tables, returning whether it had to."""
+
+    if not needs_build(model_classes):
+        return False
+
+    with rebuild_tables(model_classes, file_name) as profile:
+        batches = {}
+
+        def insert_batch(model_class, batch):
+            start = time.perf_counter()
+            insert_objects(model_class, batch)
+            profile["insert_time"] += time.perf_counter() - start
+            profile["rows_inserted"] += len(batch)
+            batch.clear()
+
+        csv_data = load_data(file_name)
+        next(csv_data, None)  # skip header
 
-    for csv_record in csv_data:
-        for obj in csv_record_to_objects(csv_record):
-            model_class = type(obj)
-            batches[model_class].append(obj)
+        while True:
+            start = time.perf_counter()
+            csv_record = next(csv_data, None)
+            parsed = time.perf_counter()
+            profile["parse_time"] += parsed - start
 
-            # Limit the batch size
-            if len(batches[model_class]) > 200:
-                model_class.objects.bulk_create(batches[model_class])
-                batches[model_class] = []
+            if csv_record is None:
+                break
 
-    for model_class, batch in batches.items():
-        model_class.objects.bulk_create(batch)
+            profile["rows_read"] += 1
+            objects = list(csv_record_to_objects(csv_record))
+            profile["construct_time"] += time.perf_counter() - parsed
+
+            for obj in objects:
+                # rows with and without an explicit id can't share a statement
+                batch = batches.setdefault((type(obj), obj.pk is not None), [])
+                batch.append(obj)
+
+                if len(batch) >= BATCH_SIZE:
+                    insert_batch(type(obj), batch)
+
+        for (model_class, _), batch in batches.items():
+            if batch:
+                insert_batch(model_class, batch)
+
+    # the rows were written behind the ORM's back
+    for model_class in model_classes:
+        invalidate(model_class)
+
+    return True
 
 
 def scrub_str(string):
@@ -629,6 +1006,10 @@ def _build_types():
 
     build_generic((TypeEfficacyPast,), "type_efficacy_past.csv", csv_record_to_objects)
 
+    # the type chart cached by the API is stale now, the processes that don't
+    # share the cache of the build see it from the new data version
+    invalidate_type_chart()
+
     def csv_record_to_objects(info):
         game_map = {
             "generation-iii": [
@@ -1204,6 +1585,14 @@ def _build_evolutions():
     )
 
 
+def _build_evolution_chain_trees():
+    # Needs species, evolutions and everything they reference, so it runs
+    # after _build_pokemons.
+    if needs_build((EvolutionChainTree,)):
+        with rebuild_tables((EvolutionChainTree,)) as profile:
+            profile["rows_inserted"] = len(refresh_evolution_chains())
+
+
 #############
 #  POKEDEX  #
 #############
@@ -1359,19 +1748,20 @@ def _build_pokemons():
             order=int(info[18]) if info[18] != "" else None,
         )
 
-    build_generic((PokemonSpecies,), "pokemon_species.csv", csv_record_to_objects)
-
-    # PokemonSpecies.evolves_from_species can't be set until all the species are created
-    data = load_data("pokemon_species.csv")
-    for index, info in enumerate(data):
-        if index > 0:
-            evolves = (
-                PokemonSpecies.objects.get(pk=int(info[3])) if info[3] != "" else None
-            )
-            if evolves:
-                species = PokemonSpecies.objects.get(pk=int(info[0]))
-                species.evolves_from_species = evolves
-                species.save()
+    if build_generic((PokemonSpecies,), "pokemon_species.csv", csv_record_to_objects):
+        # PokemonSpecies.evolves_from_species can't be set until all the species are created
+        data = load_data("pokemon_species.csv")
+        for index, info in enumerate(data):
+            if index > 0:
+                evolves = (
+                    PokemonSpecies.objects.get(pk=int(info[3]))
+                    if info[3] != ""
+                    else None
+                )
+                if evolves:
+                    species = PokemonSpecies.objects.get(pk=int(info[0]))
+                    species.evolves_from_species = evolves
+                    species.save()
 
     def csv_record_to_objects(info):
         yield PokemonSpeciesName(
@@ -2377,32 +2767,289 @@ def _build_pal_parks():
     build_generic((PalPark,), "pal_park.csv", csv_record_to_objects)
 
 
-def build_all():
-    _build_languages()
-    _build_regions()
-    _build_generations()
-    _build_versions()
-    _build_damage_classes()
-    _build_stats()
-    _build_abilities()
-    _build_characteristics()
-    _build_egg_groups()
-    _build_growth_rates()
-    _build_items()
-    _build_types()
-    _build_contests()
-    _build_moves()
-    _build_berries()
-    _build_natures()
-    _build_genders()
-    _build_experiences()
-    _build_machines()
-    _build_evolutions()
-    _build_pokedexes()
-    _build_locations()
-    _build_pokemons()
-    _build_encounters()
-    _build_pal_parks()
+############
+#  SEARCH  #
+############
+
+
+def _build_search_index():
+    # Reads every IsName table, so it runs after the steps building them.
+    if needs_build((SearchToken,)):
+        with rebuild_tables((SearchToken,)) as profile:
+            profile["rows_inserted"] = refresh_search_index()
+
+
+# Every step with the steps whose tables it needs: the ones its models have
+# foreign keys to, plus the ones it reads. Steps run in this order when the
+# build isn't parallel.
+BUILD_STEPS = OrderedDict(
+    (
+        (_build_languages, ()),
+        (_build_regions, (_build_languages,)),
+        (_build_generations, (_build_languages, _build_regions)),
+        (_build_versions, (_build_generations, _build_languages, _build_regions)),
+        (_build_damage_classes, (_build_languages,)),
+        (_build_stats, (_build_damage_classes, _build_languages)),
+        (_build_abilities, (_build_generations, _build_languages, _build_versions)),
+        (_build_characteristics, (_build_languages, _build_stats)),
+        (_build_egg_groups, (_build_languages,)),
+        (_build_growth_rates, (_build_languages,)),
+        (_build_items, (_build_generations, _build_languages, _build_versions)),
+        (_build_types, (_build_damage_classes, _build_generations, _build_languages)),
+        (_build_contests, (_build_languages,)),
+        (
+            _build_moves,
+            (
+                _build_contests,
+                _build_damage_classes,
+                _build_generations,
+                _build_languages,
+                _build_stats,
+                _build_types,
+                _build_versions,
+            ),
+        ),
+        (
+            _build_berries,
+            (_build_contests, _build_items, _build_languages, _build_types),
+        ),
+        (
+            _build_natures,
+            (_build_berries, _build_languages, _build_moves, _build_stats),
+        ),
+        (_build_genders, ()),
+        (_build_experiences, (_build_growth_rates,)),
+        (
+            _build_machines,
+            (_build_growth_rates, _build_items, _build_moves, _build_versions),
+        ),
+        (_build_evolutions, (_build_items, _build_languages)),
+        (_build_pokedexes, (_build_languages, _build_regions, _build_versions)),
+        (_build_locations, (_build_generations, _build_languages, _build_regions)),
+        (
+            _build_pokemons,
+            (
+                _build_abilities,
+                _build_egg_groups,
+                _build_evolutions,
+                _build_genders,
+                _build_generations,
+                _build_growth_rates,
+                _build_items,
+                _build_languages,
+                _build_locations,
+                _build_moves,
+                _build_pokedexes,
+                _build_regions,
+                _build_stats,
+                _build_types,
+                _build_versions,
+            ),
+        ),
+        (_build_evolution_chain_trees, (_build_evolutions, _build_pokemons)),
+        (
+            _build_encounters,
+            (_build_languages, _build_locations, _build_pokemons, _build_versions),
+        ),
+        (_build_pal_parks, (_build_languages, _build_pokemons)),
+        (
+            _build_search_index,
+            (
+                _build_abilities,
+                _build_berries,
+                _build_contests,
+                _build_damage_classes,
+                _build_egg_groups,
+                _build_encounters,
+                _build_evolutions,
+                _build_generations,
+                _build_items,
+                _build_languages,
+                _build_locations,
+                _build_moves,
+                _build_natures,
+                _build_pal_parks,
+                _build_pokedexes,
+                _build_pokemons,
+                _build_regions,
+                _build_stats,
+                _build_types,
+                _build_versions,
+            ),
+        ),
+    )
+)
+
+
+def get_step_name(step):
+    return step.__name__[len("_build_") :]
+
+
+def run_step(step):
+    """Run a build step, returning when it ran and what its tables took."""
+
+    del _table_profiles[:]
+    start = time.time()
+    step()
+    return step, start, time.time(), list(_table_profiles)
+
+
+def init_build_worker():
+    global DB_CURSOR
+
+    # don't share the parent's database connection
+    connections.close_all()
+    DB_CURSOR = connection.cursor()
+
+
+def run_steps_in_parallel(jobs):
+    """
+    Run the build steps across ``jobs`` worker processes, starting each one
+    as soon as the steps it depends on are done.
+    """
+
+    timings = []
+    done = set()
+    pending = OrderedDict(BUILD_STEPS)
+    running = set()
+
+    connections.close_all()
+
+    with ProcessPoolExecutor(
+        jobs,
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=init_build_worker,
+    ) as executor:
+        while pending or running:
+            for step, dependencies in list(pending.items()):
+                if done.issuperset(dependencies):
+                    running.add(executor.submit(run_step, step))
+                    del pending[step]
+
+            finished, running = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in finished:
+                timing = future.result()
+                timings.append(timing)
+                done.add(timing[0])
+
+    return timings
+
+
+def print_timings(timings, build_start):
+    """Print the wall time of every step and the critical path of the build."""
+
+    durations = {step: end - start for step, start, end, _ in timings}
+
+    # longest chain of dependent steps ending with each step
+    paths = {}
+    for step, dependencies in BUILD_STEPS.items():
+        before = max(
+            (paths[dependency] for dependency in dependencies), default=(0, [])
+        )
+        paths[step] = (before[0] + durations[step], before[1] + [step])
+
+    print("\n{:<24}{:>10}{:>10}".format("step", "start", "wall"))
+    for step, start, end, _ in sorted(timings, key=lambda timing: timing[1]):
+        print(
+            "{:<24}{:>9.2f}s{:>9.2f}s".format(
+                get_step_name(step), start - build_start, end - start
+            )
+        )
+
+    length, critical_path = max(paths.values(), key=lambda path: path[0])
+    print(
+        "\ncritical path ({:.2f}s): {}".format(
+            length, " -> ".join(get_step_name(step) for step in critical_path)
+        )
+    )
+    print("total: {:.2f}s".format(time.time() - build_start))
+
+
+# tables listed on the console, the JSON profile has all of them
+PROFILE_LINES = 25
+
+# columns of the console profile, as (title, key, format)
+PROFILE_COLUMNS = (
+    ("read", "rows_read", "{:>9}"),
+    ("inserted", "rows_inserted", "{:>9}"),
+    ("clear", "clear_time", "{:>8.2f}s"),
+    ("parse", "parse_time", "{:>8.2f}s"),
+    ("build", "construct_time", "{:>8.2f}s"),
+    ("insert", "insert_time", "{:>8.2f}s"),
+    ("total", "total_time", "{:>8.2f}s"),
+    ("rows/s", "rows_per_second", "{:>9.0f}"),
+)
+
+
+def write_profile(profile_path, timings, build_start):
+    """
+    Write the profile of every table built to ``profile_path`` as JSON and
+    print the slowest ones.
+    """
+
+    tables = []
+    for step, _, _, table_profiles in timings:
+        for table_profile in table_profiles:
+            tables.append(dict(table_profile, step=get_step_name(step)))
+    tables.sort(key=lambda table_profile: table_profile["total_time"], reverse=True)
+
+    with open(profile_path, "wt", encoding="utf8") as profile_file:
+        json.dump(
+            {
+                "total_time": time.time() - build_start,
+                "steps": [
+                    {
+                        "step": get_step_name(step),
+                        "start": start - build_start,
+                        "wall_time": end - start,
+                    }
+                    for step, start, end, _ in timings
+                ],
+                "tables": tables,
+            },
+            profile_file,
+            indent=4,
+        )
+
+    print(
+        "\n{:<40}".format("table")
+        + "".join(
+            title.rjust(len(column_format.format(0)))
+            for title, _, column_format in PROFILE_COLUMNS
+        )
+    )
+    for table_profile in tables[:PROFILE_LINES]:
+        print(
+            "{:<40}".format(", ".join(table_profile["tables"])[:39])
+            + "".join(
+                column_format.format(table_profile[key])
+                for _, key, column_format in PROFILE_COLUMNS
+            )
+        )
+    print("full profile of {} tables in {}".format(len(tables), profile_path))
+
+
+def build_all(jobs=1, incremental=False, profile_path=None):
+    build_start = time.time()
+
+    BUILD.update(id=uuid.uuid4().hex, incremental=incremental)
+    _input_hashes.clear()
+
+    if jobs > 1:
+        timings = run_steps_in_parallel(jobs)
+    else:
+        timings = [run_step(step) for step in BUILD_STEPS]
+
+    print_timings(timings, build_start)
+
+    if profile_path:
+        write_profile(profile_path, timings, build_start)
+
+    # responses cached before the rebuild are stale now, the processes that
+    # don't share the cache of the build see it from the new data version
+    invalidate_all_responses()
+    invalidate_name_indexes()
 
 
 if __name__ == "__main__":
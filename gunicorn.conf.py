@@ -32,3 +32,30 @@ errorlog = "-"   # Log to stderr
 
 # Graceful handling
 graceful_timeout = 30
+
+
+# Metrics: start from zero, and keep the counts of the workers that exit
+def on_starting(server):
+    from pokemon_v2.metrics import clear_metrics
+
+    clear_metrics()
+
+
+def post_fork(server, worker):
+    # only the workers count, not the management commands
+    from pokemon_v2.metrics import collector
+
+    collector.enabled = True
+
+
+def worker_exit(server, worker):
+    # in the worker, which writes the counts it hasn't written yet
+    from pokemon_v2.metrics import collector
+
+    collector.stop_flushing()
+
+
+def child_exit(server, worker):
+    from pokemon_v2.metrics import archive_worker
+
+    archive_worker(worker.pid)
@@ -1,15 +1,49 @@
 import re
+from collections import OrderedDict
 from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
-from django.http import Http404
-from django.db.models import Q
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
+from django.utils.text import compress_sequence
+from django.utils.cache import patch_vary_headers
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q, prefetch_related_objects
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 
 from .models import *
 from .serializers import *
+from .encounters import get_pokemon_encounters
+from .etags import compute_etag, etag_matches
+from .fieldsets import parse_field_paths, select_fields
+from .namesearch import invalidate_name_indexes, name_contains, name_equals
+from .pagination import LimitOffsetOrKeysetPagination
+from .renderers import NDJSONRenderer
+from .evolutions import affected_evolution_chain_ids, refresh_evolution_chains
+from .expansions import expand_references
+from .exports import accepts_gzip, get_prefetch_lookups, iter_ndjson
+from .search import get_resources, get_words, prune_search_index, search_names
+from .responsecache import (
+    add_tag,
+    get_cached_response,
+    get_instance_tags,
+    get_response_key,
+    get_row_tag,
+    get_table_tag,
+    get_write_version,
+    invalidate_list_counts,
+    invalidate_tags,
+    record_tags,
+    store_response,
+)
+from .typechart import get_type_chart, invalidate_type_chart
 
 # pylint: disable=no-member, attribute-defined-outside-init
 
@@ -47,7 +81,7 @@ class NameOrIdRetrieval:
         filter = self.request.GET.get("q", "")
 
         if filter:
-            queryset = queryset.filter(Q(name__icontains=filter))
+            queryset = queryset.filter(name_contains(queryset, filter))
 
         return queryset
 
@@ -64,7 +98,7 @@ class NameOrIdRetrieval:
             resp = get_object_or_404(queryset, pk=lookup)
 
         elif self.namePattern.match(lookup):
-            resp = get_object_or_404(queryset, name__iexact=lookup)
+            resp = get_object_or_404(queryset, name_equals(queryset, [lookup]))
 
         else:
             raise Http404
@@ -72,6 +106,216 @@ class NameOrIdRetrieval:
         return resp
 
 
+class BatchRetrieval:
+    """
+    Mixin to answer lists filtered by `id__in` or `name__in` with the
+    detail documents of the matching resources. The ids and names follow
+    the rules of NameOrIdRetrieval.
+    """
+
+    batch_query_params = ("id__in", "name__in")
+    max_batch_size = 100
+
+    def is_batch(self):
+        return self.action == "list" and any(
+            param in self.request.query_params for param in self.batch_query_params
+        )
+
+    def get_serializer_class(self):
+        if self.is_batch():
+            return self.serializer_class
+        return super().get_serializer_class()
+
+    def get_batch_values(self, param, pattern):
+        values = [
+            value.strip()
+            for value in self.request.query_params.get(param, "").split(",")
+            if value.strip()
+        ]
+
+        if len(values) > self.max_batch_size:
+            raise ValidationError(
+                {param: ["Give at most {} values.".format(self.max_batch_size)]}
+            )
+
+        for value in values:
+            if not pattern.match(value) or (
+                pattern is self.idPattern and abs(int(value)) > 2147483647
+            ):
+                raise ValidationError({param: ["Invalid value {}.".format(value)]})
+
+        return values
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        if not self.is_batch():
+            return queryset
+
+        ids = self.get_batch_values("id__in", self.idPattern)
+        names = self.get_batch_values("name__in", self.namePattern)
+
+        if names:
+            try:
+                queryset.model._meta.get_field("name")
+            except FieldDoesNotExist:
+                raise ValidationError(
+                    {"name__in": ["This resource can't be looked up by name."]}
+                )
+
+        filter = Q(pk__in=ids)
+        if names:
+            filter |= name_equals(queryset, names)
+
+        # the relations of the detail documents, like PrefetchedRelations
+        return queryset.filter(filter).prefetch_related(
+            *get_prefetch_lookups(self.get_serializer_class())
+        )
+
+    def paginate_queryset(self, queryset):
+        if self.is_batch() and self.paginator is not None:
+            # the whole batch in one page, at most max_batch_size ids and as
+            # many names, unless the request gives a limit
+            self.paginator.default_limit = 2 * self.max_batch_size
+
+        return super().paginate_queryset(queryset)
+
+    def list(self, request, *args, **kwargs):
+        if not self.is_batch():
+            return super().list(request, *args, **kwargs)
+
+        # the references shared by the documents are serialized once
+        with share_summaries():
+            return super().list(request, *args, **kwargs)
+
+
+class PrefetchedRelations:
+    """
+    Mixin to prefetch the relations rendered by the nested serializers of
+    the detail serializer, so that their rows, like the names and their
+    languages, take one query each rather than one per row.
+    """
+
+    def get_object(self):
+        instance = super().get_object()
+        prefetch_related_objects(
+            [instance], *get_prefetch_lookups(self.get_serializer_class())
+        )
+        return instance
+
+
+class SparseFieldsets:
+    """
+    Mixin to leave out of the serializer the fields not listed in the
+    `fields` query parameter, or listed in `omit`, before it serializes
+    anything.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+
+        only = parse_field_paths(self.request.query_params.get("fields"))
+        omit = parse_field_paths(self.request.query_params.get("omit"))
+        if only is not None or omit is not None:
+            select_fields(serializer, only, omit)
+
+        return serializer
+
+
+class ExpandedReferences:
+    """
+    Mixin to inline the detail documents of the references at the paths
+    listed in the `expand` query parameter.
+    """
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+
+        tree = parse_field_paths(request.query_params.get("expand"))
+        if tree:
+            if isinstance(response.data, list):
+                response.data = expand_references(response.data, tree, request)
+            else:
+                response.data["results"] = expand_references(
+                    response.data["results"], tree, request
+                )
+
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+
+        tree = parse_field_paths(request.query_params.get("expand"))
+        if tree:
+            response.data = expand_references(response.data, tree, request)
+
+        return response
+
+
+class CachedResponse:
+    """
+    Mixin to serve GET responses from the response cache and tag them with
+    a strong ETag, the hash of their rendered body. A matching If-None-Match
+    is answered with a 304 straight from the cache, without running the view.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method != "GET":
+            return super().dispatch(request, *args, **kwargs)
+
+        response_key = get_response_key(request)
+        cached = get_cached_response(response_key)
+
+        if cached is not None:
+            etag, content, content_type = cached
+
+            if etag_matches(request, etag):
+                return self.not_modified(etag)
+
+            response = HttpResponse(content, content_type=content_type)
+            response["ETag"] = etag
+            patch_vary_headers(response, ("Accept",))
+            return response
+
+        # read before the rows, which are only recorded once they are read
+        write_version = get_write_version()
+
+        with record_tags() as tags:
+            # before the rows are read too
+            if getattr(self, "action_map", {}).get("get") == "list":
+                add_tag(tags, get_table_tag(self.queryset.model))
+
+            response = super().dispatch(request, *args, **kwargs)
+
+            if response.status_code != 200 or response.streaming:
+                return response
+
+            response.render()
+
+        etag = compute_etag(response.content)
+        store_response(
+            response_key,
+            etag,
+            response.content,
+            response["Content-Type"],
+            tags,
+            write_version,
+        )
+
+        if etag_matches(request, etag):
+            return self.not_modified(etag)
+
+        response["ETag"] = etag
+        patch_vary_headers(response, ("Accept",))
+        return response
+
+    def not_modified(self, etag):
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        patch_vary_headers(response, ("Accept",))
+        return response
+
+
 q_query_string_parameter = OpenApiParameter(
     name="q",
     description="> Only available locally and not at [pokeapi.co](https://pokeapi.co/docs/v2)\nCase-insensitive query applied on the `name` property. ",
@@ -79,6 +323,92 @@ q_query_string_parameter = OpenApiParameter(
     type=OpenApiTypes.STR,
 )
 
+type_matchup_parameters = [
+    OpenApiParameter(
+        name="attacking",
+        description="Comma separated names or ids of the attacking types. Defaults to every type with damage relations.",
+        location=OpenApiParameter.QUERY,
+        type=OpenApiTypes.STR,
+    ),
+    OpenApiParameter(
+        name="defending",
+        description="Comma separated names or ids of one or two defending types.",
+        location=OpenApiParameter.QUERY,
+        type=OpenApiTypes.STR,
+        required=True,
+    ),
+    OpenApiParameter(
+        name="generation",
+        description="Name or id of the generation whose damage relations are used. Defaults to the current ones.",
+        location=OpenApiParameter.QUERY,
+        type=OpenApiTypes.STR,
+    ),
+]
+
+search_parameters = [
+    OpenApiParameter(
+        name="q",
+        description="Words the localized names start with, in any case and with or without accents.",
+        location=OpenApiParameter.QUERY,
+        type=OpenApiTypes.STR,
+        required=True,
+    ),
+    OpenApiParameter(
+        name="lang",
+        description="Name of the language of the names, e.g. `de` or `ja-Hrkt`. Defaults to every language.",
+        location=OpenApiParameter.QUERY,
+        type=OpenApiTypes.STR,
+    ),
+    OpenApiParameter(
+        name="resource",
+        description="Comma separated resources to search, e.g. `pokemon-species,move`. Defaults to every resource.",
+        location=OpenApiParameter.QUERY,
+        type=OpenApiTypes.STR,
+    ),
+    OpenApiParameter(
+        name="limit",
+        description="Number of results to return, at most 100. Defaults to 20.",
+        location=OpenApiParameter.QUERY,
+        type=OpenApiTypes.INT,
+    ),
+]
+
+document_query_string_parameters = [
+    OpenApiParameter(
+        name="fields",
+        description="> Only available locally and not at [pokeapi.co](https://pokeapi.co/docs/v2)\nComma separated fields to return, dotted paths select fields of nested objects, e.g. `name,types,sprites.other`.",
+        location=OpenApiParameter.QUERY,
+        type=OpenApiTypes.STR,
+    ),
+    OpenApiParameter(
+        name="omit",
+        description="> Only available locally and not at [pokeapi.co](https://pokeapi.co/docs/v2)\nComma separated fields to leave out, dotted paths leave out fields of nested objects, e.g. `moves,sprites.versions`.",
+        location=OpenApiParameter.QUERY,
+        type=OpenApiTypes.STR,
+    ),
+    OpenApiParameter(
+        name="expand",
+        description="> Only available locally and not at [pokeapi.co](https://pokeapi.co/docs/v2)\nComma separated paths of references to replace by their detail documents, e.g. `species,types.type`.",
+        location=OpenApiParameter.QUERY,
+        type=OpenApiTypes.STR,
+    ),
+]
+
+batch_query_string_parameters = [
+    OpenApiParameter(
+        name="id__in",
+        description="> Only available locally and not at [pokeapi.co](https://pokeapi.co/docs/v2)\nComma separated ids of the resources to return as detail documents.",
+        location=OpenApiParameter.QUERY,
+        type=OpenApiTypes.STR,
+    ),
+    OpenApiParameter(
+        name="name__in",
+        description="> Only available locally and not at [pokeapi.co](https://pokeapi.co/docs/v2)\nComma separated names of the resources to return as detail documents.",
+        location=OpenApiParameter.QUERY,
+        type=OpenApiTypes.STR,
+    ),
+]
+
 retrieve_path_parameter = OpenApiParameter(
     name="id",
     description="This parameter can be a string or an integer.",
@@ -88,11 +418,28 @@ retrieve_path_parameter = OpenApiParameter(
 )
 
 
-@extend_schema_view(list=extend_schema(parameters=[q_query_string_parameter]))
+@extend_schema_view(
+    list=extend_schema(
+        parameters=[q_query_string_parameter]
+        + batch_query_string_parameters
+        + document_query_string_parameters
+    )
+)
 class PokeapiCommonViewset(
-    ListOrDetailSerialRelation, NameOrIdRetrieval, viewsets.ReadOnlyModelViewSet
+    CachedResponse,
+    ExpandedReferences,
+    SparseFieldsets,
+    BatchRetrieval,
+    ListOrDetailSerialRelation,
+    PrefetchedRelations,
+    NameOrIdRetrieval,
+    viewsets.ReadOnlyModelViewSet,
 ):
-    @extend_schema(parameters=[retrieve_path_parameter])
+    pagination_class = LimitOffsetOrKeysetPagination
+
+    @extend_schema(
+        parameters=[retrieve_path_parameter] + document_query_string_parameters
+    )
     def retrieve(self, request, pk=None):
         return super().retrieve(request, pk)
 
@@ -114,14 +461,44 @@ class PokeapiWritableViewset(
     def perform_create(self, serializer):
         """Custom create logic if needed"""
         serializer.save()
+        chain_ids, tags = self.get_dependents(serializer.instance)
+        tags.add(get_table_tag(type(serializer.instance)))
+        self.refresh_dependents(chain_ids, tags)
 
     def perform_update(self, serializer):
         """Custom update logic if needed"""
+        chain_ids, tags = self.get_dependents(serializer.instance)
         serializer.save()
+        new_chain_ids, new_tags = self.get_dependents(serializer.instance)
+        self.refresh_dependents(chain_ids | new_chain_ids, tags | new_tags)
 
     def perform_destroy(self, instance):
         """Custom delete logic if needed"""
+        chain_ids, tags = self.get_dependents(instance)
+        tags.add(get_table_tag(type(instance)))
         instance.delete()
+        # the only write that can change names, those of the deleted rows
+        prune_search_index({type(instance)})
+        self.refresh_dependents(chain_ids, tags)
+
+    def get_dependents(self, instance):
+        """
+        Ids of the evolution chains and tags of the cached responses
+        that embed ``instance``.
+        """
+        return set(affected_evolution_chain_ids(instance)), get_instance_tags(instance)
+
+    def refresh_dependents(self, chain_ids, tags):
+        """Rebuild or drop everything built from the written rows."""
+        refresh_evolution_chains(chain_ids)
+        tags |= {get_row_tag(EvolutionChain, chain_id) for chain_id in chain_ids}
+
+        if issubclass(self.queryset.model, Type):
+            invalidate_type_chart()
+
+        invalidate_tags(tags)
+        invalidate_list_counts()
+        invalidate_name_indexes()
 
 
 ##########
@@ -501,7 +878,14 @@ class LocationResource(PokeapiCommonViewset):
         summary="List location areas",
     )
 )
-class LocationAreaResource(ListOrDetailSerialRelation, viewsets.ReadOnlyModelViewSet):
+class LocationAreaResource(
+    CachedResponse,
+    ExpandedReferences,
+    SparseFieldsets,
+    ListOrDetailSerialRelation,
+    PrefetchedRelations,
+    viewsets.ReadOnlyModelViewSet,
+):
     queryset = LocationArea.objects.all()
     serializer_class = LocationAreaDetailSerializer
     list_serializer_class = LocationAreaSummarySerializer
@@ -1001,7 +1385,7 @@ class VersionGroupResource(PokeapiCommonViewset):
         }
     },
 )
-class PokemonEncounterView(APIView):
+class PokemonEncounterView(CachedResponse, APIView):
     def get(self, request, pokemon_id):
         self.context = dict(request=request)
 
@@ -1010,80 +1394,282 @@ class PokemonEncounterView(APIView):
         except Pokemon.DoesNotExist:
             raise Http404
 
-        encounter_objects = Encounter.objects.filter(pokemon=pokemon)
+        encounters_list = get_pokemon_encounters(pokemon, self.context)
 
-        area_ids = (
-            encounter_objects.order_by("location_area")
-            .distinct("location_area")
-            .values_list("location_area", flat=True)
-        )
+        return Response(encounters_list)
 
-        location_area_objects = LocationArea.objects.filter(pk__in=area_ids)
-        version_objects = Version.objects
 
-        encounters_list = []
+@extend_schema(
+    description="Damage multipliers of attacking types against a Pokémon of one or two defending types.",
+    summary="Get type matchups",
+    tags=["pokemon"],
+    parameters=type_matchup_parameters,
+    responses={
+        "200": {
+            "type": "object",
+            "required": ["generation", "defending_types", "matchups"],
+            "properties": {
+                "generation": {
+                    "type": "object",
+                    "nullable": True,
+                    "required": ["name", "url"],
+                    "properties": {
+                        "name": {"type": "string", "example": "generation-i"},
+                        "url": {
+                            "type": "string",
+                            "format": "uri",
+                            "example": "https://pokeapi.co/api/v2/generation/1/",
+                        },
+                    },
+                },
+                "defending_types": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "required": ["name", "url"],
+                        "properties": {
+                            "name": {"type": "string", "example": "grass"},
+                            "url": {
+                                "type": "string",
+                                "format": "uri",
+                                "example": "https://pokeapi.co/api/v2/type/12/",
+                            },
+                        },
+                    },
+                },
+                "matchups": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "required": ["attacking_type", "damage_factors", "multiplier"],
+                        "properties": {
+                            "attacking_type": {
+                                "type": "object",
+                                "required": ["name", "url"],
+                                "properties": {
+                                    "name": {"type": "string", "example": "fire"},
+                                    "url": {
+                                        "type": "string",
+                                        "format": "uri",
+                                        "example": "https://pokeapi.co/api/v2/type/10/",
+                                    },
+                                },
+                            },
+                            "damage_factors": {
+                                "type": "array",
+                                "items": {"type": "integer", "example": 200},
+                            },
+                            "multiplier": {"type": "number", "example": 2.0},
+                        },
+                    },
+                },
+            },
+        }
+    },
+)
+class TypeMatchupView(APIView):
+    def get(self, request):
+        self.context = dict(request=request)
 
-        for area_id in area_ids:
-            location_area = location_area_objects.get(pk=area_id)
+        chart = get_type_chart()
 
-            area_encounters = encounter_objects.filter(location_area_id=area_id)
+        generation_id = None
+        generation = request.query_params.get("generation")
+        if generation:
+            generation_id = chart.find_generation(generation)
+            if generation_id is None:
+                raise ValidationError(
+                    {"generation": ["Unknown generation {}.".format(generation)]}
+                )
 
-            version_ids = (
-                area_encounters.order_by("version_id")
-                .distinct("version_id")
-                .values_list("version_id", flat=True)
-            )
+        present = chart.get_present(generation_id)
 
-            version_details_list = []
+        defending = self.find_types(chart, "defending", present)
+        if not 1 <= len(defending) <= 2:
+            raise ValidationError({"defending": ["Give one or two defending types."]})
 
-            for version_id in version_ids:
-                version = version_objects.get(pk=version_id)
+        attacking = self.find_types(chart, "attacking", present)
+        if not attacking:
+            attacking = [
+                i
+                for i in range(len(chart.type_ids))
+                if present[i] and chart.has_efficacy[i]
+            ]
 
-                version_encounters = area_encounters.filter(
-                    version_id=version_id
-                ).order_by("encounter_slot_id")
+        factors, multipliers = chart.get_matchups(attacking, defending, generation_id)
 
-                encounters_data = EncounterDetailSerializer(
-                    version_encounters, many=True, context=self.context
-                ).data
+        types = SummaryCache(TypeSummarySerializer, self.context)
 
-                max_chance = 0
-                encounter_details_list = []
+        def type_summary(i):
+            return types.get(Type(pk=chart.type_ids[i], name=chart.type_names[i]))
 
-                for encounter in encounters_data:
-                    slot = EncounterSlot.objects.get(pk=encounter["encounter_slot"])
-                    slot_data = EncounterSlotSerializer(slot, context=self.context).data
+        matchups = []
+        for row, i in enumerate(attacking):
+            matchup = OrderedDict()
+            matchup["attacking_type"] = type_summary(i)
+            matchup["damage_factors"] = factors[row].tolist()
+            matchup["multiplier"] = float(multipliers[row])
+            matchups.append(matchup)
 
-                    del encounter["pokemon"]
-                    del encounter["encounter_slot"]
-                    del encounter["location_area"]
-                    del encounter["version"]
-                    encounter["chance"] = slot_data["chance"]
-                    max_chance += slot_data["chance"]
-                    encounter["method"] = slot_data["encounter_method"]
+        data = OrderedDict()
+        data["generation"] = None
+        if generation_id is not None:
+            data["generation"] = GenerationSummarySerializer(
+                Generation(
+                    pk=generation_id, name=dict(chart.generations)[generation_id]
+                ),
+                context=self.context,
+            ).data
+        data["defending_types"] = [type_summary(i) for i in defending]
+        data["matchups"] = matchups
 
-                    encounter_details_list.append(encounter)
+        return Response(data)
 
-                version_details_list.append(
-                    {
-                        "version": VersionSummarySerializer(
-                            version, context=self.context
-                        ).data,
-                        "max_chance": max_chance,
-                        "encounter_details": encounter_details_list,
-                    }
-                )
+    def find_types(self, chart, param, present):
+        indexes = []
+
+        for value in self.request.query_params.get(param, "").split(","):
+            value = value.strip()
+            if not value:
+                continue
+
+            i = chart.find_type(value)
+            if i is None or not present[i]:
+                raise ValidationError({param: ["Unknown type {}.".format(value)]})
+            indexes.append(i)
+
+        return indexes
+
+
+@extend_schema(
+    description="Every detail document of a read-only resource, one JSON document per line. The documents are streamed in primary key order and gzipped when the request accepts it.",
+    summary="Export a resource",
+    tags=["utility"],
+    parameters=[
+        OpenApiParameter(
+            name="resource",
+            description="Name of the resource, as in its list url.",
+            location=OpenApiParameter.PATH,
+            type=OpenApiTypes.STR,
+        )
+    ],
+    responses={(200, "application/x-ndjson"): OpenApiTypes.STR},
+)
+class ResourceExportView(APIView):
+    renderer_classes = [NDJSONRenderer]
+
+    def get(self, request, resource):
+        # the urls import this module
+        from .urls import router
 
-            encounters_list.append(
-                {
-                    "location_area": LocationAreaSummarySerializer(
-                        location_area, context=self.context
-                    ).data,
-                    "version_details": version_details_list,
+        viewsets = {
+            prefix: viewset
+            for prefix, viewset, _ in router.registry
+            if not hasattr(viewset, "create")
+        }
+        if resource not in viewsets:
+            raise Http404
+
+        viewset = viewsets[resource]
+        content = iter_ndjson(
+            viewset.queryset.all(), viewset.serializer_class, {"request": request}
+        )
+
+        gzipped = accepts_gzip(request)
+        if gzipped:
+            content = compress_sequence(content)
+
+        response = StreamingHttpResponse(
+            content, content_type=NDJSONRenderer.media_type
+        )
+        if gzipped:
+            response["Content-Encoding"] = "gzip"
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        return response
+
+
+@extend_schema(
+    description="Resources whose localized names match the query, best matches first: names equal to the query, then names with the most whole words, then the shortest ones.",
+    summary="Search names",
+    tags=["utility"],
+    parameters=search_parameters,
+    responses={
+        "200": {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "results": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "required": ["resource", "name", "language", "url"],
+                        "properties": {
+                            "resource": {
+                                "type": "string",
+                                "example": "pokemon-species",
+                            },
+                            "name": {"type": "string", "example": "Glumanda"},
+                            "language": {"type": "string", "example": "de"},
+                            "url": {
+                                "type": "string",
+                                "format": "uri",
+                                "example": "https://pokeapi.co/api/v2/pokemon-species/4/",
+                            },
+                        },
+                    },
                 }
+            },
+        }
+    },
+)
+class SearchView(APIView):
+    default_limit = 20
+    max_limit = 100
+
+    def get(self, request):
+        query = request.query_params.get("q", "")
+        if not get_words(query):
+            raise ValidationError({"q": ["Give words to search for."]})
+
+        basenames = {prefix: basename for prefix, _, basename in get_resources()}
+
+        resources = [
+            resource.strip()
+            for resource in request.query_params.get("resource", "").split(",")
+            if resource.strip()
+        ]
+        for resource in resources:
+            if resource not in basenames:
+                raise ValidationError(
+                    {"resource": ["Unknown resource {}.".format(resource)]}
+                )
+
+        limit = request.query_params.get("limit", str(self.default_limit))
+        if not limit.isdigit() or not 1 <= int(limit) <= self.max_limit:
+            raise ValidationError(
+                {"limit": ["Give a number from 1 to {}.".format(self.max_limit)]}
             )
 
-        return Response(encounters_list)
+        results = []
+        for resource, resource_id, name, language in search_names(
+            query,
+            language=request.query_params.get("lang"),
+            resources=resources,
+            limit=int(limit),
+        ):
+            result = OrderedDict()
+            result["resource"] = resource
+            result["name"] = name
+            result["language"] = language
+            result["url"] = request.build_absolute_uri(
+                reverse(
+                    "{}-detail".format(basenames[resource]), kwargs={"pk": resource_id}
+                )
+            )
+            results.append(result)
+
+        return Response({"results": results})
 
 
 ##################################
@@ -0,0 +1,159 @@
+from collections import OrderedDict
+
+from django.db.models import Prefetch
+
+from .models import Encounter, EncounterConditionValueMap
+
+################
+#  ENCOUNTERS  #
+################
+
+# Encounters are served in two shapes: grouped by location area for
+# /pokemon/{id}/encounters and grouped by pokemon for /location-area/{id}/.
+# Both are built here from the same rows, loaded with everything they
+# reference in a fixed number of queries:
+#
+#   [
+#     {
+#       "<group>": {"name": ..., "url": ...},
+#       "version_details": [
+#         {
+#           "version": {"name": ..., "url": ...},
+#           "max_chance": ...,
+#           "encounter_details": [
+#             {"min_level", "max_level", "condition_values", "chance", "method"}
+#           ],
+#         }
+#       ],
+#     }
+#   ]
+
+
+def load_encounters(order_by, **filters):
+    """
+    Fetch the encounters matching ``filters`` together with their pokemon,
+    location area, version, slot, method and condition values.
+
+    This always costs two queries: one joined query for the encounters and
+    one for all of their condition values.
+    """
+
+    condition_value_maps = EncounterConditionValueMap.objects.select_related(
+        "encounter_condition_value"
+    ).order_by("id")
+
+    return (
+        Encounter.objects.filter(**filters)
+        .select_related(
+            "pokemon",
+            "location_area",
+            "version",
+            "encounter_slot__encounter_method",
+        )
+        .prefetch_related(
+            Prefetch(
+                "encounterconditionvaluemap_set",
+                queryset=condition_value_maps,
+                to_attr="condition_value_maps",
+            )
+        )
+        .order_by(*order_by)
+    )
+
+
+def aggregate_encounters(encounters, group_by, context):
+    """
+    Group already loaded encounters by ``group_by`` ("pokemon" or
+    "location_area") and then by version, in the order they were loaded.
+    """
+
+    # Imported here because the serializers module depends on this one.
+    from .serializers import (
+        EncounterConditionValueSummarySerializer,
+        EncounterMethodSummarySerializer,
+        LocationAreaSummarySerializer,
+        PokemonSummarySerializer,
+        SummaryCache,
+        VersionSummarySerializer,
+    )
+
+    group_serializers = {
+        "pokemon": PokemonSummarySerializer,
+        "location_area": LocationAreaSummarySerializer,
+    }
+
+    groups = SummaryCache(group_serializers[group_by], context)
+    versions = SummaryCache(VersionSummarySerializer, context)
+    methods = SummaryCache(EncounterMethodSummarySerializer, context)
+    condition_values = SummaryCache(EncounterConditionValueSummarySerializer, context)
+
+    grouped = OrderedDict()
+
+    for encounter in encounters:
+        group = getattr(encounter, group_by)
+        by_version = grouped.setdefault(group.pk, (group, OrderedDict()))[1]
+        by_version.setdefault(encounter.version_id, []).append(encounter)
+
+    encounters_list = []
+
+    for group, by_version in grouped.values():
+        version_details_list = []
+
+        for version_encounters in by_version.values():
+            max_chance = 0
+            encounter_details_list = []
+
+            for encounter in version_encounters:
+                slot = encounter.encounter_slot
+                chance = slot.rarity if slot is not None else 0
+
+                encounter_detail = OrderedDict()
+                encounter_detail["min_level"] = encounter.min_level
+                encounter_detail["max_level"] = encounter.max_level
+                encounter_detail["condition_values"] = [
+                    condition_values.get(value_map.encounter_condition_value)
+                    for value_map in encounter.condition_value_maps
+                ]
+                encounter_detail["chance"] = chance
+                encounter_detail["method"] = methods.get(
+                    slot.encounter_method if slot is not None else None
+                )
+
+                max_chance += chance
+                encounter_details_list.append(encounter_detail)
+
+            version_detail = OrderedDict()
+            version_detail["version"] = versions.get(version_encounters[0].version)
+            version_detail["max_chance"] = max_chance
+            version_detail["encounter_details"] = encounter_details_list
+
+            version_details_list.append(version_detail)
+
+        group_detail = OrderedDict()
+        group_detail[group_by] = groups.get(group)
+        group_detail["version_details"] = version_details_list
+
+        encounters_list.append(group_detail)
+
+    return encounters_list
+
+
+def get_pokemon_encounters(pokemon, context):
+    """Encounters of a pokemon, grouped by location area."""
+
+    encounters = load_encounters(
+        ("location_area_id", "version_id", "encounter_slot_id", "id"),
+        pokemon=pokemon,
+    )
+
+    return aggregate_encounters(encounters, "location_area", context)
+
+
+def get_location_area_encounters(location_area, context):
+    """Encounters in a location area, grouped by pokemon."""
+
+    encounters = load_encounters(
+        ("pokemon_id", "version_id", "id"), location_area=location_area
+    )
+
+    return aggregate_encounters(encounters, "pokemon", context)
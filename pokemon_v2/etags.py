@@ -0,0 +1,27 @@
+import hashlib
+
+from django.utils.http import parse_etags, quote_etag
+
+###########
+#  ETAGS  #
+###########
+
+# Read-only responses carry a strong ETag, the hash of their rendered body.
+# The ETag is stored with the rendered body in the response cache (see
+# pokemon_v2/responsecache.py), so a matching If-None-Match is answered with
+# a 304 before the view queries anything.
+
+
+def compute_etag(content):
+    return quote_etag(hashlib.sha256(content).hexdigest())
+
+
+def etag_matches(request, etag):
+    """Whether the If-None-Match header of ``request`` lists ``etag``."""
+
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if not if_none_match:
+        return False
+
+    etags = parse_etags(if_none_match)
+    return "*" in etags or etag in etags
@@ -0,0 +1,192 @@
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+
+from .models import (
+    EvolutionChainTree,
+    PokemonEvolution,
+    PokemonSpecies,
+    Type,
+)
+
+######################
+#  EVOLUTION CHAINS  #
+######################
+
+# Evolution chains only change when the data is rebuilt, so their trees are
+# serialized once (at the end of data/v2/build.py, or the first time a chain
+# is requested) and stored in EvolutionChainTree. Urls are stored relative to
+# the host and made absolute when the chain is served.
+
+EVOLUTION_RELATIONS = (
+    "evolution_item",
+    "evolution_trigger",
+    "gender",
+    "held_item",
+    "known_move",
+    "known_move_type",
+    "location",
+    "party_species",
+    "party_type",
+    "trade_species",
+    "region",
+    "base_form",
+)
+
+
+def build_evolution_chains(chain_ids=None):
+    """
+    Serialize the given evolution chains (or all of them) into
+    ``{chain_id: chain}``.
+
+    Species and evolutions for every requested chain are loaded in two
+    queries, however many chains there are.
+    """
+
+    # Imported here because the serializers module depends on this one.
+    from .serializers import (
+        PokemonEvolutionSerializer,
+        PokemonSpeciesSummarySerializer,
+    )
+
+    context = {"request": None}
+
+    species_objects = PokemonSpecies.objects.only(
+        "name", "order", "is_baby", "evolves_from_species", "evolution_chain"
+    ).order_by("order", "id")
+    evolution_objects = PokemonEvolution.objects.select_related(
+        *EVOLUTION_RELATIONS
+    ).order_by("id")
+
+    if chain_ids is not None:
+        species_objects = species_objects.filter(evolution_chain_id__in=chain_ids)
+        evolution_objects = evolution_objects.filter(
+            evolved_species__evolution_chain_id__in=chain_ids
+        )
+
+    evolutions_by_species = {}
+    for evolution in evolution_objects:
+        evolutions_by_species.setdefault(evolution.evolved_species_id, []).append(
+            evolution
+        )
+
+    species_by_chain = OrderedDict()
+    for species in species_objects:
+        species_by_chain.setdefault(species.evolution_chain_id, []).append(species)
+
+    def build_chain_link_entry(chain_link):
+        species = chain_link["species"]
+        evolution_data = None
+
+        if species.evolves_from_species_id:
+            evolution_data = PokemonEvolutionSerializer(
+                evolutions_by_species.get(species.pk, []), many=True, context=context
+            ).data
+
+        entry = OrderedDict()
+        entry["is_baby"] = species.is_baby
+        entry["species"] = PokemonSpeciesSummarySerializer(
+            species, context=context
+        ).data
+        entry["evolution_details"] = evolution_data or []
+        entry["evolves_to"] = [
+            build_chain_link_entry(child) for child in chain_link["children"]
+        ]
+
+        return entry
+
+    chains = {}
+
+    for chain_id, chain_species in species_by_chain.items():
+        # Species come ordered so that a species always follows the one it
+        # evolves from; anything whose parent isn't in the chain hangs off
+        # the root.
+        root = None
+        links = {}
+
+        for species in chain_species:
+            chain_link = {"species": species, "children": []}
+
+            if root is None:
+                root = chain_link
+            else:
+                parent_link = links.get(species.evolves_from_species_id, root)
+                parent_link["children"].append(chain_link)
+
+            links[species.pk] = chain_link
+
+        chains[chain_id] = build_chain_link_entry(root)
+
+    return chains
+
+
+def refresh_evolution_chains(chain_ids=None):
+    """
+    Rebuild the stored trees of the given evolution chains, or of all
+    chains when ``chain_ids`` is None, and return the fresh chains.
+    """
+
+    if chain_ids is not None and not chain_ids:
+        return {}
+
+    chains = build_evolution_chains(chain_ids)
+
+    stale_trees = EvolutionChainTree.objects.all()
+    if chain_ids is not None:
+        stale_trees = stale_trees.filter(evolution_chain_id__in=chain_ids)
+    stale_trees.delete()
+
+    EvolutionChainTree.objects.bulk_create(
+        [
+            EvolutionChainTree(evolution_chain_id=chain_id, chain=json.dumps(chain))
+            for chain_id, chain in chains.items()
+        ],
+        batch_size=200,
+        ignore_conflicts=True,
+    )
+
+    return chains
+
+
+def affected_evolution_chain_ids(instance):
+    """
+    Ids of the evolution chains whose stored tree embeds ``instance``.
+    """
+
+    if isinstance(instance, PokemonSpecies):
+        chain_ids = [instance.evolution_chain_id]
+
+    elif isinstance(instance, Type):
+        chain_ids = (
+            PokemonEvolution.objects.filter(
+                Q(known_move_type=instance) | Q(party_type=instance)
+            )
+            .values_list("evolved_species__evolution_chain_id", flat=True)
+            .distinct()
+        )
+
+    else:
+        chain_ids = []
+
+    return [chain_id for chain_id in chain_ids if chain_id is not None]
+
+
+def get_evolution_chain(evolution_chain, context):
+    """
+    The chain of an EvolutionChain, read from its stored tree.
+    """
+
+    try:
+        chain = evolution_chain.tree.chain
+    except EvolutionChainTree.DoesNotExist:
+        chains = refresh_evolution_chains([evolution_chain.pk])
+        chain = json.dumps(chains.get(evolution_chain.pk))
+
+    request = context.get("request")
+    if request is not None:
+        chain = chain.replace(
+            '"url": "/', '"url": "{}'.format(request.build_absolute_uri("/"))
+        )
+
+    return json.loads(chain)
@@ -0,0 +1,165 @@
+from urllib.parse import urlsplit
+
+from django.db.models import prefetch_related_objects
+from django.urls import Resolver404, resolve
+from rest_framework.exceptions import ValidationError
+
+from .exports import get_prefetch_lookups
+from .responsecache import get_cached_document
+
+################
+#  EXPANSIONS  #
+################
+
+# `?expand=species,types.type` replaces the {name, url} references found at
+# the given dotted paths of a document by the detail documents they point
+# to. References met halfway down a path are expanded as well, so that
+# `species.generation` expands the species and then its generation, and the
+# items of a list page are expanded before the paths are followed in them.
+#
+# The documents are expanded one level at a time. The references of a level
+# are taken from the response cache when their detail document is cached,
+# and the others are loaded with one query per resource, and serialized
+# together with their relations prefetched, like the exports.
+
+# expanding more references than this in one request is refused
+MAX_EXPANDED_REFERENCES = 1000
+
+
+def is_reference(value):
+    return isinstance(value, dict) and "url" in value and set(value) <= {"name", "url"}
+
+
+def collect_references(value, tree, references):
+    """
+    Add to ``references`` the urls of the references at the paths of
+    ``tree``, or on the way to them.
+    """
+
+    if isinstance(value, list):
+        for item in value:
+            collect_references(item, tree, references)
+        return
+
+    if is_reference(value):
+        references.add(value["url"])
+        return
+
+    if not isinstance(value, dict):
+        return
+
+    for key, subtree in tree.items():
+        if key not in value:
+            continue
+
+        if subtree is None:
+            children = value[key] if isinstance(value[key], list) else [value[key]]
+            references.update(child["url"] for child in children if is_reference(child))
+        else:
+            collect_references(value[key], subtree, references)
+
+
+def substitute_references(value, tree, documents):
+    """
+    A copy of ``value`` with the references at the paths of ``tree``, or on
+    the way to them, replaced by their loaded ``documents``. ``value``
+    itself can be shared, so it is left alone.
+    """
+
+    if isinstance(value, list):
+        return [substitute_references(item, tree, documents) for item in value]
+
+    if is_reference(value):
+        document = documents.get(value["url"])
+        if document is None:
+            return value
+        value = document
+
+    if not isinstance(value, dict):
+        return value
+
+    substituted = dict(value)
+    for key, subtree in tree.items():
+        if key in value:
+            substituted[key] = substitute_references(
+                value[key], subtree or {}, documents
+            )
+
+    return substituted
+
+
+def get_detail_view(url):
+    """The viewset class and pk of the detail document at ``url``, or None."""
+
+    try:
+        match = resolve(urlsplit(url).path)
+    except Resolver404:
+        return None
+
+    view_class = getattr(match.func, "cls", None)
+    actions = getattr(match.func, "actions", None) or {}
+    if view_class is None or actions.get("get") != "retrieve":
+        return None
+
+    return view_class, match.kwargs.get("pk")
+
+
+def load_documents(urls, request):
+    """The detail documents at ``urls``, None for those that aren't any."""
+
+    documents = {}
+    missing = {}
+    accept = request.META.get("HTTP_ACCEPT", "")
+
+    for url in urls:
+        document = get_cached_document(url, accept)
+        if document is not None:
+            documents[url] = document
+            continue
+
+        documents[url] = None
+        view = get_detail_view(url)
+        if view is not None:
+            view_class, pk = view
+            missing.setdefault(view_class, {}).setdefault(pk, []).append(url)
+
+    context = {"request": request}
+    for view_class, pk_urls in missing.items():
+        serializer_class = view_class.serializer_class
+        instances = list(view_class.queryset.all().filter(pk__in=list(pk_urls)))
+        prefetch_related_objects(instances, *get_prefetch_lookups(serializer_class))
+
+        data = serializer_class(instances, many=True, context=context).data
+        for instance, document in zip(instances, data):
+            for url in pk_urls.get(str(instance.pk), []):
+                documents[url] = document
+
+    return documents
+
+
+def expand_references(documents, tree, request):
+    """``documents`` with the references at the paths of ``tree`` expanded."""
+
+    loaded = {}
+
+    while True:
+        references = set()
+        collect_references(documents, tree, references)
+        references.difference_update(loaded)
+
+        if not references:
+            return documents
+
+        if len(loaded) + len(references) > MAX_EXPANDED_REFERENCES:
+            raise ValidationError(
+                {
+                    "expand": [
+                        "Expands more than {} references.".format(
+                            MAX_EXPANDED_REFERENCES
+                        )
+                    ]
+                }
+            )
+
+        loaded.update(load_documents(references, request))
+        documents = substitute_references(documents, tree, loaded)
@@ -0,0 +1,93 @@
+import functools
+import re
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import prefetch_related_objects
+from rest_framework import serializers
+
+from .renderers import NDJSONRenderer
+from .serializers import share_summaries
+
+############
+#  EXPORT  #
+############
+
+# /api/v2/<resource>/export.ndjson streams the detail document of every row
+# of a resource, one per line. The rows are read with .iterator() and
+# serialized in chunks: the relations rendered by nested serializers are
+# prefetched for the whole chunk, and the summaries the chunk refers to are
+# serialized once. Nothing outlives its chunk, so memory doesn't grow with
+# the size of the table.
+#
+# The lines are gzipped as they are produced when the client accepts it.
+
+EXPORT_CHUNK_SIZE = 200
+
+# the same test as GZipMiddleware's
+ACCEPTS_GZIP_RGX = re.compile(r"\bgzip\b")
+
+
+def accepts_gzip(request):
+    return bool(ACCEPTS_GZIP_RGX.search(request.META.get("HTTP_ACCEPT_ENCODING", "")))
+
+
+@functools.lru_cache(maxsize=None)
+def get_prefetch_lookups(serializer_class):
+    """
+    The relations of the model rendered by nested serializers, and those of
+    the models of the nested serializers, like names and names__language.
+    """
+
+    model = serializer_class.Meta.model
+    lookups = []
+
+    for field in serializer_class().fields.values():
+        if not isinstance(field, serializers.BaseSerializer):
+            continue
+
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            continue
+
+        if not model_field.is_relation:
+            continue
+
+        lookups.append(field.source)
+
+        nested = getattr(field, "child", field)
+        if hasattr(getattr(nested, "Meta", None), "model"):
+            lookups.extend(
+                "{}__{}".format(field.source, lookup)
+                for lookup in get_prefetch_lookups(type(nested))
+            )
+
+    return tuple(lookups)
+
+
+def render_chunk(instances, serializer_class, lookups, context, renderer):
+    prefetch_related_objects(instances, *lookups)
+
+    with share_summaries():
+        return b"".join(
+            renderer.render(serializer_class(instance, context=context).data)
+            for instance in instances
+        )
+
+
+def iter_ndjson(queryset, serializer_class, context):
+    """The detail documents of ``queryset`` as chunks of JSON lines."""
+
+    renderer = NDJSONRenderer()
+    lookups = get_prefetch_lookups(serializer_class)
+
+    chunk = []
+    for instance in queryset.order_by("pk").iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        chunk.append(instance)
+
+        if len(chunk) == EXPORT_CHUNK_SIZE:
+            yield render_chunk(chunk, serializer_class, lookups, context, renderer)
+            chunk = []
+
+    if chunk:
+        yield render_chunk(chunk, serializer_class, lookups, context, renderer)
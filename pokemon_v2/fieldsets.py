@@ -0,0 +1,121 @@
+from rest_framework import serializers
+
+################
+#  FIELDSETS   #
+################
+
+# `?fields=name,types,sprites.other` keeps only the listed fields of a
+# document and `?omit=moves,sprites.versions` drops the listed ones. Both take
+# dotted paths into nested objects, and into every item of nested lists.
+#
+# The top level fields, and the fields of nested serializers, are removed
+# from the serializer before anything is serialized, so a method field that
+# isn't wanted never runs its queries. Paths into the output of other fields,
+# like the sprites JSON, are pruned from that output.
+#
+# The paths are parsed into trees: {"name": None, "sprites": {"other": None}}
+# where None selects (or drops) everything below.
+
+
+def parse_field_paths(value):
+    """
+    The tree of the comma separated dotted paths in ``value``, or None if
+    it has none, so that an empty `?fields=` doesn't drop every field.
+    """
+
+    if value is None:
+        return None
+
+    tree = {}
+    for path in value.split(","):
+        parts = [part for part in path.strip().split(".") if part]
+        if not parts:
+            continue
+
+        node = tree
+        for part in parts[:-1]:
+            if part in node and node[part] is None:
+                # an ancestor is selected whole already
+                break
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = None
+
+    return tree or None
+
+
+def get_nested_serializer(field):
+    if isinstance(field, serializers.ListSerializer):
+        return field.child
+    if isinstance(field, serializers.Serializer):
+        return field
+    return None
+
+
+def select_fields(serializer, only=None, omit=None):
+    """
+    Remove the fields of ``serializer`` that are not in the ``only`` tree
+    or are dropped by the ``omit`` tree.
+    """
+
+    serializer = get_nested_serializer(serializer) or serializer
+    fields = serializer.fields
+
+    for name in list(fields):
+        if only is not None and name not in only:
+            del fields[name]
+            continue
+        if omit is not None and name in omit and omit[name] is None:
+            del fields[name]
+            continue
+
+        field_only = only.get(name) if only is not None else None
+        field_omit = omit.get(name) if omit is not None else None
+        if field_only is None and field_omit is None:
+            continue
+
+        nested_serializer = get_nested_serializer(fields[name])
+        if nested_serializer is not None:
+            select_fields(nested_serializer, field_only, field_omit)
+        else:
+            prune_field(fields[name], field_only, field_omit)
+
+
+def prune_field(field, only, omit):
+    """Prune the output of a field that isn't a serializer."""
+
+    to_representation = field.to_representation
+
+    def pruned_representation(value):
+        return prune_data(to_representation(value), only, omit)
+
+    field.to_representation = pruned_representation
+
+
+def prune_data(data, only=None, omit=None):
+    """
+    A copy of ``data`` with only the keys in the ``only`` tree, minus the
+    ones dropped by the ``omit`` tree. ``data`` itself can be shared, so it
+    is left alone.
+    """
+
+    if isinstance(data, list):
+        return [prune_data(item, only, omit) for item in data]
+    if not isinstance(data, dict):
+        return data
+
+    pruned = {}
+    for key, value in data.items():
+        if only is not None and key not in only:
+            continue
+        if omit is not None and key in omit and omit[key] is None:
+            continue
+
+        value_only = only.get(key) if only is not None else None
+        value_omit = omit.get(key) if omit is not None else None
+        if value_only is not None or value_omit is not None:
+            value = prune_data(value, value_only, value_omit)
+
+        pruned[key] = value
+
+    return pruned
@@ -0,0 +1,38 @@
+from collections import OrderedDict
+
+from .models import PokemonMove
+
+###############
+#  LEARNSETS  #
+###############
+
+# A Pokémon can learn the same move in many version groups and through
+# several learn methods, so its learnset is stored as one PokemonMove row per
+# (move, version group, learn method).  Loading those rows one move at a time
+# costs a query per move, which is what made /pokemon/{id}/ so expensive.
+
+
+def load_learnset(pokemon):
+    """
+    Load every PokemonMove row of a Pokémon in one joined query and
+    group them by move.
+
+    Returns a list of ``(move, [pokemon_move, ...])`` pairs ordered by
+    move id.  Each row has its move, version group and learn method
+    already attached, so reading them never hits the database again.
+    """
+
+    rows = (
+        PokemonMove.objects.filter(pokemon=pokemon)
+        .select_related("move", "version_group", "move_learn_method")
+        .order_by("move_id", "id")
+    )
+
+    learnset = OrderedDict()
+
+    for row in rows:
+        if row.move_id not in learnset:
+            learnset[row.move_id] = (row.move, [])
+        learnset[row.move_id][1].append(row)
+
+    return list(learnset.values())
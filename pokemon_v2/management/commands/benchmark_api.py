@@ -0,0 +1,312 @@
+import json
+import time
+from contextlib import nullcontext
+
+import numpy as np
+from cachalot.api import cachalot_disabled
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client, override_settings
+
+from pokemon_v2 import versions
+from pokemon_v2.models import (
+    Encounter,
+    Pokemon,
+    PokemonDexNumber,
+    PokemonItem,
+    PokemonMove,
+    PokemonType,
+)
+from pokemon_v2.search import get_resources
+
+API_ROOT = "/api/v2/"
+
+PERCENTILES = (50, 95, 99)
+
+# (name, prefix, model of the rows, field pointing at the resource): the
+# resource with the most rows of the model is requested as a worst case
+WORST_CASES = (
+    ("most-moves", "pokemon", PokemonMove, "pokemon_id"),
+    ("most-learners", "move", PokemonMove, "move_id"),
+    ("most-encounters", "location-area", Encounter, "location_area_id"),
+    ("most-pokemon", "type", PokemonType, "type_id"),
+    ("most-holders", "item", PokemonItem, "item_id"),
+    ("most-entries", "pokedex", PokemonDexNumber, "pokedex_id"),
+)
+
+# the response cache may not answer a request, and cachalot, which ignores
+# override_settings, is disabled around them
+UNCACHED_SETTINGS = {
+    "CACHES": {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}},
+}
+
+
+def get_sample_pks(model, samples):
+    """``samples`` pks spread evenly over the table."""
+
+    pks = list(model.objects.order_by("pk").values_list("pk", flat=True))
+    if len(pks) <= samples:
+        return pks
+
+    return [pks[index] for index in np.linspace(0, len(pks) - 1, samples, dtype=int)]
+
+
+def get_busiest_pk(model, field):
+    """The value of ``field`` shared by the most rows of ``model``."""
+
+    busiest = (
+        model.objects.exclude(**{field: None})
+        .values(field)
+        .annotate(rows=Count("pk"))
+        .order_by("-rows", field)
+        .first()
+    )
+    return busiest[field] if busiest else None
+
+
+def get_endpoints(resources, samples):
+    """Endpoint name -> paths requested for it."""
+
+    endpoints = {}
+
+    for prefix, model, _ in resources:
+        list_path = "{}{}/".format(API_ROOT, prefix)
+        endpoints["{}/list".format(prefix)] = [list_path]
+        endpoints["{}/detail".format(prefix)] = [
+            "{}{}/".format(list_path, pk) for pk in get_sample_pks(model, samples)
+        ]
+
+    prefixes = {prefix for prefix, _, _ in resources}
+    for name, prefix, model, field in WORST_CASES:
+        if prefix not in prefixes:
+            continue
+
+        pk = get_busiest_pk(model, field)
+        if pk is not None:
+            endpoints["{}/{}".format(prefix, name)] = [
+                "{}{}/{}/".format(API_ROOT, prefix, pk)
+            ]
+
+    busiest_pokemon = get_busiest_pk(Encounter, "pokemon_id")
+    if "pokemon" in prefixes and busiest_pokemon is not None:
+        endpoints["pokemon/encounters/most-encounters"] = [
+            "{}pokemon/{}/encounters".format(API_ROOT, busiest_pokemon)
+        ]
+
+    return endpoints
+
+
+def measure_endpoint(client, paths, repeat):
+    """Latency percentiles, query counts and payload sizes of ``paths``."""
+
+    timings = []
+    queries = []
+    sizes = []
+
+    for path in paths:
+        # also warms up the code paths, it isn't timed
+        response = client.get(path)
+        if response.status_code != 200:
+            raise CommandError("{} answered {}".format(path, response.status_code))
+
+        # counted by QueryInstrumentationMiddleware
+        queries.append(response.wsgi_request.query_stats.count)
+        sizes.append(len(response.content))
+
+        for _ in range(repeat):
+            start = time.perf_counter()
+            client.get(path)
+            timings.append(time.perf_counter() - start)
+
+    result = {"requests": len(timings), "paths": len(paths)}
+    for percentile, value in zip(PERCENTILES, np.percentile(timings, PERCENTILES)):
+        result["p{}_ms".format(percentile)] = round(float(value) * 1000, 2)
+    result.update(
+        queries_max=max(queries),
+        queries_mean=round(sum(queries) / len(queries), 1),
+        bytes_max=max(sizes),
+        bytes_mean=round(sum(sizes) / len(sizes)),
+    )
+    return result
+
+
+def compare_to_baseline(endpoints, baseline, threshold):
+    """
+    Endpoint name -> change against ``baseline``, and the names of the
+    endpoints whose p95 grew by more than ``threshold`` percent or which
+    make more queries.
+    """
+
+    comparison = {}
+    regressions = []
+
+    for name, result in endpoints.items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if previous is None:
+            continue
+
+        change = {}
+        for percentile in PERCENTILES:
+            key = "p{}_ms".format(percentile)
+            change["p{}_change_percent".format(percentile)] = (
+                round(100 * (result[key] - previous[key]) / previous[key], 1)
+                if previous[key]
+                else None
+            )
+        change["queries_max_change"] = result["queries_max"] - previous["queries_max"]
+        change["bytes_max_change"] = result["bytes_max"] - previous["bytes_max"]
+        comparison[name] = change
+
+        p95_change = change["p95_change_percent"]
+        if change["queries_max_change"] > 0 or (
+            p95_change is not None and p95_change > threshold
+        ):
+            regressions.append(name)
+
+    return comparison, regressions
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the list and detail requests of every read-only resource, and of "
+        "the resources with the most related rows, and report the latency "
+        "percentiles, query counts and payload sizes as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--build",
+            action="store_true",
+            help=(
+                "Build the database from data/v2/csv first, replacing the data "
+                "of the configured database"
+            ),
+        )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=1,
+            help="Number of worker processes of the build",
+        )
+        parser.add_argument(
+            "--resources",
+            help="Comma separated resources to benchmark, all of them by default",
+        )
+        parser.add_argument(
+            "--samples",
+            type=int,
+            default=20,
+            help="Number of detail documents requested for each resource",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of timed requests of each path",
+        )
+        parser.add_argument(
+            "--cached",
+            action="store_true",
+            help="Let cachalot and the response cache answer the requests",
+        )
+        parser.add_argument(
+            "--output",
+            metavar="PATH",
+            help="Write the results to PATH rather than to the standard output",
+        )
+        parser.add_argument(
+            "--baseline",
+            metavar="PATH",
+            help=(
+                "Results of an earlier run to compare with, the command fails "
+                "when an endpoint regressed"
+            ),
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=20.0,
+            help="Percentage by which a p95 can grow before it is a regression",
+        )
+
+    def handle(self, *args, **options):
+        if options["samples"] < 1 or options["repeat"] < 1:
+            raise CommandError("--samples and --repeat must be at least 1")
+
+        baseline = None
+        if options["baseline"]:
+            try:
+                with open(options["baseline"]) as baseline_file:
+                    baseline = json.load(baseline_file)
+            except (OSError, ValueError) as error:
+                raise CommandError("Can't read the baseline: {}".format(error))
+
+        if options["build"]:
+            # the build module opens a cursor on import
+            from data.v2.build import build_all
+
+            build_all(jobs=options["jobs"])
+
+        if not Pokemon.objects.exists():
+            raise CommandError("The database is empty, build it first")
+
+        resources = get_resources()
+        if options["resources"]:
+            wanted = set(options["resources"].split(","))
+            unknown = wanted - {prefix for prefix, _, _ in resources}
+            if unknown:
+                raise CommandError(
+                    "Unknown resources {}".format(", ".join(sorted(unknown)))
+                )
+            resources = [resource for resource in resources if resource[0] in wanted]
+
+        settings = {} if options["cached"] else UNCACHED_SETTINGS
+        cachalot = nullcontext() if options["cached"] else cachalot_disabled()
+        client = Client(HTTP_HOST="localhost")
+        endpoints = {}
+
+        # the data version is read once rather than by whichever request comes
+        # DATA_VERSION_INTERVAL seconds after the last read, which would count
+        # one more query for its endpoint
+        data_version_interval = versions.DATA_VERSION_INTERVAL
+        versions.DATA_VERSION_INTERVAL = None
+        versions.refresh_data_version()
+
+        try:
+            with override_settings(**settings), cachalot:
+                for name, paths in get_endpoints(resources, options["samples"]).items():
+                    endpoints[name] = measure_endpoint(client, paths, options["repeat"])
+                    self.stderr.write(
+                        "{:<45}{:>9.1f}ms p95{:>6} queries".format(
+                            name,
+                            endpoints[name]["p95_ms"],
+                            endpoints[name]["queries_max"],
+                        )
+                    )
+        finally:
+            versions.DATA_VERSION_INTERVAL = data_version_interval
+
+        results = {
+            "samples": options["samples"],
+            "repeat": options["repeat"],
+            "cached": options["cached"],
+            "endpoints": endpoints,
+        }
+
+        regressions = []
+        if baseline is not None:
+            results["comparison"], regressions = compare_to_baseline(
+                endpoints, baseline, options["threshold"]
+            )
+
+        content = json.dumps(results, indent=2, sort_keys=True)
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                output_file.write(content + "\n")
+        else:
+            self.stdout.write(content)
+
+        if regressions:
+            raise CommandError(
+                "Regressed against the baseline: {}".format(", ".join(regressions))
+            )
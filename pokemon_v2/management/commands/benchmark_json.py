@@ -0,0 +1,143 @@
+import io
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.http.request import validate_host
+from django.test import RequestFactory
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from pokemon_v2.renderers import ORJSONParser, ORJSONRenderer
+
+
+def best_time(function, repeat):
+    """The fastest of ``repeat`` runs of ``function``, in seconds."""
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+class Command(BaseCommand):
+    help = (
+        "Render and parse detail documents with the stdlib and the orjson "
+        "JSON classes, check that they agree and compare their speed"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--resources",
+            default="pokemon,pokemon-species,move,type",
+            help="Comma separated resources whose documents are used",
+        )
+        parser.add_argument(
+            "--documents",
+            type=int,
+            default=50,
+            help="Number of detail documents of each resource",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=10,
+            help="Number of timed runs, the fastest one is reported",
+        )
+        parser.add_argument(
+            "--base-url",
+            default="https://pokeapi.co",
+            help="Scheme and host of the urls inside the documents",
+        )
+
+    def handle(self, *args, **options):
+        from pokemon_v2.urls import router
+
+        url = urlsplit(options["base_url"])
+        if url.scheme not in ("http", "https") or not url.netloc:
+            raise CommandError("Invalid base url {}".format(options["base_url"]))
+        if not validate_host(url.hostname, settings.ALLOWED_HOSTS):
+            raise CommandError("{} is not in ALLOWED_HOSTS".format(url.hostname))
+
+        request = RequestFactory().get(
+            "/", HTTP_HOST=url.netloc, secure=url.scheme == "https"
+        )
+        viewsets = {prefix: viewset for prefix, viewset, _ in router.registry}
+        repeat = max(options["repeat"], 1)
+
+        self.stdout.write(
+            "{:<20}{:>6}{:>10}  {:>9}{:>9}{:>8}  {:>9}{:>9}{:>8}".format(
+                "resource",
+                "docs",
+                "KiB",
+                "dumps",
+                "orjson",
+                "",
+                "loads",
+                "orjson",
+                "",
+            )
+        )
+
+        mismatches = []
+        for prefix in options["resources"].split(","):
+            if prefix not in viewsets:
+                raise CommandError("Unknown resource {}".format(prefix))
+
+            viewset = viewsets[prefix]
+            context = {"request": request}
+            documents = [
+                viewset.serializer_class(instance, context=context).data
+                for instance in viewset.queryset.order_by("pk")[: options["documents"]]
+            ]
+            if not documents:
+                self.stdout.write("{:<20}{:>6}".format(prefix, 0))
+                continue
+
+            renderers = (JSONRenderer(), ORJSONRenderer())
+            rendered = [
+                [renderer.render(document) for document in documents]
+                for renderer in renderers
+            ]
+            if rendered[0] != rendered[1]:
+                mismatches.append(prefix)
+
+            render_times = [
+                best_time(
+                    lambda: [renderer.render(document) for document in documents],
+                    repeat,
+                )
+                for renderer in renderers
+            ]
+            parse_times = [
+                best_time(
+                    lambda: [
+                        parser.parse(io.BytesIO(content)) for content in rendered[0]
+                    ],
+                    repeat,
+                )
+                for parser in (JSONParser(), ORJSONParser())
+            ]
+
+            self.stdout.write(
+                "{:<20}{:>6}{:>10.1f}  {:>7.1f}ms{:>7.1f}ms{:>7.1f}x  "
+                "{:>7.1f}ms{:>7.1f}ms{:>7.1f}x".format(
+                    prefix,
+                    len(documents),
+                    sum(len(content) for content in rendered[0]) / 1024,
+                    render_times[0] * 1000,
+                    render_times[1] * 1000,
+                    render_times[0] / render_times[1],
+                    parse_times[0] * 1000,
+                    parse_times[1] * 1000,
+                    parse_times[0] / parse_times[1],
+                )
+            )
+
+        if mismatches:
+            raise CommandError(
+                "The renderers disagree on {}".format(", ".join(mismatches))
+            )
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Build the database from the CSV files in data/v2/csv"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=1,
+            help=(
+                "Number of worker processes running independent build steps "
+                "at the same time, 1 builds every step in order"
+            ),
+        )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help=(
+                "Only rebuild the tables whose CSV files changed since the last "
+                "build, and the tables depending on them"
+            ),
+        )
+        parser.add_argument(
+            "--profile",
+            metavar="PATH",
+            help=(
+                "Write the rows and time spent clearing, parsing, building and "
+                "inserting of every table to PATH as JSON"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if options["jobs"] < 1:
+            raise CommandError("--jobs must be at least 1")
+
+        # the build module opens a cursor on import
+        from data.v2.build import build_all
+
+        build_all(
+            jobs=options["jobs"],
+            incremental=options["incremental"],
+            profile_path=options["profile"],
+        )
@@ -0,0 +1,202 @@
+import os
+from multiprocessing import Pool
+from urllib.parse import urlsplit
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.http.request import validate_host
+from django.test import RequestFactory
+from django.urls import resolve
+from rest_framework.settings import api_settings
+
+from pokemon_v2.serializers import share_summaries
+
+API_ROOT = "/api/v2/"
+
+# set up in each worker by init_worker
+_worker = {}
+
+
+def get_read_only_resources():
+    """(prefix, viewset) of every router resource that can't be written."""
+
+    from pokemon_v2.urls import router
+
+    return [
+        (prefix, viewset)
+        for prefix, viewset, _ in router.registry
+        if not hasattr(viewset, "create")
+    ]
+
+
+def get_document_paths(prefix, viewset):
+    """
+    Paths of every list page and detail document of a resource, with the
+    list pages spelled the way the pagination links spell them.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    queryset = viewset.queryset
+    list_path = "{}{}/".format(API_ROOT, prefix)
+
+    paths = [list_path, "{}?limit={}".format(list_path, page_size)]
+    for offset in range(page_size, queryset.count(), page_size):
+        paths.append("{}?limit={}&offset={}".format(list_path, page_size, offset))
+
+    for pk in queryset.order_by("pk").values_list("pk", flat=True):
+        paths.append("{}{}/".format(list_path, pk))
+
+        if prefix == "pokemon":
+            paths.append("{}{}/encounters".format(list_path, pk))
+
+    return paths
+
+
+def get_file_path(directory, path):
+    """
+    File a document is written to: the url path, then the query string
+    if any, then index.json. /api/v2/pokemon/?limit=20&offset=20 ends up in
+    api/v2/pokemon/limit=20&offset=20/index.json, which nginx can serve with
+    ``try_files $uri$args/index.json``.
+    """
+
+    path, _, query = path.partition("?")
+    parts = path.strip("/").split("/")
+    if query:
+        parts.append(query)
+
+    return os.path.join(directory, *parts, "index.json")
+
+
+def set_up_export(directory, base_url):
+    url = urlsplit(base_url)
+    _worker["directory"] = directory
+    _worker["host"] = url.netloc
+    _worker["secure"] = url.scheme == "https"
+    _worker["factory"] = RequestFactory()
+
+
+def init_worker(directory, base_url):
+    django.setup()
+
+    # don't share the parent's database connection
+    connections.close_all()
+
+    set_up_export(directory, base_url)
+
+    # kept for the whole life of the worker
+    share_summaries().__enter__()
+
+
+def export_document(path):
+    """Render the document at ``path`` to its file, returning its status."""
+
+    request = _worker["factory"].get(
+        path, HTTP_HOST=_worker["host"], secure=_worker["secure"]
+    )
+    match = resolve(request.path_info)
+    response = match.func(request, *match.args, **match.kwargs)
+
+    if response.status_code != 200:
+        return path, response.status_code
+
+    if hasattr(response, "render"):
+        response.render()
+
+    file_path = get_file_path(_worker["directory"], path)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "wb") as file:
+        file.write(response.content)
+
+    return path, response.status_code
+
+
+class Command(BaseCommand):
+    help = (
+        "Render every list page and detail document of the read-only API "
+        "resources to a tree of JSON files mirroring the url layout"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", help="Directory to write the files to")
+        parser.add_argument(
+            "--base-url",
+            default="https://pokeapi.co",
+            help="Scheme and host of the urls inside the documents",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count(),
+            help="Number of worker processes, 1 renders in this process",
+        )
+        parser.add_argument(
+            "--resources",
+            help="Comma separated resources to export, all of them by default",
+        )
+
+    def handle(self, *args, **options):
+        directory = os.path.abspath(options["directory"])
+        base_url = options["base_url"].rstrip("/")
+
+        url = urlsplit(base_url)
+        if url.scheme not in ("http", "https") or not url.netloc:
+            raise CommandError("Invalid base url {}".format(base_url))
+        if not validate_host(url.hostname, settings.ALLOWED_HOSTS):
+            raise CommandError("{} is not in ALLOWED_HOSTS".format(url.hostname))
+
+        resources = get_read_only_resources()
+        if options["resources"]:
+            wanted = set(options["resources"].split(","))
+            unknown = wanted - {prefix for prefix, _ in resources}
+            if unknown:
+                raise CommandError(
+                    "Unknown resources {}".format(", ".join(sorted(unknown)))
+                )
+            resources = [
+                (prefix, viewset) for prefix, viewset in resources if prefix in wanted
+            ]
+
+        paths = []
+        for prefix, viewset in resources:
+            resource_paths = get_document_paths(prefix, viewset)
+            self.stdout.write("{}: {} documents".format(prefix, len(resource_paths)))
+            paths += resource_paths
+
+        failures = []
+
+        if options["processes"] <= 1:
+            set_up_export(directory, base_url)
+            with share_summaries():
+                results = [export_document(path) for path in paths]
+            failures = [result for result in results if result[1] != 200]
+        else:
+            # workers open their own connections
+            connections.close_all()
+
+            with Pool(
+                options["processes"],
+                initializer=init_worker,
+                initargs=(directory, base_url),
+            ) as pool:
+                for path, status in pool.imap_unordered(
+                    export_document, paths, chunksize=16
+                ):
+                    if status != 200:
+                        failures.append((path, status))
+
+        for path, status in failures:
+            self.stderr.write("{} answered {}".format(path, status))
+
+        if failures:
+            raise CommandError(
+                "{} of {} documents failed".format(len(failures), len(paths))
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Exported {} documents to {}".format(len(paths), directory)
+            )
+        )
@@ -0,0 +1,336 @@
+import bisect
+import glob
+import json
+import os
+import resource
+import tempfile
+import threading
+
+#############
+#  METRICS  #
+#############
+
+# Request metrics in the Prometheus text format, served at /metrics.
+#
+# Only the gunicorn workers count their requests, gunicorn.conf.py enabling
+# the collector when it forks them, so that the management commands, which
+# answer requests and look up the caches too, don't add theirs to the counts
+# of the server, nor does the development server.
+#
+# Every worker counts its own requests, and a thread of its own writes the
+# counts to a file of the worker in METRICS_DIR every FLUSH_INTERVAL seconds,
+# off the path of the requests. /metrics adds up the files of every worker,
+# so whichever of them answers reports the whole server. gunicorn.conf.py
+# empties the directory when the server starts, writes the counts of a worker
+# a last time when it exits, and folds its file into ARCHIVE_FILE, so the
+# counters keep growing across worker restarts. Only the requests of the last
+# FLUSH_INTERVAL of a killed worker are lost.
+#
+# This module doesn't use Django, the gunicorn master imports it.
+
+METRICS_DIR = os.environ.get(
+    "METRICS_DIR", os.path.join(tempfile.gettempdir(), "pokeapi-metrics")
+)
+
+FLUSH_INTERVAL = 1.0
+
+ARCHIVE_FILE = "archive.json"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+COUNTERS = {
+    "pokeapi_requests_total": "Requests answered, by route, method and status.",
+    "pokeapi_db_queries_total": "SQL queries run by the requests, by route.",
+    "pokeapi_db_query_seconds_total": "Time spent in SQL queries, by route.",
+    "pokeapi_cache_lookups_total": "Cache lookups, by cache and result.",
+}
+
+HISTOGRAMS = {
+    "pokeapi_request_duration_seconds": (
+        "Time taken to answer requests, by route.",
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    ),
+    "pokeapi_response_size_bytes": (
+        "Size of the response bodies, by route. Streamed ones aren't included.",
+        (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+    ),
+}
+
+WORKER_RSS = "pokeapi_worker_rss_bytes"
+
+
+def get_rss():
+    """The resident memory of this process, in bytes."""
+
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        # the peak rather than the current size, in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary_path = "{}.{}.{}.tmp".format(path, os.getpid(), threading.get_ident())
+    with open(temporary_path, "w") as temporary_file:
+        json.dump(data, temporary_file)
+    os.replace(temporary_path, path)
+
+
+def read_json(path):
+    try:
+        with open(path) as json_file:
+            return json.load(json_file)
+    except (OSError, ValueError):
+        # gone, or being replaced
+        return None
+
+
+class MetricsCollector:
+    """The counters and histograms of this process."""
+
+    def __init__(self):
+        # set in the server workers only
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.flusher = None
+        self.stopping = threading.Event()
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        # (name, labels) -> value, labels being sorted (label, value) pairs
+        self.counters = {}
+        # (name, labels) -> [count of every bucket and of +Inf, sum]
+        self.histograms = {}
+
+    def check_pid(self):
+        # the gunicorn master imports this module before forking the workers,
+        # which don't inherit its threads
+        if self.pid != os.getpid():
+            self.reset()
+            self.flusher = None
+            self.stopping = threading.Event()
+
+        if self.flusher is None:
+            self.flusher = threading.Thread(
+                target=self.flush_periodically, name="metrics-flusher", daemon=True
+            )
+            self.flusher.start()
+
+    def flush_periodically(self):
+        while not self.stopping.wait(FLUSH_INTERVAL):
+            self.flush()
+
+    def stop_flushing(self):
+        """Stop the thread writing the counts, and write them a last time."""
+
+        self.stopping.set()
+        if self.flusher is not None:
+            self.flusher.join()
+        self.flush()
+
+    def increment(self, name, labels, value=1):
+        if not self.enabled:
+            return
+
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.check_pid()
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        if not self.enabled:
+            return
+
+        buckets = HISTOGRAMS[name][1]
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.check_pid()
+            histogram = self.histograms.setdefault(key, [0] * (len(buckets) + 2))
+            histogram[bisect.bisect_left(buckets, value)] += 1
+            histogram[-1] += value
+
+    def get_path(self):
+        return os.path.join(METRICS_DIR, "worker-{}.json".format(self.pid))
+
+    def flush(self):
+        """Write the counts to the file of this process."""
+
+        if not self.enabled:
+            return
+
+        with self.lock:
+            self.check_pid()
+            data = {
+                "pid": self.pid,
+                "rss": get_rss(),
+                "counters": [
+                    [name, labels, value]
+                    for (name, labels), value in self.counters.items()
+                ],
+                "histograms": [
+                    [name, labels, list(values)]
+                    for (name, labels), values in self.histograms.items()
+                ],
+            }
+
+        write_json(self.get_path(), data)
+
+
+collector = MetricsCollector()
+
+
+def record_cache_lookup(cache_name, hit):
+    collector.increment(
+        "pokeapi_cache_lookups_total",
+        {"cache": cache_name, "result": "hit" if hit else "miss"},
+    )
+
+
+def merge_metrics(paths):
+    """
+    The counters and histograms of the files at ``paths`` added up, and
+    the resident memory of the processes still running, by pid.
+    """
+
+    counters = {}
+    histograms = {}
+    rss = {}
+
+    for path in paths:
+        data = read_json(path)
+        if data is None:
+            continue
+
+        for name, labels, value in data["counters"]:
+            key = (name, tuple(tuple(label) for label in labels))
+            counters[key] = counters.get(key, 0) + value
+
+        for name, labels, values in data["histograms"]:
+            key = (name, tuple(tuple(label) for label in labels))
+            if key in histograms:
+                histograms[key] = [a + b for a, b in zip(histograms[key], values)]
+            else:
+                histograms[key] = values
+
+        pid = data.get("pid")
+        if pid is not None and is_alive(pid):
+            rss[pid] = data["rss"]
+
+    return counters, histograms, rss
+
+
+def archive_worker(pid):
+    """Fold the file of the exited worker ``pid`` into the archive."""
+
+    path = os.path.join(METRICS_DIR, "worker-{}.json".format(pid))
+    archive_path = os.path.join(METRICS_DIR, ARCHIVE_FILE)
+    if not os.path.exists(path):
+        return
+
+    counters, histograms, _ = merge_metrics([archive_path, path])
+    write_json(
+        archive_path,
+        {
+            "counters": [
+                [name, labels, value] for (name, labels), value in counters.items()
+            ],
+            "histograms": [
+                [name, labels, values] for (name, labels), values in histograms.items()
+            ],
+        },
+    )
+    os.remove(path)
+
+
+def clear_metrics():
+    """Drop the counts of every process, when the server starts."""
+
+    for path in glob.glob(os.path.join(METRICS_DIR, "*.json")):
+        os.remove(path)
+
+
+def format_labels(labels, **extra_labels):
+    labels = list(labels) + list(extra_labels.items())
+    if not labels:
+        return ""
+
+    return "{{{}}}".format(
+        ",".join(
+            '{}="{}"'.format(
+                label,
+                str(value)
+                .replace("\\", "\\\\")
+                .replace('"', '\\"')
+                .replace("\n", "\\n"),
+            )
+            for label, value in labels
+        )
+    )
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_metrics():
+    """The metrics of every process, in the Prometheus text format."""
+
+    collector.flush()
+    counters, histograms, rss = merge_metrics(
+        glob.glob(os.path.join(METRICS_DIR, "*.json"))
+    )
+
+    lines = []
+
+    for name, help_text in COUNTERS.items():
+        lines.append("# HELP {} {}".format(name, help_text))
+        lines.append("# TYPE {} counter".format(name))
+        for (counter_name, labels), value in sorted(counters.items()):
+            if counter_name == name:
+                lines.append(
+                    "{}{} {}".format(name, format_labels(labels), format_value(value))
+                )
+
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines.append("# HELP {} {}".format(name, help_text))
+        lines.append("# TYPE {} histogram".format(name))
+        for (histogram_name, labels), values in sorted(histograms.items()):
+            if histogram_name != name:
+                continue
+
+            cumulative = 0
+            for bound, count in zip(list(buckets) + ["+Inf"], values):
+                cumulative += count
+                lines.append(
+                    "{}_bucket{} {}".format(
+                        name, format_labels(labels, le=bound), cumulative
+                    )
+                )
+            lines.append(
+                "{}_sum{} {}".format(
+                    name, format_labels(labels), format_value(values[-1])
+                )
+            )
+            lines.append(
+                "{}_count{} {}".format(name, format_labels(labels), cumulative)
+            )
+
+    lines.append("# HELP {} Resident memory of every worker.".format(WORKER_RSS))
+    lines.append("# TYPE {} gauge".format(WORKER_RSS))
+    for pid, value in sorted(rss.items()):
+        lines.append("{}{} {}".format(WORKER_RSS, format_labels((), pid=pid), value))
+
+    return "\n".join(lines) + "\n"
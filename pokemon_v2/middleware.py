@@ -0,0 +1,218 @@
+import functools
+import json
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from rest_framework import serializers
+
+from .metrics import collector
+
+logger = logging.getLogger(__name__)
+
+###########################
+#  QUERY INSTRUMENTATION  #
+###########################
+
+# QueryInstrumentationMiddleware counts the SQL queries of every request and
+# the time they take, and attributes each one to the SerializerMethodField
+# that was running when it was made, like
+# PokemonDetailSerializer.get_pokemon_moves, or to "view" when none was. It
+# reports them in a Server-Timing header, which browsers show along with the
+# request, and in a JSON log line. Requests making more queries than
+# settings.QUERY_BUDGET are logged as warnings.
+#
+# The queries of a streamed response run after the middleware returns and
+# aren't counted.
+
+OUTSIDE_METHOD_FIELDS = "view"
+
+# method fields listed in Server-Timing at most, the slowest ones
+SERVER_TIMING_SCOPES = 5
+
+_recording = threading.local()
+
+
+class QueryStats:
+    """The queries of a block and their duration, by method field."""
+
+    def __init__(self):
+        # labels of the method fields being run, the innermost last
+        self.scopes = []
+        # label -> [queries, seconds]
+        self.by_scope = {}
+
+    def execute(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            scope = self.scopes[-1] if self.scopes else OUTSIDE_METHOD_FIELDS
+            stats = self.by_scope.setdefault(scope, [0, 0.0])
+            stats[0] += 1
+            stats[1] += time.perf_counter() - start
+
+    @property
+    def count(self):
+        return sum(count for count, _ in self.by_scope.values())
+
+    @property
+    def duration(self):
+        return sum(duration for _, duration in self.by_scope.values())
+
+    def get_slowest_scopes(self, limit=None):
+        scopes = sorted(
+            self.by_scope.items(), key=lambda item: item[1][1], reverse=True
+        )
+        return scopes[:limit]
+
+
+@contextmanager
+def record_queries():
+    """Count the queries run in the block into the yielded QueryStats."""
+
+    stats = QueryStats()
+    previous = getattr(_recording, "stats", None)
+    _recording.stats = stats
+
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats.execute))
+            yield stats
+    finally:
+        _recording.stats = previous
+
+
+def track_method_field(to_representation):
+    @functools.wraps(to_representation)
+    def tracked_representation(self, value):
+        stats = getattr(_recording, "stats", None)
+        if stats is None:
+            return to_representation(self, value)
+
+        stats.scopes.append(
+            "{}.{}".format(type(self.parent).__name__, self.method_name)
+        )
+        try:
+            return to_representation(self, value)
+        finally:
+            stats.scopes.pop()
+
+    return tracked_representation
+
+
+def install_method_field_tracking():
+    """Wrap SerializerMethodField.to_representation, once."""
+
+    to_representation = serializers.SerializerMethodField.to_representation
+    if getattr(to_representation, "tracks_method_field", False):
+        return
+
+    tracked_representation = track_method_field(to_representation)
+    tracked_representation.tracks_method_field = True
+    serializers.SerializerMethodField.to_representation = tracked_representation
+
+
+def get_server_timing(stats, duration):
+    metrics = [
+        'db;desc="{} queries";dur={:.1f}'.format(stats.count, stats.duration * 1000)
+    ]
+
+    for scope, (count, scope_duration) in stats.get_slowest_scopes(
+        SERVER_TIMING_SCOPES
+    ):
+        metrics.append(
+            'db.{};desc="{} queries";dur={:.1f}'.format(
+                scope, count, scope_duration * 1000
+            )
+        )
+
+    metrics.append("total;dur={:.1f}".format(duration * 1000))
+    return ", ".join(metrics)
+
+
+class QueryInstrumentationMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_method_field_tracking()
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with record_queries() as stats:
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        # for MetricsMiddleware
+        request.query_stats = stats
+
+        response["Server-Timing"] = get_server_timing(stats, duration)
+
+        over_budget = stats.count > settings.QUERY_BUDGET
+        record = {
+            "method": request.method,
+            "path": request.get_full_path(),
+            "status": response.status_code,
+            "queries": stats.count,
+            "db_ms": round(stats.duration * 1000, 1),
+            "total_ms": round(duration * 1000, 1),
+            "query_budget": settings.QUERY_BUDGET,
+            "over_budget": over_budget,
+            "scopes": {
+                scope: {"queries": count, "db_ms": round(scope_duration * 1000, 1)}
+                for scope, (count, scope_duration) in stats.get_slowest_scopes()
+            },
+        }
+        logger.log(logging.WARNING if over_budget else logging.INFO, json.dumps(record))
+
+        return response
+
+
+#############
+#  METRICS  #
+#############
+
+
+class MetricsMiddleware:
+    """
+    Count every request in pokemon_v2.metrics, by the name of its url. Goes
+    ahead of QueryInstrumentationMiddleware, whose query counts it adds up.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = getattr(request, "resolver_match", None)
+        route = (match.url_name or match.route) if match else "unmatched"
+        labels = {"route": route}
+
+        collector.increment(
+            "pokeapi_requests_total",
+            {
+                "route": route,
+                "method": request.method,
+                "status": str(response.status_code),
+            },
+        )
+        collector.observe("pokeapi_request_duration_seconds", labels, duration)
+        if not response.streaming:
+            collector.observe(
+                "pokeapi_response_size_bytes", labels, len(response.content)
+            )
+
+        stats = getattr(request, "query_stats", None)
+        if stats is not None:
+            collector.increment("pokeapi_db_queries_total", labels, stats.count)
+            collector.increment(
+                "pokeapi_db_query_seconds_total", labels, stats.duration
+            )
+
+        return response
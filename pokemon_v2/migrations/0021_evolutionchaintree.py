@@ -0,0 +1,36 @@
+# Generated by Django 3.2.25 on 2026-10-18 02:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pokemon_v2", "0020_add_regional_evolution_fields"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EvolutionChainTree",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("chain", models.TextField()),
+                (
+                    "evolution_chain",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="tree",
+                        to="pokemon_v2.evolutionchain",
+                    ),
+                ),
+            ],
+        ),
+    ]
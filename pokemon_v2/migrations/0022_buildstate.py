@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-18 03:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pokemon_v2", "0021_evolutionchaintree"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BuildState",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("table", models.CharField(max_length=100, unique=True)),
+                ("inputs", models.JSONField()),
+                ("reads", models.JSONField()),
+                ("build", models.CharField(max_length=32)),
+            ],
+        ),
+    ]
@@ -0,0 +1,124 @@
+# Trigram and lower(name) indexes on the HasName tables, for the ?q= filter
+# and the lookups by name. They only exist on PostgreSQL, SQLite searches
+# names with pokemon_v2.namesearch's in-process index instead.
+
+from django.db import migrations
+
+NAME_TABLES = [
+    "pokemon_v2_version",
+    "pokemon_v2_versionname",
+    "pokemon_v2_versiongroup",
+    "pokemon_v2_language",
+    "pokemon_v2_languagename",
+    "pokemon_v2_generation",
+    "pokemon_v2_generationname",
+    "pokemon_v2_region",
+    "pokemon_v2_regionname",
+    "pokemon_v2_ability",
+    "pokemon_v2_abilityname",
+    "pokemon_v2_type",
+    "pokemon_v2_typename",
+    "pokemon_v2_stat",
+    "pokemon_v2_statname",
+    "pokemon_v2_egggroup",
+    "pokemon_v2_egggroupname",
+    "pokemon_v2_itempocket",
+    "pokemon_v2_itempocketname",
+    "pokemon_v2_itemcategory",
+    "pokemon_v2_itemcategoryname",
+    "pokemon_v2_itemflingeffect",
+    "pokemon_v2_item",
+    "pokemon_v2_itemname",
+    "pokemon_v2_itemattribute",
+    "pokemon_v2_itemattributename",
+    "pokemon_v2_contesttype",
+    "pokemon_v2_contesttypename",
+    "pokemon_v2_berryfirmness",
+    "pokemon_v2_berryfirmnessname",
+    "pokemon_v2_berry",
+    "pokemon_v2_berryflavor",
+    "pokemon_v2_berryflavorname",
+    "pokemon_v2_growthrate",
+    "pokemon_v2_nature",
+    "pokemon_v2_naturename",
+    "pokemon_v2_location",
+    "pokemon_v2_locationname",
+    "pokemon_v2_locationarea",
+    "pokemon_v2_locationareaname",
+    "pokemon_v2_encountermethod",
+    "pokemon_v2_encountermethodname",
+    "pokemon_v2_encountercondition",
+    "pokemon_v2_encounterconditionname",
+    "pokemon_v2_encounterconditionvalue",
+    "pokemon_v2_encounterconditionvaluename",
+    "pokemon_v2_move",
+    "pokemon_v2_movename",
+    "pokemon_v2_movedamageclass",
+    "pokemon_v2_movedamageclassname",
+    "pokemon_v2_movebattlestyle",
+    "pokemon_v2_movebattlestylename",
+    "pokemon_v2_moveattribute",
+    "pokemon_v2_moveattributename",
+    "pokemon_v2_movetarget",
+    "pokemon_v2_movetargetname",
+    "pokemon_v2_movemetaailment",
+    "pokemon_v2_movemetaailmentname",
+    "pokemon_v2_movemetacategory",
+    "pokemon_v2_gender",
+    "pokemon_v2_pokeathlonstat",
+    "pokemon_v2_pokeathlonstatname",
+    "pokemon_v2_palparkarea",
+    "pokemon_v2_palparkareaname",
+    "pokemon_v2_evolutiontrigger",
+    "pokemon_v2_evolutiontriggername",
+    "pokemon_v2_pokedex",
+    "pokemon_v2_pokedexname",
+    "pokemon_v2_pokemonspecies",
+    "pokemon_v2_pokemonspeciesname",
+    "pokemon_v2_pokemon",
+    "pokemon_v2_pokemoncolor",
+    "pokemon_v2_pokemoncolorname",
+    "pokemon_v2_pokemonform",
+    "pokemon_v2_pokemonformname",
+    "pokemon_v2_pokemonhabitat",
+    "pokemon_v2_pokemonhabitatname",
+    "pokemon_v2_movelearnmethod",
+    "pokemon_v2_movelearnmethodname",
+    "pokemon_v2_pokemonshape",
+    "pokemon_v2_pokemonshapename",
+]
+
+
+def create_name_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table in NAME_TABLES:
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS {0}_name_trgm ON {0} "
+            "USING gin (name gin_trgm_ops)".format(table)
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS {0}_name_lower ON {0} "
+            "(lower(name))".format(table)
+        )
+
+
+def drop_name_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for table in NAME_TABLES:
+        schema_editor.execute("DROP INDEX IF EXISTS {0}_name_trgm".format(table))
+        schema_editor.execute("DROP INDEX IF EXISTS {0}_name_lower".format(table))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pokemon_v2", "0022_buildstate"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_name_indexes, drop_name_indexes),
+    ]
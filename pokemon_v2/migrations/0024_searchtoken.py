@@ -0,0 +1,31 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pokemon_v2", "0023_name_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchToken",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("token", models.CharField(db_index=True, max_length=200)),
+                ("resource", models.CharField(db_index=True, max_length=100)),
+                ("resource_id", models.IntegerField()),
+                ("name", models.CharField(max_length=200)),
+                ("language", models.CharField(max_length=200)),
+            ],
+        ),
+    ]
@@ -1498,6 +1498,16 @@ class EvolutionChain(models.Model):
     )
 
 
+class EvolutionChainTree(models.Model):
+    evolution_chain = models.OneToOneField(
+        EvolutionChain, related_name="tree", on_delete=models.CASCADE
+    )
+
+    # The serialized chain with host-relative urls. Kept as text rather than
+    # a JSONField because jsonb does not preserve key order.
+    chain = models.TextField()
+
+
 class EvolutionTrigger(HasName):
     pass
 
@@ -1823,3 +1833,42 @@ class PokemonSprites(HasPokemon):
 
 class PokemonCries(HasPokemon):
     cries = models.JSONField()
+
+
+##################
+#  BUILD MODELS  #
+##################
+
+
+# What data/v2/build.py loaded a table from the last time it built it
+class BuildState(models.Model):
+    table = models.CharField(max_length=100, unique=True)
+
+    # content hash of every CSV (or sprite tree) the rows were read from
+    inputs = models.JSONField()
+
+    # other tables queried while building it
+    reads = models.JSONField()
+
+    build = models.CharField(max_length=32)
+
+
+###################
+#  SEARCH MODELS  #
+###################
+
+
+# A token of a localized name (an IsName row), with what a search hit shows
+class SearchToken(models.Model):
+    # casefolded, without accents
+    token = models.CharField(max_length=200, db_index=True)
+
+    # router prefix and pk of the resource the name belongs to
+    resource = models.CharField(max_length=100, db_index=True)
+
+    resource_id = models.IntegerField()
+
+    name = models.CharField(max_length=200)
+
+    # name of the language, as in ?lang=
+    language = models.CharField(max_length=200)
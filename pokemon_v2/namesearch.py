@@ -0,0 +1,146 @@
+import json
+from collections import defaultdict
+
+from django.db import connections, models
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Lower
+from django.db.models.lookups import IContains
+
+from .versions import get_data_version, get_version, replace_version
+
+#################
+#  NAME SEARCH  #
+#################
+
+# The `q` filter matches the names containing a string and the lookups by
+# name match names equal to one, both ignoring case.
+#
+# On PostgreSQL the names of the HasName tables have a pg_trgm GIN index and
+# a lower(name) index (migration 0023), and the queries are written so that
+# they use them: `name ILIKE '%...%'` rather than Django's
+# `UPPER(name) LIKE UPPER(...)`, and `lower(name) = ...`.
+#
+# SQLite can't index these, so each process keeps the names of the tables it
+# searches in memory with the rows holding each trigram, and filters on the
+# pks of the matching rows. The indexes are rebuilt when the data version
+# changes (see pokemon_v2/versions.py), after a data rebuild, and after writes,
+# which replace the version of the indexes.
+
+NAME_INDEX_VERSION_KEY = "pokemon_v2.names.version"
+
+NGRAM_SIZE = 3
+
+# (database alias, table) -> (version, NameIndex), for this process
+_name_indexes = {}
+
+models.CharField.register_lookup(Lower)
+
+
+@models.CharField.register_lookup
+class TrigramIContains(IContains):
+    """icontains, written on PostgreSQL as an ILIKE the pg_trgm indexes serve."""
+
+    lookup_name = "trigram_icontains"
+
+    def as_postgresql(self, compiler, connection):
+        lhs_sql, lhs_params = compiler.compile(self.lhs)
+        rhs_sql, rhs_params = self.process_rhs(compiler, connection)
+        return "{} ILIKE {}".format(lhs_sql, rhs_sql), [*lhs_params, *rhs_params]
+
+
+def get_ngrams(value):
+    return {value[i : i + NGRAM_SIZE] for i in range(len(value) - NGRAM_SIZE + 1)}
+
+
+class NameIndex:
+    """The lowercased names of a table, by pk and by n-gram."""
+
+    def __init__(self, rows):
+        self.names = {}
+        self.pks_by_name = defaultdict(list)
+        self.pks_by_ngram = defaultdict(set)
+
+        for pk, name in rows:
+            name = name.lower()
+            self.names[pk] = name
+            self.pks_by_name[name].append(pk)
+            for ngram in get_ngrams(name):
+                self.pks_by_ngram[ngram].add(pk)
+
+    def find_containing(self, value):
+        value = value.lower()
+        ngrams = get_ngrams(value)
+
+        if ngrams:
+            postings = sorted(
+                (self.pks_by_ngram.get(ngram, set()) for ngram in ngrams), key=len
+            )
+            candidates = postings[0].intersection(*postings[1:])
+        else:
+            # too short to have an n-gram
+            candidates = self.names
+
+        return [pk for pk in candidates if value in self.names[pk]]
+
+    def find_equal(self, values):
+        return [
+            pk
+            for name in {value.lower() for value in values}
+            for pk in self.pks_by_name.get(name, [])
+        ]
+
+
+def get_name_index(model, using):
+    version = (get_data_version(), get_version(NAME_INDEX_VERSION_KEY))
+
+    key = (using, model._meta.db_table)
+    entry = _name_indexes.get(key)
+
+    if entry is None or entry[0] != version:
+        rows = model._base_manager.using(using).values_list("pk", "name")
+        entry = (version, NameIndex(rows))
+        _name_indexes[key] = entry
+
+    return entry[1]
+
+
+def invalidate_name_indexes():
+    """Rebuild the in-process name indexes on their next use, after a write."""
+
+    replace_version(NAME_INDEX_VERSION_KEY)
+
+
+def pk_in(pks):
+    # a single parameter, SQLite limits their number
+    return Q(
+        pk__in=RawSQL(
+            "SELECT value FROM json_each(%s)",
+            [json.dumps(pks)],
+            output_field=models.IntegerField(),
+        )
+    )
+
+
+def is_indexed_in_process(queryset):
+    return connections[queryset.db].vendor == "sqlite"
+
+
+def name_contains(queryset, value):
+    """A filter on the rows whose name contains ``value``, ignoring case."""
+
+    if is_indexed_in_process(queryset):
+        index = get_name_index(queryset.model, queryset.db)
+        return pk_in(index.find_containing(value))
+
+    return Q(name__trigram_icontains=value)
+
+
+def name_equals(queryset, values):
+    """A filter on the rows whose name is one of ``values``, ignoring case."""
+
+    if is_indexed_in_process(queryset):
+        index = get_name_index(queryset.model, queryset.db)
+        return pk_in(index.find_equal(values))
+
+    return Q(name__lower__in=[value.lower() for value in values])
@@ -0,0 +1,94 @@
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+
+##########
+#  JSON  #
+##########
+
+# Drop-in replacements for DRF's JSONRenderer and JSONParser encoding and
+# decoding with orjson, selected with the JSON_BACKEND setting. The rendered
+# bytes are the same as JSONRenderer's: keys keep their order, non ASCII
+# characters are written as they are and U+2028 and U+2029 are escaped. The
+# only differences are in floats: those with an exponent, which PokeAPI
+# documents don't have, are written without the plus sign (1e16 rather than
+# 1e+16), and NaN and infinities, which the strict JSONRenderer refuses with
+# a ValueError, are written as null. Checking every float for them would
+# take longer than the rendering saves.
+#
+# Values orjson doesn't know, and datetimes, are converted by DRF's encoder.
+# Output DRF would indent, or encode otherwise because of UNICODE_JSON,
+# COMPACT_JSON or STRICT_JSON, is left to JSONRenderer.
+
+ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS
+    | orjson.OPT_PASSTHROUGH_DATACLASS
+    | orjson.OPT_PASSTHROUGH_DATETIME
+)
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+
+        if (
+            indent is not None
+            or self.ensure_ascii
+            or not self.compact
+            or not self.strict
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            content = orjson.dumps(
+                data, default=self.encoder_class().default, option=ORJSON_OPTIONS
+            )
+        except orjson.JSONEncodeError:
+            # integers wider than 64 bits, mostly
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # these are valid JSON but not valid javascript
+        return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+class ORJSONParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+
+        if encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    A JSON document followed by a newline, as written by the configured
+    JSON renderer. Streamed exports are made of these lines.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = None
+
+    def __init__(self):
+        self.json_renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        return self.json_renderer.render(data) + b"\n"
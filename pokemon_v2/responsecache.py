@@ -0,0 +1,321 @@
+import hashlib
+import json
+import threading
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db.models.signals import post_init
+
+from .metrics import record_cache_lookup
+from .models import Ability, Berry, EvolutionChain, Pokemon, Type
+from .versions import get_data_version, get_version, new_version, replace_version
+
+####################
+#  RESPONSE CACHE  #
+####################
+
+# Rendered read-only documents are cached together with their ETag, keyed by
+# the request they answered (see pokemon_v2/api.py, CachedResponse).
+#
+# Only the rows behind the writable viewsets can change while the API is
+# serving, so a document only needs to know which of those rows, and of the
+# rows they point to, went into it. While a document is rendered every such
+# model instance that is created is recorded as a tag ("<model>:<pk>"), and
+# list pages also get a tag for the whole table ("<model>:*"). Each tag has a
+# version in the cache, which is read when the tag is first recorded, and an
+# entry is only served while all of its tags still have the versions they
+# had then.
+#
+# A row is recorded once the query reading it returned, so a write committing
+# between the two would store the old row under the new version of its tag.
+# Every write also replaces the write version, which is read before the view
+# runs, and a document rendered while a write ran isn't stored.
+#
+# Past MAX_TAGS tags, the rows of a document are recorded by the tags of their
+# tables instead, so that documents reading many rows don't fill the cache
+# with their tags.
+#
+# A write drops the tags of the written row and of every row its foreign keys
+# point to (before and after the write), since those are the documents that
+# embed it, for instance every Pokémon whose types include a renamed Type,
+# and the tags of their tables. Every key also holds the data version (see
+# pokemon_v2/versions.py), so that a data rebuild drops every entry at once,
+# in every process.
+#
+# The counts of the paginated lists are cached too, keyed by the SQL of the
+# counted queryset, so each resource and `q` filter gets its own. Since a
+# write can cascade to rows of other resources, any write drops all of them
+# by replacing the count version, as does a data rebuild.
+
+RESPONSE_CACHE_PREFIX = "pokemon_v2.response"
+
+RESPONSE_VERSION_KEY = "pokemon_v2.response.version"
+
+RESPONSE_TAG_PREFIX = "pokemon_v2.response.tag"
+
+RESPONSE_WRITE_VERSION_KEY = "pokemon_v2.response.write"
+
+LIST_COUNT_PREFIX = "pokemon_v2.count"
+
+LIST_COUNT_VERSION_KEY = "pokemon_v2.count.version"
+
+WRITABLE_MODELS = (Ability, Berry, Pokemon, Type)
+
+MAX_TAGS = 100
+
+
+def get_tracked_models():
+    """
+    The writable models, the models their foreign keys point to, and
+    EvolutionChain, whose stored trees are rebuilt on writes.
+    """
+
+    models = set(WRITABLE_MODELS)
+    models.add(EvolutionChain)
+
+    for model in WRITABLE_MODELS:
+        for field in model._meta.concrete_fields:
+            if field.is_relation:
+                models.add(field.related_model)
+
+    return frozenset(models)
+
+
+TRACKED_MODELS = get_tracked_models()
+
+_recording = threading.local()
+
+
+def get_row_tag(model, pk):
+    return "{}:{}".format(model._meta.label_lower, pk)
+
+
+def get_table_tag(model):
+    return "{}:*".format(model._meta.label_lower)
+
+
+def get_instance_tags(instance):
+    """Tags of ``instance`` and of every tracked row it points to."""
+
+    tags = {get_row_tag(type(instance), instance.pk)}
+
+    for field in instance._meta.concrete_fields:
+        if field.is_relation and field.related_model in TRACKED_MODELS:
+            value = getattr(instance, field.attname)
+            if value is not None:
+                tags.add(get_row_tag(field.related_model, value))
+
+    return tags
+
+
+def get_tag_table(tag):
+    """The table tag of the model of ``tag``."""
+
+    return "{}:*".format(tag.rsplit(":", 1)[0])
+
+
+def add_tag(tags, tag, version=None):
+    """
+    Record ``tag`` in ``tags`` with its current version, or with
+    ``version``, or the tag of its table if there are too many already.
+    """
+
+    if tag in tags:
+        return
+
+    if len(tags) >= MAX_TAGS:
+        tag = get_tag_table(tag)
+        if tag in tags:
+            return
+        version = None
+
+    if version is None:
+        version = cache.get_or_set(get_tag_key(tag), new_version, None)
+    tags[tag] = version
+
+
+def record_instance(sender, instance, **kwargs):
+    tags = getattr(_recording, "tags", None)
+    if tags is not None and instance.pk is not None:
+        add_tag(tags, get_row_tag(sender, instance.pk))
+
+
+for model in TRACKED_MODELS:
+    post_init.connect(
+        record_instance,
+        sender=model,
+        dispatch_uid="pokemon_v2.responsecache.{}".format(model._meta.label_lower),
+    )
+
+
+@contextmanager
+def record_tags():
+    """
+    Collect the tags of the tracked instances created in the block, with
+    their versions, into the yielded dict.
+    """
+
+    previous = getattr(_recording, "tags", None)
+    _recording.tags = tags = {}
+
+    try:
+        yield tags
+    finally:
+        _recording.tags = previous
+
+
+def get_tag_key(tag):
+    return "{}.{}".format(RESPONSE_TAG_PREFIX, tag)
+
+
+def get_url_response_key(url, accept):
+    """
+    Cache key of the document at ``url`` rendered for the ``accept``
+    header. The host and the Accept header are part of it since the urls
+    in the document and its renderer depend on them.
+    """
+
+    digest = hashlib.sha256("{}\n{}".format(url, accept).encode("utf-8")).hexdigest()
+
+    return "{}.{}.{}.{}".format(
+        RESPONSE_CACHE_PREFIX,
+        get_data_version(),
+        get_version(RESPONSE_VERSION_KEY),
+        digest,
+    )
+
+
+def get_response_key(request):
+    """Cache key of the document answering ``request``."""
+
+    return get_url_response_key(
+        request.build_absolute_uri(), request.META.get("HTTP_ACCEPT", "")
+    )
+
+
+def get_valid_entry(key):
+    entry = cache.get(key)
+    if entry is None:
+        return None
+
+    tag_versions = entry[3]
+    if tag_versions:
+        current_versions = cache.get_many(list(tag_versions))
+        if current_versions != tag_versions:
+            return None
+
+    return entry
+
+
+def get_cached_response(key):
+    """
+    The entry stored under ``key`` as ``(etag, content, content_type)``,
+    or None if there is none or one of its tags was dropped since.
+    """
+
+    entry = get_valid_entry(key)
+    record_cache_lookup("response", entry is not None)
+    if entry is None:
+        return None
+
+    etag, content, content_type, _ = entry
+    return etag, content, content_type
+
+
+def get_cached_document(url, accept):
+    """
+    The cached JSON document at ``url``, parsed, or None. Its tags are
+    recorded with their versions, since the document it ends up in depends
+    on the same rows.
+    """
+
+    entry = get_valid_entry(get_url_response_key(url, accept))
+    record_cache_lookup("document", entry is not None)
+    if entry is None:
+        return None
+
+    _, content, content_type, tag_versions = entry
+    if not content_type.startswith("application/json"):
+        return None
+
+    tags = getattr(_recording, "tags", None)
+    if tags is not None:
+        prefix_length = len(RESPONSE_TAG_PREFIX) + 1
+        for tag_key, version in tag_versions.items():
+            add_tag(tags, tag_key[prefix_length:], version)
+
+    return json.loads(content)
+
+
+def get_write_version():
+    """The version replaced by every write, read before rendering a document."""
+
+    return get_version(RESPONSE_WRITE_VERSION_KEY)
+
+
+def store_response(key, etag, content, content_type, tags, write_version=None):
+    """
+    Store a response with the ``tags`` recorded while it was rendered,
+    unless a write ran since ``write_version`` was read.
+    """
+
+    if write_version is not None and write_version != get_write_version():
+        return
+
+    tag_versions = {get_tag_key(tag): version for tag, version in tags.items()}
+    cache.set(key, (etag, content, content_type, tag_versions), None)
+
+
+def invalidate_tags(tags):
+    """
+    Drop every stored response that depends on one of ``tags``, or on one
+    of their tables.
+    """
+
+    if tags:
+        tags = set(tags) | {get_tag_table(tag) for tag in tags}
+        cache.delete_many([get_tag_key(tag) for tag in tags])
+
+    replace_version(RESPONSE_WRITE_VERSION_KEY)
+
+
+def invalidate_all_responses():
+    """Drop every stored response and list count, after a data rebuild."""
+
+    replace_version(RESPONSE_VERSION_KEY)
+
+
+def get_list_count(queryset, count):
+    """
+    The cached number of rows of ``queryset``, counted with ``count`` if
+    it isn't cached.
+    """
+
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+
+    digest = hashlib.sha256("{}\n{!r}".format(sql, params).encode("utf-8")).hexdigest()
+    key = "{}.{}.{}.{}.{}".format(
+        LIST_COUNT_PREFIX,
+        get_data_version(),
+        get_version(RESPONSE_VERSION_KEY),
+        get_version(LIST_COUNT_VERSION_KEY),
+        digest,
+    )
+
+    result = cache.get(key)
+    record_cache_lookup("list_count", result is not None)
+    if result is None:
+        result = count(queryset)
+        cache.set(key, result, None)
+
+    return result
+
+
+def invalidate_list_counts():
+    """Drop every cached list count, after a write."""
+
+    replace_version(LIST_COUNT_VERSION_KEY)
@@ -0,0 +1,42 @@
+import logging
+import shutil
+import tempfile
+
+from django.test.runner import DiscoverRunner
+
+from . import metrics, versions
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Reads the data version once, when the test database is ready, rather
+    than every DATA_VERSION_INTERVAL seconds, so that no test counting
+    queries ever counts the read, collects the metrics of the requests in a
+    directory of its own rather than in the one of the server, and only
+    logs the query counts of the requests over budget.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.data_version_interval = versions.DATA_VERSION_INTERVAL
+        versions.DATA_VERSION_INTERVAL = None
+        self.metrics_dir = metrics.METRICS_DIR
+        metrics.METRICS_DIR = tempfile.mkdtemp(prefix="pokeapi-metrics-")
+        metrics.collector.enabled = True
+        self.query_logger = logging.getLogger("pokemon_v2.middleware")
+        self.query_log_level = self.query_logger.level
+        self.query_logger.setLevel(logging.WARNING)
+
+    def setup_databases(self, **kwargs):
+        old_config = super().setup_databases(**kwargs)
+        versions.refresh_data_version()
+        return old_config
+
+    def teardown_test_environment(self, **kwargs):
+        versions.DATA_VERSION_INTERVAL = self.data_version_interval
+        metrics.collector.stop_flushing()
+        metrics.collector.enabled = False
+        shutil.rmtree(metrics.METRICS_DIR)
+        metrics.METRICS_DIR = self.metrics_dir
+        self.query_logger.setLevel(self.query_log_level)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,211 @@
+import re
+import unicodedata
+
+from django.apps import apps
+from django.db import connections, transaction
+from django.db.models import CASCADE, Q
+
+from .models import IsName, SearchToken
+
+############
+#  SEARCH  #
+############
+
+# /api/v2/search/?q= finds resources by their localized names, the rows of
+# the IsName tables (PokemonSpeciesName, MoveName, ...). Every name is split
+# into words, casefolded and stripped of accents, and each word is stored as
+# a SearchToken along with the name, its language and its resource.
+#
+# A search reads the tokens starting with the longest word of the query, in
+# a single range scan of the token index, keeps the names in which every
+# word of the query starts a word, and ranks them: the names equal to the
+# query first, then those with the most whole words, then the shortest.
+#
+# The tokens are built at the end of data/v2/build.py. The writable resources
+# have no names of their own, so creating or updating one can't change any,
+# but deleting one deletes the names of the rows deleted along with it, whose
+# tokens are dropped after the delete.
+
+# tokens read by a search at most
+SEARCH_PROBE_LIMIT = 2000
+
+WORD_RGX = re.compile(r"\w+")
+
+# the accents of latin, greek and cyrillic letters, but not the voicing
+# marks of kana, which make other letters
+ACCENT_RGX = re.compile("[\u0300-\u036f]")
+
+
+def get_words(value):
+    """The casefolded words of ``value``, without accents."""
+
+    value = ACCENT_RGX.sub("", unicodedata.normalize("NFKD", value))
+    return WORD_RGX.findall(unicodedata.normalize("NFC", value).casefold())
+
+
+def get_name_models():
+    """(model, field of the named resource) of every IsName table."""
+
+    return [
+        (
+            model,
+            next(
+                field
+                for field in model._meta.concrete_fields
+                if field.is_relation and field.name != "language"
+            ),
+        )
+        for model in apps.get_app_config("pokemon_v2").get_models()
+        if issubclass(model, IsName)
+    ]
+
+
+def get_resources():
+    """(prefix, model, basename) of every read-only router resource."""
+
+    # the urls import the api, which imports this module
+    from .urls import router
+
+    return [
+        (prefix, viewset.queryset.model, basename)
+        for prefix, viewset, basename in router.registry
+        if not hasattr(viewset, "create")
+    ]
+
+
+def get_cascaded_models(models):
+    """``models`` and the models whose rows are deleted along with theirs."""
+
+    cascaded = set()
+    pending = list(models)
+
+    while pending:
+        model = pending.pop()
+        if model in cascaded:
+            continue
+
+        cascaded.add(model)
+        pending.extend(
+            relation.related_model
+            for relation in model._meta.related_objects
+            if relation.on_delete is CASCADE
+        )
+
+    return cascaded
+
+
+def get_search_tokens(name_model, field, resource):
+    rows = name_model.objects.filter(**{field.attname + "__isnull": False})
+
+    for resource_id, name, language in rows.values_list(
+        field.attname, "name", "language__name"
+    ).iterator():
+        for word in set(get_words(name)):
+            yield SearchToken(
+                token=word[:200],
+                resource=resource,
+                resource_id=resource_id,
+                name=name,
+                language=language or "",
+            )
+
+
+def refresh_search_index():
+    """Rebuild the tokens of every name and return how many were stored."""
+
+    prefixes = {model: prefix for prefix, model, _ in get_resources()}
+
+    stored = 0
+    for name_model, field in get_name_models():
+        resource_model = field.related_model
+        if resource_model not in prefixes:
+            continue
+
+        resource = prefixes[resource_model]
+        with transaction.atomic():
+            SearchToken.objects.filter(resource=resource).delete()
+            stored += len(
+                SearchToken.objects.bulk_create(
+                    get_search_tokens(name_model, field, resource), batch_size=500
+                )
+            )
+
+    return stored
+
+
+def prune_search_index(models):
+    """
+    Drop the tokens of the resources of ``models``, and of the models whose
+    rows are deleted along with theirs, that were deleted, and return how
+    many were dropped.
+    """
+
+    prefixes = {model: prefix for prefix, model, _ in get_resources()}
+    named_models = {field.related_model for _, field in get_name_models()}
+
+    dropped = 0
+    for model in get_cascaded_models(models) & named_models:
+        if model not in prefixes:
+            continue
+
+        dropped += (
+            SearchToken.objects.filter(resource=prefixes[model])
+            .exclude(resource_id__in=model._base_manager.values("pk"))
+            .delete()[0]
+        )
+
+    return dropped
+
+
+def get_prefix_filter(prefix):
+    if connections[SearchToken.objects.db].vendor == "postgresql":
+        # LIKE 'prefix%', served by the varchar_pattern_ops index Django adds
+        return Q(token__startswith=prefix)
+
+    # SQLite's LIKE ignores case so it can't use the index, a range can
+    return Q(token__gte=prefix, token__lt=prefix + "\U0010ffff")
+
+
+def search_names(query, language=None, resources=None, limit=20):
+    """
+    The best ``limit`` (resource, resource_id, name, language) matching
+    ``query``, in the given language and resources if any.
+    """
+
+    words = list(dict.fromkeys(get_words(query)))
+    if not words:
+        return []
+
+    tokens = SearchToken.objects.filter(get_prefix_filter(max(words, key=len)))
+    if language:
+        tokens = tokens.filter(language=language)
+    if resources:
+        tokens = tokens.filter(resource__in=resources)
+
+    rows = tokens.order_by("token").values_list(
+        "resource", "resource_id", "name", "language"
+    )[:SEARCH_PROBE_LIMIT]
+
+    ranks = {}
+    seen = set()
+    for row in rows:
+        if row in seen:
+            continue
+        seen.add(row)
+
+        name_words = get_words(row[2])
+        if not all(
+            any(name_word.startswith(word) for name_word in name_words)
+            for word in words
+        ):
+            continue
+
+        ranks[row] = (
+            name_words != words,
+            sum(word not in name_words for word in words),
+            len(row[2]),
+            row[0],
+            row[2],
+        )
+
+    return sorted(ranks, key=ranks.get)[:limit]
@@ -1,5 +1,8 @@
 from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import groupby
 import json
+import threading
 from django.urls import reverse
 from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_field
@@ -9,6 +12,10 @@ from drf_spectacular.utils import extend_schema_field
 # PokeAPI v2 serializers in order of dependency
 
 from .models import *
+from .encounters import get_location_area_encounters
+from .evolutions import get_evolution_chain
+from .learnsets import load_learnset
+from .typechart import DAMAGE_FACTOR_PREFIXES, get_type_chart
 
 
 #########################
@@ -309,6 +316,55 @@ class VersionGroupSummarySerializer(serializers.HyperlinkedModelSerializer):
         fields = ("name", "url")
 
 
+_shared_summaries = threading.local()
+
+
+@contextmanager
+def share_summaries():
+    """
+    Let every SummaryCache created in the block share its output with the
+    others of the same serializer, across documents. Only for renders that
+    all use the same host, such as a static export.
+    """
+
+    previous = getattr(_shared_summaries, "data", None)
+    _shared_summaries.data = {}
+
+    try:
+        yield
+    finally:
+        _shared_summaries.data = previous
+
+
+class SummaryCache:
+    """
+    Memoizes summary serializer output per instance id so that references
+    shared by many rows (version groups, learn methods, ...) are only
+    serialized once per document, or once per export within share_summaries.
+    """
+
+    def __init__(self, serializer_class, context):
+        self.serializer_class = serializer_class
+        self.context = context
+
+        shared = getattr(_shared_summaries, "data", None)
+        if shared is not None:
+            self.data = shared.setdefault(serializer_class, {})
+        else:
+            self.data = {}
+
+    def get(self, instance):
+        if instance is None:
+            return None
+
+        if instance.pk not in self.data:
+            self.data[instance.pk] = self.serializer_class(
+                instance, context=self.context
+            ).data
+
+        return self.data[instance.pk]
+
+
 #####################
 #  MAP SERIALIZERS  #
 #####################
@@ -929,7 +985,7 @@ class EncounterDetailSerializer(serializers.ModelSerializer):
         )
 
     def get_encounter_conditions(self, obj):
-        condition_values = EncounterConditionValueMap.objects.filter(encounter=obj)
+        condition_values = obj.encounterconditionvaluemap_set.all()
         data = EncounterConditionValueMapSerializer(
             condition_values, many=True, context=self.context
         ).data
@@ -1036,28 +1092,25 @@ class LocationAreaDetailSerializer(serializers.ModelSerializer):
     )
     def get_method_rates(self, obj):
         # Get encounters related to this area and pull out unique encounter methods
-        encounter_rates = LocationAreaEncounterRate.objects.filter(
-            location_area=obj
-        ).order_by("encounter_method_id")
-        method_ids = encounter_rates.values("encounter_method_id").distinct()
+        encounter_rates = (
+            LocationAreaEncounterRate.objects.filter(location_area=obj)
+            .select_related("encounter_method", "version")
+            .order_by("encounter_method_id", "pk")
+        )
         encounter_rate_list = []
 
-        for id in method_ids:
+        for _, area_encounter_objects in groupby(
+            encounter_rates, key=lambda rate: rate.encounter_method_id
+        ):
+            area_encounter_objects = list(area_encounter_objects)
             encounter_rate_details = OrderedDict()
 
-            # Get each Unique Item by ID
-            encounter_method_object = EncounterMethod.objects.get(
-                pk=id["encounter_method_id"]
-            )
             encounter_method_data = EncounterMethodSummarySerializer(
-                encounter_method_object, context=self.context
+                area_encounter_objects[0].encounter_method, context=self.context
             ).data
             encounter_rate_details["encounter_method"] = encounter_method_data
 
-            # Get Versions associated with each unique item
-            area_encounter_objects = encounter_rates.filter(
-                encounter_method_id=id["encounter_method_id"]
-            )
+            # Get Versions associated with each unique method
             serializer = LocationAreaEncounterRateSerializer(
                 area_encounter_objects, many=True, context=self.context
             )
@@ -1191,62 +1244,7 @@ class LocationAreaDetailSerializer(serializers.ModelSerializer):
         }
     )
     def get_encounters(self, obj):
-        # get versions for later use
-        version_objects = Version.objects.all()
-        version_data = VersionSummarySerializer(
-            version_objects, many=True, context=self.context
-        ).data
-
-        # all encounters associated with location area
-        all_encounters = Encounter.objects.filter(location_area=obj).order_by("pokemon")
-        encounters_list = []
-
-        # break encounters into pokemon groupings
-        for poke in all_encounters.values("pokemon").distinct():
-            pokemon_object = Pokemon.objects.get(pk=poke["pokemon"])
-
-            pokemon_detail = OrderedDict()
-            pokemon_detail["pokemon"] = PokemonSummarySerializer(
-                pokemon_object, context=self.context
-            ).data
-            pokemon_detail["version_details"] = []
-
-            poke_encounters = all_encounters.filter(pokemon=poke["pokemon"]).order_by(
-                "version"
-            )
-
-            # each pokemon has multiple versions it could be encountered in
-            for ver in poke_encounters.values("version").distinct():
-                version_detail = OrderedDict()
-                version_detail["version"] = version_data[ver["version"] - 1]
-                version_detail["max_chance"] = 0
-                version_detail["encounter_details"] = []
-
-                poke_data = EncounterDetailSerializer(
-                    poke_encounters.filter(version=ver["version"]),
-                    many=True,
-                    context=self.context,
-                ).data
-
-                # each version has multiple ways a pokemon can be encountered
-                for encounter in poke_data:
-                    slot = EncounterSlot.objects.get(pk=encounter["encounter_slot"])
-                    slot_data = EncounterSlotSerializer(slot, context=self.context).data
-                    del encounter["pokemon"]
-                    del encounter["encounter_slot"]
-                    del encounter["location_area"]
-                    del encounter["version"]
-                    encounter["chance"] = slot_data["chance"]
-                    version_detail["max_chance"] += slot_data["chance"]
-                    encounter["method"] = slot_data["encounter_method"]
-
-                    version_detail["encounter_details"].append(encounter)
-
-                pokemon_detail["version_details"].append(version_detail)
-
-            encounters_list.append(pokemon_detail)
-
-        return encounters_list
+        return get_location_area_encounters(obj, self.context)
 
 
 class LocationGameIndexSerializer(serializers.ModelSerializer):
@@ -1387,7 +1385,9 @@ class AbilityDetailSerializer(serializers.ModelSerializer):
         }
     )
     def get_ability_pokemon(self, obj):
-        pokemon_ability_objects = PokemonAbility.objects.filter(ability=obj)
+        pokemon_ability_objects = PokemonAbility.objects.filter(
+            ability=obj
+        ).select_related("pokemon", "ability")
         data = PokemonAbilitySerializer(
             pokemon_ability_objects, many=True, context=self.context
         ).data
@@ -1506,7 +1506,9 @@ class StatDetailSerializer(serializers.ModelSerializer):
         }
     )
     def get_moves_that_affect(self, obj):
-        stat_change_objects = MoveMetaStatChange.objects.filter(stat=obj)
+        stat_change_objects = MoveMetaStatChange.objects.filter(
+            stat=obj
+        ).select_related("stat", "move")
         stat_changes = MoveMetaStatChangeSerializer(
             stat_change_objects, many=True, context=self.context
         ).data
@@ -1745,12 +1747,13 @@ class ItemAttributeDetailSerializer(serializers.ModelSerializer):
         }
     )
     def get_attribute_items(self, obj):
-        item_map_objects = ItemAttributeMap.objects.filter(item_attribute=obj)
+        item_map_objects = ItemAttributeMap.objects.filter(
+            item_attribute=obj
+        ).select_related("item")
         items = []
 
         for map in item_map_objects:
-            item_obj = Item.objects.get(pk=map.item.id)
-            item = ItemSummarySerializer(item_obj, context=self.context).data
+            item = ItemSummarySerializer(map.item, context=self.context).data
             items.append(item)
 
         return items
@@ -1947,7 +1950,9 @@ class ItemDetailSerializer(serializers.ModelSerializer):
         }
     )
     def get_item_attributes(self, obj):
-        item_attribute_maps = ItemAttributeMap.objects.filter(item=obj)
+        item_attribute_maps = ItemAttributeMap.objects.filter(item=obj).select_related(
+            "item", "item_attribute"
+        )
         serializer = ItemAttributeMapSerializer(
             item_attribute_maps, many=True, context=self.context
         )
@@ -2018,22 +2023,26 @@ class ItemDetailSerializer(serializers.ModelSerializer):
         }
     )
     def get_held_by_pokemon(self, obj):
-        pokemon_items = PokemonItem.objects.filter(item=obj).order_by("pokemon_id")
-        pokemon_ids = pokemon_items.values("pokemon_id").distinct()
+        # Get pokemon holding this item, grouped by pokemon
+        pokemon_items = (
+            PokemonItem.objects.filter(item=obj)
+            .select_related("pokemon", "item", "version")
+            .order_by("pokemon_id", "pk")
+        )
         pokemon_list = []
 
-        for id in pokemon_ids:
+        for _, pokemon_item_objects in groupby(
+            pokemon_items, key=lambda pokemon_item: pokemon_item.pokemon_id
+        ):
+            pokemon_item_objects = list(pokemon_item_objects)
             item_pokemon_details = OrderedDict()
 
-            # Get each Unique Item by ID
-            pokemon_object = Pokemon.objects.get(pk=id["pokemon_id"])
             pokemon_data = PokemonSummarySerializer(
-                pokemon_object, context=self.context
+                pokemon_item_objects[0].pokemon, context=self.context
             ).data
             item_pokemon_details["pokemon"] = pokemon_data
 
-            # Get Versions associated with each unique item
-            pokemon_item_objects = pokemon_items.filter(pokemon_id=id["pokemon_id"])
+            # Get Versions associated with each unique pokemon
             serializer = PokemonItemSerializer(
                 pokemon_item_objects, many=True, context=self.context
             )
@@ -2157,7 +2166,9 @@ class NatureDetailSerializer(serializers.ModelSerializer):
         }
     )
     def get_pokeathlon_stats(self, obj):
-        pokeathlon_stat_objects = NaturePokeathlonStat.objects.filter(nature=obj)
+        pokeathlon_stat_objects = NaturePokeathlonStat.objects.filter(
+            nature=obj
+        ).select_related("pokeathlon_stat", "nature")
         pokeathlon_stats = NaturePokeathlonStatSerializer(
             pokeathlon_stat_objects, many=True, context=self.context
         ).data
@@ -2241,9 +2252,11 @@ class BerryFlavorDetailSerializer(serializers.ModelSerializer):
         }
     )
     def get_berries_with_flavor(self, obj):
-        flavor_map_objects = BerryFlavorMap.objects.filter(
-            berry_flavor=obj, potency__gt=0
-        ).order_by("potency")
+        flavor_map_objects = (
+            BerryFlavorMap.objects.filter(berry_flavor=obj, potency__gt=0)
+            .select_related("berry", "berry_flavor")
+            .order_by("potency")
+        )
         flavor_maps = BerryFlavorMapSerializer(
             flavor_map_objects, many=True, context=self.context
         ).data
@@ -2533,7 +2546,9 @@ class EggGroupDetailSerializer(serializers.ModelSerializer):
         }
     )
     def get_species(self, obj):
-        results = PokemonEggGroup.objects.filter(egg_group=obj)
+        results = PokemonEggGroup.objects.filter(egg_group=obj).select_related(
+            "pokemon_species", "egg_group"
+        )
         data = PokemonEggGroupSerializer(results, many=True, context=self.context).data
         associated_species = []
         for species in data:
@@ -2680,22 +2695,43 @@ class TypeDetailSerializer(serializers.ModelSerializer):
         sprites_object = TypeSprites.objects.get(type_id=obj)
         return sprites_object.sprites
 
-    # adds an entry for the given type with the given damage
-    # factor in the given direction to the set of relations
+    # builds the damage relations of a type in the given generation,
+    # or the current ones, from the shared type chart
+    def build_type_relations(self, chart, types, type_id, generation_id=None):
+        i = chart.index[type_id]
+        factors = chart.get_factors(generation_id)
+        present = chart.get_present(generation_id)
+
+        # relations that changed since the given generation come last,
+        # in the order of the past efficacy rows
+        changed_to = []
+        changed_from = []
+        if generation_id is not None:
+            for damage, target, _, _ in chart.applicable_rows(generation_id):
+                if damage == i and target not in changed_to:
+                    changed_to.append(target)
+                if target == i and damage not in changed_from:
+                    changed_from.append(damage)
 
-    def add_type_entry(self, relations, type, damage_factor, direction="_damage_to"):
-        if damage_factor == 200:
-            relations["double" + direction].append(
-                TypeSummarySerializer(type, context=self.context).data
-            )
-        elif damage_factor == 50:
-            relations["half" + direction].append(
-                TypeSummarySerializer(type, context=self.context).data
-            )
-        elif damage_factor == 0:
-            relations["no" + direction].append(
-                TypeSummarySerializer(type, context=self.context).data
-            )
+        relations = OrderedDict()
+        for direction in ("_damage_to", "_damage_from"):
+            for prefix in ("no", "half", "double"):
+                relations[prefix + direction] = []
+
+        for direction, others, changed in (
+            ("_damage_to", factors[i, :], changed_to),
+            ("_damage_from", factors[:, i], changed_from),
+        ):
+            unchanged = [j for j in range(len(others)) if j not in changed]
+            for j in unchanged + changed:
+                prefix = DAMAGE_FACTOR_PREFIXES.get(int(others[j]))
+                if prefix is None or not present[j]:
+                    continue
+                relations[prefix + direction].append(
+                    types.get(Type(pk=chart.type_ids[j], name=chart.type_names[j]))
+                )
+
+        return relations
 
     @extend_schema_field(
         field={
@@ -2803,67 +2839,10 @@ class TypeDetailSerializer(serializers.ModelSerializer):
         }
     )
     def get_type_relationships(self, obj):
-        relations = OrderedDict()
-        relations["no_damage_to"] = []
-        relations["half_damage_to"] = []
-        relations["double_damage_to"] = []
-
-        relations["no_damage_from"] = []
-        relations["half_damage_from"] = []
-        relations["double_damage_from"] = []
-
-        # Damage To
-        results = TypeEfficacy.objects.filter(damage_type=obj)
-        serializer = TypeEfficacySerializer(results, many=True, context=self.context)
-
-        for relation in serializer.data:
-            type = Type.objects.get(pk=relation["target_type"])
-            damage_factor = relation["damage_factor"]
-            self.add_type_entry(relations, type, damage_factor, direction="_damage_to")
-
-        # Damage From
-        results = TypeEfficacy.objects.filter(target_type=obj)
-        serializer = TypeEfficacySerializer(results, many=True, context=self.context)
-
-        for relation in serializer.data:
-            type = Type.objects.get(pk=relation["damage_type"])
-            damage_factor = relation["damage_factor"]
-            self.add_type_entry(
-                relations, type, damage_factor, direction="_damage_from"
-            )
+        chart = get_type_chart(obj.pk)
+        types = SummaryCache(TypeSummarySerializer, self.context)
 
-        return relations
-
-    # takes a list of past type relations by generation and
-    # returns a list of lists where each list has the entries
-    # for a single generation
-    def group_relations_by_generation(self, serializer_data):
-        data_by_gen = []
-
-        current_generation = ""
-        generation_data = []
-        for relation in serializer_data:
-            gen_name = relation["generation"]["name"]
-            if gen_name != current_generation:
-                # first item for this generation so create its list
-                current_generation = gen_name
-                generation_data = [relation]
-                data_by_gen.append(generation_data)
-            else:
-                # add to this generation's list
-                generation_data.append(relation)
-
-        return data_by_gen
-
-    # removes the entry for the given type in
-    # the given direction from the set of relations
-    def remove_type_entry(self, relations, type, direction="_damage_to"):
-        for k in ["double", "half", "no"]:
-            rel_list = relations[k + direction]
-            for i, o in enumerate(rel_list):
-                if o["name"] == type.name:
-                    del rel_list[i]
-                    return
+        return self.build_type_relations(chart, types, obj.pk)
 
     # returns past type relationships for the given type object
     @extend_schema_field(
@@ -3020,99 +2999,25 @@ class TypeDetailSerializer(serializers.ModelSerializer):
         }
     )
     def get_type_past_relationships(self, obj):
-        # collect data from DB
-        damage_type_results = list(TypeEfficacyPast.objects.filter(damage_type=obj))
-        target_type_results = list(TypeEfficacyPast.objects.filter(target_type=obj))
-        serializer = TypeEfficacyPastSerializer(
-            damage_type_results + target_type_results, many=True, context=self.context
-        )
-
-        # group data by generation
-        data_by_gen = self.group_relations_by_generation(serializer.data)
+        chart = get_type_chart(obj.pk)
+        types = SummaryCache(TypeSummarySerializer, self.context)
+        generation_names = dict(chart.generations)
 
-        # process each generation's data in turn
         final_data = []
-        past_relations = {}
-        for gen_data in data_by_gen:
-            # create past relations object for this generation
+        for generation_id in chart.get_past_generations(obj.pk):
             past_relations = OrderedDict()
-
-            # set generation
-            past_relations["generation"] = gen_data[0]["generation"]
-
-            # use current damage relations object
-            past_relations["damage_relations"] = self.get_type_relationships(obj)
-            relations = past_relations["damage_relations"]
-
-            current_gen = Generation.objects.get(name=gen_data[0]["generation"]["name"])
-
-            # remove types not yet introduced
-            # e.g. Poison has no effect on Steel, but Steel was not present in generation I
-            # so it should be absent from the list
-            relations["no_damage_to"] = self.remove_newer_types(
-                relations["no_damage_to"], current_gen
-            )
-            relations["half_damage_to"] = self.remove_newer_types(
-                relations["half_damage_to"], current_gen
-            )
-            relations["double_damage_to"] = self.remove_newer_types(
-                relations["double_damage_to"], current_gen
-            )
-            relations["no_damage_from"] = self.remove_newer_types(
-                relations["no_damage_from"], current_gen
-            )
-            relations["half_damage_from"] = self.remove_newer_types(
-                relations["half_damage_from"], current_gen
-            )
-            relations["double_damage_from"] = self.remove_newer_types(
-                relations["double_damage_from"], current_gen
+            past_relations["generation"] = GenerationSummarySerializer(
+                Generation(pk=generation_id, name=generation_names.get(generation_id)),
+                context=self.context,
+            ).data
+            past_relations["damage_relations"] = self.build_type_relations(
+                chart, types, obj.pk, generation_id
             )
 
-            # populate offensive relations
-            results = list(filter(lambda x: x["damage_type"] == obj.id, gen_data))
-            for relation in results:
-                type = Type.objects.get(pk=relation["target_type"])
-
-                # remove conflicting entry if it exists
-                self.remove_type_entry(relations, type, direction="_damage_to")
-
-                # add entry
-                damage_factor = relation["damage_factor"]
-                self.add_type_entry(
-                    relations, type, damage_factor, direction="_damage_to"
-                )
-
-                del relation["generation"]
-
-            # populate defensive relations
-            results = list(filter(lambda x: x["target_type"] == obj.id, gen_data))
-            for relation in results:
-                type = Type.objects.get(pk=relation["damage_type"])
-
-                # remove conflicting entry if it exists
-                self.remove_type_entry(relations, type, direction="_damage_from")
-
-                # add entry
-                damage_factor = relation["damage_factor"]
-                self.add_type_entry(
-                    relations, type, damage_factor, direction="_damage_from"
-                )
-
-                del relation["generation"]
-
-            # add to final list
             final_data.append(past_relations)
 
         return final_data
 
-    def remove_newer_types(self, relations, current_gen):
-        return list(filter(lambda x: self.type_is_present(x, current_gen), relations))
-
-    def type_is_present(self, type, current_gen):
-        type_obj = Type.objects.get(name=type["name"])
-        gen_introduced = Generation.objects.get(pk=type_obj.generation.id)
-        return gen_introduced.id <= current_gen.id
-
     @extend_schema_field(
         field={
             "type": "array",
@@ -3143,7 +3048,9 @@ class TypeDetailSerializer(serializers.ModelSerializer):
         }
     )
     def get_type_pokemon(self, obj):
-        poke_type_objects = PokemonType.objects.filter(type=obj)
+        poke_type_objects = PokemonType.objects.filter(type=obj).select_related(
+            "pokemon", "type"
+        )
         poke_types = PokemonTypeSerializer(
             poke_type_objects, many=True, context=self.context
         ).data
@@ -3556,14 +3463,15 @@ class MoveDetailSerializer(serializers.ModelSerializer):
         }
     )
     def get_learned_by_pokemon(self, obj):
-        pokemon_moves = PokemonMove.objects.filter(move_id=obj).order_by("pokemon_id")
+        pokemon_moves = PokemonMove.objects.filter(move_id=obj)
 
         pokemon_list = []
 
-        pokemon_ids = pokemon_moves.values("pokemon_id").distinct()
+        pokemon_objects = Pokemon.objects.filter(
+            pk__in=pokemon_moves.values("pokemon_id")
+        ).order_by("pk")
 
-        for id in pokemon_ids:
-            pokemon_object = Pokemon.objects.get(pk=id["pokemon_id"])
+        for pokemon_object in pokemon_objects:
             pokemon_data = PokemonSummarySerializer(
                 pokemon_object, context=self.context
             ).data
@@ -3925,7 +3833,9 @@ class MoveDetailSerializer(serializers.ModelSerializer):
         }
     )
     def get_move_stat_change(self, obj):
-        stat_change_objects = MoveMetaStatChange.objects.filter(move=obj)
+        stat_change_objects = MoveMetaStatChange.objects.filter(
+            move=obj
+        ).select_related("stat", "move")
         stat_changes = MoveMetaStatChangeSerializer(
             stat_change_objects, many=True, context=self.context
         ).data
@@ -4392,7 +4302,9 @@ class PokemonShapeDetailSerializer(serializers.ModelSerializer):
         }
     )
     def get_shape_names(self, obj):
-        results = PokemonShapeName.objects.filter(pokemon_shape_id=obj)
+        results = PokemonShapeName.objects.filter(pokemon_shape_id=obj).select_related(
+            "language"
+        )
         serializer = PokemonShapeNameSerializer(
             results, many=True, context=self.context
         )
@@ -4444,7 +4356,9 @@ class PokemonShapeDetailSerializer(serializers.ModelSerializer):
         }
     )
     def get_shape_awesome_names(self, obj):
-        results = PokemonShapeName.objects.filter(pokemon_shape_id=obj)
+        results = PokemonShapeName.objects.filter(pokemon_shape_id=obj).select_related(
+            "language"
+        )
         serializer = PokemonShapeNameSerializer(
             results, many=True, context=self.context
         )
@@ -4941,50 +4855,30 @@ class PokemonDetailSerializer(serializers.ModelSerializer):
         }
     )
     def get_pokemon_moves(self, obj):
-        version_objects = VersionGroup.objects.all()
-        version_data = VersionGroupSummarySerializer(
-            version_objects, many=True, context=self.context
-        ).data
-        method_objects = MoveLearnMethod.objects.all()
-        method_data = MoveLearnMethodSummarySerializer(
-            method_objects, many=True, context=self.context
-        ).data
-
-        # Get moves related to this pokemon and pull out unique Move IDs.
-        # Note that it's important to order by the same column we're using to
-        # determine if the entries are unique.  Otherwise distinct() will
-        # return apparent duplicates.
-
-        pokemon_moves = PokemonMove.objects.filter(pokemon_id=obj).order_by("move_id")
-        move_ids = pokemon_moves.values("move_id").distinct()
+        # The whole learnset comes back from a single joined query, so the
+        # number of queries doesn't depend on how many moves the pokemon has.
+        version_groups = SummaryCache(VersionGroupSummarySerializer, self.context)
+        methods = SummaryCache(MoveLearnMethodSummarySerializer, self.context)
         move_list = []
 
-        for id in move_ids:
+        for move, pokemon_moves in load_learnset(obj):
             pokemon_move_details = OrderedDict()
-
-            # Get each Unique Move by ID
-            move_object = Move.objects.get(pk=id["move_id"])
-            move_data = MoveSummarySerializer(move_object, context=self.context).data
-            pokemon_move_details["move"] = move_data
-
-            # Get Versions and Move Methods associated with each unique move
-            pokemon_move_objects = pokemon_moves.filter(move_id=id["move_id"])
-            serializer = PokemonMoveSerializer(
-                pokemon_move_objects, many=True, context=self.context
-            )
+            pokemon_move_details["move"] = MoveSummarySerializer(
+                move, context=self.context
+            ).data
             pokemon_move_details["version_group_details"] = []
 
-            for move in serializer.data:
+            for pokemon_move in pokemon_moves:
                 version_detail = OrderedDict()
 
-                version_detail["level_learned_at"] = move["level"]
-                version_detail["version_group"] = version_data[
-                    move["version_group"] - 1
-                ]
-                version_detail["move_learn_method"] = method_data[
-                    move["move_learn_method"] - 1
-                ]
-                version_detail["order"] = move["order"]
+                version_detail["level_learned_at"] = pokemon_move.level
+                version_detail["version_group"] = version_groups.get(
+                    pokemon_move.version_group
+                )
+                version_detail["move_learn_method"] = methods.get(
+                    pokemon_move.move_learn_method
+                )
+                version_detail["order"] = pokemon_move.order
 
                 pokemon_move_details["version_group_details"].append(version_detail)
 
@@ -5060,21 +4954,26 @@ class PokemonDetailSerializer(serializers.ModelSerializer):
         }
     )
     def get_pokemon_held_items(self, obj):
-        # Get items related to this pokemon and pull out unique Item IDs
-        pokemon_items = PokemonItem.objects.filter(pokemon_id=obj).order_by("item_id")
-        item_ids = pokemon_items.values("item_id").distinct()
+        # Get items related to this pokemon, grouped by item
+        pokemon_items = (
+            PokemonItem.objects.filter(pokemon_id=obj)
+            .select_related("item", "version")
+            .order_by("item_id", "pk")
+        )
         item_list = []
 
-        for id in item_ids:
+        for _, pokemon_item_objects in groupby(
+            pokemon_items, key=lambda pokemon_item: pokemon_item.item_id
+        ):
+            pokemon_item_objects = list(pokemon_item_objects)
             pokemon_item_details = OrderedDict()
 
-            # Get each Unique Item by ID
-            item_object = Item.objects.get(pk=id["item_id"])
-            item_data = ItemSummarySerializer(item_object, context=self.context).data
+            item_data = ItemSummarySerializer(
+                pokemon_item_objects[0].item, context=self.context
+            ).data
             pokemon_item_details["item"] = item_data
 
             # Get Versions associated with each unique item
-            pokemon_item_objects = pokemon_items.filter(item_id=id["item_id"])
             serializer = PokemonItemSerializer(
                 pokemon_item_objects, many=True, context=self.context
             )
@@ -5126,7 +5025,9 @@ class PokemonDetailSerializer(serializers.ModelSerializer):
         }
     )
     def get_pokemon_abilities(self, obj):
-        pokemon_ability_objects = PokemonAbility.objects.filter(pokemon=obj)
+        pokemon_ability_objects = PokemonAbility.objects.filter(
+            pokemon=obj
+        ).select_related("pokemon", "ability")
         data = PokemonAbilitySerializer(
             pokemon_ability_objects, many=True, context=self.context
         ).data
@@ -5276,7 +5177,9 @@ class PokemonDetailSerializer(serializers.ModelSerializer):
         }
     )
     def get_pokemon_types(self, obj):
-        poke_type_objects = PokemonType.objects.filter(pokemon=obj)
+        poke_type_objects = PokemonType.objects.filter(pokemon=obj).select_related(
+            "pokemon", "type"
+        )
         poke_types = PokemonTypeSerializer(
             poke_type_objects, many=True, context=self.context
         ).data
@@ -5482,16 +5385,6 @@ class PokemonSpeciesNameSerializer(serializers.ModelSerializer):
         fields = ("name", "genus", "language")
 
 
-class PokemonSpeciesEvolutionSerializer(serializers.ModelSerializer):
-    """
-    This is here purely to help build pokemon evolution chains
-    """
-
-    class Meta:
-        model = PokemonSpecies
-        fields = ("name", "id", "evolves_from_species", "is_baby")
-
-
 class PokemonSpeciesDetailSerializer(serializers.ModelSerializer):
     names = serializers.SerializerMethodField("get_pokemon_names")
     form_descriptions = PokemonSpeciesDescriptionSerializer(
@@ -5572,7 +5465,9 @@ class PokemonSpeciesDetailSerializer(serializers.ModelSerializer):
         }
     )
     def get_pokemon_names(self, obj):
-        species_results = PokemonSpeciesName.objects.filter(pokemon_species=obj)
+        species_results = PokemonSpeciesName.objects.filter(
+            pokemon_species=obj
+        ).select_related("language")
         species_serializer = PokemonSpeciesNameSerializer(
             species_results, many=True, context=self.context
         )
@@ -5616,7 +5511,9 @@ class PokemonSpeciesDetailSerializer(serializers.ModelSerializer):
         }
     )
     def get_pokemon_genera(self, obj):
-        results = PokemonSpeciesName.objects.filter(pokemon_species=obj)
+        results = PokemonSpeciesName.objects.filter(pokemon_species=obj).select_related(
+            "language"
+        )
         serializer = PokemonSpeciesNameSerializer(
             results, many=True, context=self.context
         )
@@ -5648,7 +5545,9 @@ class PokemonSpeciesDetailSerializer(serializers.ModelSerializer):
         }
     )
     def get_pokemon_egg_groups(self, obj):
-        results = PokemonEggGroup.objects.filter(pokemon_species=obj)
+        results = PokemonEggGroup.objects.filter(pokemon_species=obj).select_related(
+            "pokemon_species", "egg_group"
+        )
         data = PokemonEggGroupSerializer(results, many=True, context=self.context).data
         groups = []
         for group in data:
@@ -5681,19 +5580,16 @@ class PokemonSpeciesDetailSerializer(serializers.ModelSerializer):
         }
     )
     def get_pokemon_varieties(self, obj):
-        results = Pokemon.objects.filter(pokemon_species=obj)
+        results = list(Pokemon.objects.filter(pokemon_species=obj))
         summary_data = PokemonSummarySerializer(
             results, many=True, context=self.context
         ).data
-        detail_data = PokemonDetailSerializer(
-            results, many=True, context=self.context
-        ).data
 
         varieties = []
 
-        for index, pokemon in enumerate(detail_data):
+        for index, pokemon in enumerate(results):
             entry = OrderedDict()
-            entry["is_default"] = pokemon["is_default"]
+            entry["is_default"] = pokemon.is_default
             entry["pokemon"] = summary_data[index]
             varieties.append(entry)
 
@@ -6026,85 +5922,8 @@ class EvolutionChainDetailSerializer(serializers.ModelSerializer):
         }
     )
     def build_chain(self, obj):
-        chain_id = obj.id
-
-        pokemon_objects = PokemonSpecies.objects.filter(
-            evolution_chain_id=chain_id
-        ).order_by("order")
-        summary_data = PokemonSpeciesSummarySerializer(
-            pokemon_objects, many=True, context=self.context
-        ).data
-        ref_data = PokemonSpeciesEvolutionSerializer(
-            pokemon_objects, many=True, context=self.context
-        ).data
-
-        # convert evolution data list to tree
-        evolution_tree = self.build_evolution_tree(ref_data)
-
-        # serialize chain recursively from tree
-        chain = self.build_chain_link_entry(evolution_tree, summary_data)
-
-        return chain
-
-    # converts a list of Pokemon species evolution data into a tree representing the evolution chain
-    def build_evolution_tree(self, species_evolution_data):
-        evolution_tree = OrderedDict()
-        evolution_tree["species"] = species_evolution_data[0]
-        evolution_tree["children"] = []
-
-        for species in species_evolution_data[1:]:
-            chain_link = OrderedDict()
-            chain_link["species"] = species
-            chain_link["children"] = []
-
-            evolves_from_species_id = chain_link["species"]["evolves_from_species"]
-
-            # find parent link by DFS
-            parent_link = evolution_tree
-            search_stack = [parent_link]
-
-            while len(search_stack) > 0:
-                l = search_stack.pop()
-                if l["species"]["id"] == evolves_from_species_id:
-                    parent_link = l
-                    break
-
-                # "left" to "right" requires reversing the list of children
-                search_stack += reversed(l["children"])
-
-            parent_link["children"].append(chain_link)
-
-        return evolution_tree
-
-    # serializes an evolution chain link recursively
-    # chain_link is a tree representing an evolution chain
-    def build_chain_link_entry(self, chain_link, summary_data):
-        entry = OrderedDict()
-        evolution_data = None
-
-        species = chain_link["species"]
-        if species["evolves_from_species"]:
-            evolution_object = PokemonEvolution.objects.filter(
-                evolved_species=species["id"]
-            )
-
-            evolution_data = PokemonEvolutionSerializer(
-                evolution_object, many=True, context=self.context
-            ).data
-
-        entry["is_baby"] = species["is_baby"]
-
-        species_summary = next(x for x in summary_data if x["name"] == species["name"])
-        entry["species"] = species_summary
-
-        entry["evolution_details"] = evolution_data or []
-
-        evolves_to = [
-            self.build_chain_link_entry(c, summary_data) for c in chain_link["children"]
-        ]
-        entry["evolves_to"] = evolves_to
-
-        return entry
+        # chains are materialized ahead of time, see pokemon_v2/evolutions.py
+        return get_evolution_chain(obj, self.context)
 
 
 class PokemonDexNumberSerializer(serializers.ModelSerializer):
@@ -6292,8 +6111,10 @@ class PokedexDetailSerializer(serializers.ModelSerializer):
         }
     )
     def get_pokedex_entries(self, obj):
-        results = PokemonDexNumber.objects.filter(pokedex=obj).order_by(
-            "pokedex_number"
+        results = (
+            PokemonDexNumber.objects.filter(pokedex=obj)
+            .select_related("pokemon_species")
+            .order_by("pokedex_number")
         )
         serializer = PokemonDexNumberSerializer(
             results, many=True, context=self.context
@@ -0,0 +1,370 @@
+import json
+import os
+
+from cachalot.api import cachalot_disabled
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from pokemon_v2.models import *
+from pokemon_v2.tests import API_V2, APIData
+from pokemon_v2.urls import router
+
+###################
+#  QUERY BUDGETS  #
+###################
+
+# The queries of the detail and list endpoints of every read-only resource
+# must not grow with the rows they render. Each resource is created twice,
+# with RELATED_ROWS and with 3 * RELATED_ROWS related rows (names, and the
+# moves, encounters, pokemon, ... of the resources known to render many), and
+# the second can't take more queries than the first. The list of each
+# resource is read with RELATED_ROWS and with 3 * RELATED_ROWS resources in
+# the same way.
+#
+# The counts can't exceed the budgets of QUERY_BUDGETS_FILE either, so that
+# a change adding queries to an endpoint shows in its diff. Run the tests
+# with UPDATE_QUERY_BUDGETS=1 to write the current counts to the file:
+#
+#   UPDATE_QUERY_BUDGETS=1 python manage.py test pokemon_v2.test_query_budgets
+
+QUERY_BUDGETS_FILE = os.path.join(os.path.dirname(__file__), "query_budgets.json")
+
+RELATED_ROWS = 2
+
+# resources whose setup_*_data doesn't take a name
+UNNAMED_RESOURCES = {
+    "characteristic",
+    "contest-effect",
+    "evolution-chain",
+    "super-contest-effect",
+}
+
+DUMMY_CACHES = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+
+def read_query_budgets():
+    try:
+        with open(QUERY_BUDGETS_FILE) as budgets_file:
+            return json.load(budgets_file)
+    except FileNotFoundError:
+        return {}
+
+
+def write_query_budgets(budgets):
+    with open(QUERY_BUDGETS_FILE, "w") as budgets_file:
+        json.dump(budgets, budgets_file, indent=2, sort_keys=True)
+        budgets_file.write("\n")
+
+
+# the response cache may not answer a query, nor cachalot (see count_queries)
+@override_settings(CACHES=DUMMY_CACHES)
+class QueryBudgetTests(APIData, APITestCase):
+    """Query counts of the endpoints of every resource"""
+
+    # Resource Data
+    def create_resource(self, prefix, name):
+        create = getattr(self, "create_{}".format(prefix.replace("-", "_")), None)
+        if create is not None:
+            return create(name)
+
+        setup = getattr(self, "setup_{}_data".format(prefix.replace("-", "_")))
+        if prefix in UNNAMED_RESOURCES:
+            return setup()
+        return setup(name=name)
+
+    def create_encounter_condition_value(self, name):
+        return self.setup_encounter_condition_value_data(
+            self.setup_encounter_condition_data(name="cndtn for " + name), name=name
+        )
+
+    def create_item(self, name):
+        item = self.setup_item_data(name=name)
+        self.setup_item_sprites_data(item)
+        return item
+
+    def create_machine(self, name):
+        return Machine.objects.create(
+            machine_number=1,
+            item=self.setup_item_data(name="itm for " + name),
+            move=self.setup_move_data(name="mv for " + name),
+            version_group=self.setup_version_group_data(name="ver grp for " + name),
+        )
+
+    def create_pokemon(self, name):
+        pokemon = self.setup_pokemon_data(name=name)
+        self.setup_pokemon_sprites_data(pokemon)
+        self.setup_pokemon_cries_data(pokemon)
+        return pokemon
+
+    def create_pokemon_form(self, name):
+        pokemon_form = self.setup_pokemon_form_data(
+            self.setup_pokemon_data(name="pkmn for " + name), name=name
+        )
+        self.setup_pokemon_form_sprites_data(pokemon_form)
+        return pokemon_form
+
+    def create_type(self, name):
+        type = self.setup_type_data(name=name)
+        self.setup_type_sprites_data(type)
+        return type
+
+    def add_related_rows(self, prefix, resource, count):
+        setup_name = getattr(
+            self, "setup_{}_name_data".format(prefix.replace("-", "_")), None
+        )
+        add_rows = getattr(self, "add_{}_rows".format(prefix.replace("-", "_")), None)
+
+        for index in range(count):
+            name = "{} {} for {}".format(prefix, index, resource.pk)
+            if setup_name is not None:
+                setup_name(resource, name="nm " + name)
+            if add_rows is not None:
+                add_rows(resource, name)
+
+    def add_ability_rows(self, ability, name):
+        self.setup_ability_flavor_text_data(ability, flavor_text="flvr txt " + name)
+        self.setup_pokemon_ability_data(
+            self.setup_pokemon_data(name="pkmn " + name), ability=ability
+        )
+
+    def add_berry_flavor_rows(self, berry_flavor, name):
+        self.setup_berry_flavor_map_data(
+            self.setup_berry_data(name="bry " + name), berry_flavor
+        )
+
+    def add_egg_group_rows(self, egg_group, name):
+        self.setup_pokemon_egg_group_data(
+            self.setup_pokemon_species_data(name="pkmn spcs " + name), egg_group
+        )
+
+    def add_generation_rows(self, generation, name):
+        self.setup_pokemon_species_data(generation=generation, name="spcs " + name)
+        self.setup_ability_data(name="ablty " + name, generation=generation)
+        self.setup_move_data(name="mv " + name, generation=generation)
+        self.setup_type_data(name="tp " + name, generation=generation)
+
+    def add_growth_rate_rows(self, growth_rate, name):
+        self.setup_pokemon_species_data(growth_rate=growth_rate, name="spcs " + name)
+
+    def add_item_rows(self, item, name):
+        self.setup_item_flavor_text_data(item, flavor_text="flvr txt " + name)
+        self.setup_item_attribute_map_data(
+            item, self.setup_item_attribute_data(name="itm attr " + name)
+        )
+        self.setup_pokemon_item_data(
+            pokemon=self.setup_pokemon_data(name="pkmn " + name),
+            item=item,
+            version=self.setup_version_data(name="ver " + name),
+        )
+
+    def add_item_attribute_rows(self, item_attribute, name):
+        self.setup_item_attribute_map_data(
+            self.setup_item_data(name="itm " + name), item_attribute
+        )
+
+    def add_item_category_rows(self, item_category, name):
+        self.setup_item_data(item_category=item_category, name="itm " + name)
+
+    def add_location_rows(self, location, name):
+        self.setup_location_area_data(location=location, name="lctn area " + name)
+        self.setup_location_game_index_data(location)
+
+    def add_location_area_rows(self, location_area, name):
+        encounter_method = self.setup_encounter_method_data(name="mthd " + name)
+        self.setup_location_area_encounter_rate_data(location_area, encounter_method)
+        self.setup_encounter_data(
+            location_area=location_area,
+            encounter_slot=self.setup_encounter_slot_data(encounter_method),
+            pokemon=self.setup_pokemon_data(name="pkmn " + name),
+            version=self.setup_version_data(name="ver " + name),
+        )
+
+    def add_move_rows(self, move, name):
+        self.setup_move_flavor_text_data(move, flavor_text="flvr txt " + name)
+        self.setup_move_stat_change_data(
+            move, stat=self.setup_stat_data(name="stt " + name)
+        )
+        self.setup_pokemon_move_data(
+            self.setup_pokemon_data(name="pkmn " + name),
+            move,
+            self.setup_version_group_data(name="ver grp " + name),
+        )
+
+    def add_move_damage_class_rows(self, move_damage_class, name):
+        self.setup_move_data(move_damage_class=move_damage_class, name="mv " + name)
+
+    def add_move_target_rows(self, move_target, name):
+        self.setup_move_data(move_target=move_target, name="mv " + name)
+
+    def add_nature_rows(self, nature, name):
+        self.setup_nature_pokeathlon_stat_data(
+            nature=nature,
+            pokeathlon_stat=self.setup_pokeathlon_stat_data(name="stt " + name),
+        )
+        self.setup_nature_battle_style_preference_data(
+            nature=nature,
+            move_battle_style=self.setup_move_battle_style_data(name="stl " + name),
+        )
+
+    def add_pokedex_rows(self, pokedex, name):
+        self.setup_pokemon_dex_entry_data(
+            self.setup_pokemon_species_data(name="spcs " + name), pokedex
+        )
+
+    def add_pokemon_rows(self, pokemon, name):
+        self.setup_pokemon_move_data(
+            pokemon,
+            self.setup_move_data(name="mv " + name),
+            self.setup_version_group_data(name="ver grp " + name),
+        )
+        self.setup_pokemon_ability_data(
+            pokemon, ability=self.setup_ability_data(name="ablty " + name)
+        )
+        self.setup_pokemon_type_data(
+            pokemon, type=self.setup_type_data(name="tp " + name)
+        )
+        self.setup_pokemon_item_data(
+            pokemon=pokemon,
+            item=self.setup_item_data(name="itm " + name),
+            version=self.setup_version_data(name="ver " + name),
+        )
+        self.setup_pokemon_game_index_data(pokemon)
+        self.setup_encounter_data(
+            location_area=self.setup_location_area_data(name="lctn area " + name),
+            pokemon=pokemon,
+            version=self.setup_version_data(name="encntr ver " + name),
+        )
+
+    def add_pokemon_color_rows(self, pokemon_color, name):
+        self.setup_pokemon_species_data(
+            pokemon_color=pokemon_color, name="spcs " + name
+        )
+
+    def add_pokemon_habitat_rows(self, pokemon_habitat, name):
+        self.setup_pokemon_species_data(
+            pokemon_habitat=pokemon_habitat, name="spcs " + name
+        )
+
+    def add_pokemon_shape_rows(self, pokemon_shape, name):
+        self.setup_pokemon_species_data(
+            pokemon_shape=pokemon_shape, name="spcs " + name
+        )
+
+    def add_pokemon_species_rows(self, pokemon_species, name):
+        self.setup_pokemon_species_flavor_text_data(
+            pokemon_species, flavor_text="flvr txt " + name
+        )
+        pokemon = self.setup_pokemon_data(
+            pokemon_species=pokemon_species, name="pkmn " + name
+        )
+        self.setup_pokemon_sprites_data(pokemon)
+        self.setup_pokemon_cries_data(pokemon)
+        self.setup_pokemon_egg_group_data(
+            pokemon_species, self.setup_egg_group_data(name="egg grp " + name)
+        )
+        self.setup_pokemon_dex_entry_data(
+            pokemon_species, self.setup_pokedex_data(name="pkdx " + name)
+        )
+
+    def add_region_rows(self, region, name):
+        self.setup_location_data(region=region, name="lctn " + name)
+        self.setup_pokedex_data(region=region, name="pkdx " + name)
+
+    def add_stat_rows(self, stat, name):
+        self.setup_move_stat_change_data(
+            self.setup_move_data(name="mv " + name), stat=stat
+        )
+
+    def add_type_rows(self, type, name):
+        self.setup_pokemon_type_data(
+            self.setup_pokemon_data(name="pkmn " + name), type=type
+        )
+        self.setup_move_data(type=type, name="mv " + name)
+
+    # Query Counts
+    def count_queries(self, url):
+        # cachalot 2.4.5 ignores override_settings(CACHALOT_ENABLED=False)
+        with cachalot_disabled():
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+        # counted by QueryInstrumentationMiddleware
+        return response.wsgi_request.query_stats
+
+    def assertSameQueries(self, few, many, url):
+        grown = {
+            scope: [few.by_scope.get(scope, [0])[0], count]
+            for scope, (count, _) in many.by_scope.items()
+            if count > few.by_scope.get(scope, [0])[0]
+        }
+        self.assertLessEqual(
+            many.count,
+            few.count,
+            "{} makes more queries with more rows, by scope: {}".format(url, grown),
+        )
+
+    def measure_detail(self, prefix):
+        few = self.create_resource(prefix, "{} with few rows".format(prefix))
+        many = self.create_resource(prefix, "{} with many rows".format(prefix))
+        self.add_related_rows(prefix, few, RELATED_ROWS)
+        self.add_related_rows(prefix, many, 3 * RELATED_ROWS)
+
+        url = "{}/{}/{}/".format(API_V2, prefix, many.pk)
+        few_stats = self.count_queries("{}/{}/{}/".format(API_V2, prefix, few.pk))
+        many_stats = self.count_queries(url)
+        self.assertSameQueries(few_stats, many_stats, url)
+
+        return max(few_stats.count, many_stats.count)
+
+    def measure_list(self, prefix):
+        url = "{}/{}/".format(API_V2, prefix)
+
+        for index in range(RELATED_ROWS):
+            self.create_resource(prefix, "{} {} in list".format(prefix, index))
+        few_stats = self.count_queries(url)
+
+        for index in range(RELATED_ROWS, 3 * RELATED_ROWS):
+            self.create_resource(prefix, "{} {} in list".format(prefix, index))
+        many_stats = self.count_queries(url)
+        self.assertSameQueries(few_stats, many_stats, url)
+
+        return max(few_stats.count, many_stats.count)
+
+    def test_query_budgets(self):
+        budgets = read_query_budgets()
+        counts = {}
+
+        for prefix, viewset, _ in router.registry:
+            # the budgets only cover the read-only resources
+            if hasattr(viewset, "create"):
+                continue
+
+            counts[prefix] = {}
+            for endpoint, measure in (
+                ("detail", self.measure_detail),
+                ("list", self.measure_list),
+            ):
+                with self.subTest(resource=prefix, endpoint=endpoint):
+                    count = measure(prefix)
+                    counts[prefix][endpoint] = count
+
+                    if os.environ.get("UPDATE_QUERY_BUDGETS"):
+                        continue
+
+                    budget = budgets.get(prefix, {}).get(endpoint)
+                    self.assertIsNotNone(
+                        budget,
+                        "{} {} has no budget in {}".format(
+                            prefix, endpoint, QUERY_BUDGETS_FILE
+                        ),
+                    )
+                    self.assertLessEqual(
+                        count,
+                        budget,
+                        "{} {} makes {} queries, over its budget of {}".format(
+                            prefix, endpoint, count, budget
+                        ),
+                    )
+
+        if os.environ.get("UPDATE_QUERY_BUDGETS"):
+            write_query_budgets(counts)
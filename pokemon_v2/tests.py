@@ -1,13 +1,48 @@
+import io
 import json
+import gzip
+import os
+import tempfile
+from unittest import mock
+from cachalot.api import cachalot_disabled
+from django.db import connection
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
+from pokemon_v2 import metrics, responsecache, versions
 from pokemon_v2.models import *
+from pokemon_v2.namesearch import get_name_index, invalidate_name_indexes
+from pokemon_v2.renderers import ORJSONParser, ORJSONRenderer
+from pokemon_v2.responsecache import (
+    get_cached_response,
+    get_row_tag,
+    get_table_tag,
+    get_url_response_key,
+    get_write_version,
+    invalidate_tags,
+    record_tags,
+    store_response,
+)
+from pokemon_v2.search import refresh_search_index
 
 # pylint: disable=redefined-builtin
 
 TEST_HOST = "http://testserver"
 API_V2 = "/api/v2"
 
+LOCAL_MEMORY_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "pokemon_v2-tests",
+    }
+}
+
 
 class APIData:
     """Data Initializers"""
@@ -1947,7 +1982,7 @@ class APIData:
     def setup_encounter_condition_value_map_data(
         cls, encounter, encounter_condition_value
     ):
-        encounter_condition_value_map = EncounterConditionValue.objects.create(
+        encounter_condition_value_map = EncounterConditionValueMap.objects.create(
             encounter=encounter, encounter_condition_value=encounter_condition_value
         )
         encounter_condition_value_map.save()
@@ -2060,6 +2095,10 @@ class APIData:
 
 # Tests
 class APITests(APIData, APITestCase):
+    def setUp(self):
+        # the fixtures aren't written through the API, like a data rebuild
+        invalidate_name_indexes()
+
     # Gender Tests
     def test_gender_api(self):
         gender = self.setup_gender_data(name="female")
@@ -5797,3 +5836,1191 @@ class APITests(APIData, APITestCase):
         self.assertEqual(uppercase_response.status_code, status.HTTP_200_OK)
 
         self.assertEqual(lowercase_response.data, uppercase_response.data)
+
+    def test_pokemon_moves_query_count(self):
+        def setup_pokemon_with_moves(name, move_count):
+            pokemon = self.setup_pokemon_data(name=name)
+            self.setup_pokemon_sprites_data(pokemon=pokemon)
+            self.setup_pokemon_cries_data(pokemon)
+
+            for index in range(move_count):
+                move = self.setup_move_data(name="mv {} for {}".format(index, name))
+                for group in range(3):
+                    version_group = self.setup_version_group_data(
+                        name="ver grp {} {} for {}".format(index, group, name)
+                    )
+                    self.setup_pokemon_move_data(
+                        pokemon=pokemon,
+                        move=move,
+                        version_group=version_group,
+                        level=group,
+                    )
+
+            return pokemon
+
+        def count_queries(pokemon):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get("{}/pokemon/{}/".format(API_V2, pokemon.pk))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(queries), response
+
+        few_moves = setup_pokemon_with_moves("few mvs pkmn", 1)
+        many_moves = setup_pokemon_with_moves("many mvs pkmn", 10)
+
+        few_count, _ = count_queries(few_moves)
+        many_count, response = count_queries(many_moves)
+
+        self.assertEqual(few_count, many_count)
+        self.assertEqual(len(response.data["moves"]), 10)
+        self.assertEqual(len(response.data["moves"][0]["version_group_details"]), 3)
+        self.assertEqual(
+            response.data["moves"][0]["version_group_details"][2]["level_learned_at"],
+            2,
+        )
+
+    def test_pokemon_encounters_api(self):
+        pokemon = self.setup_pokemon_data(name="pkmn for encntrs")
+        version = self.setup_version_data(name="ver for pkmn encntrs")
+        encounter_method = self.setup_encounter_method_data(
+            name="encntr mthd for pkmn encntrs"
+        )
+        encounter_condition = self.setup_encounter_condition_data(
+            name="encntr cndtn for pkmn encntrs"
+        )
+        encounter_condition_value = self.setup_encounter_condition_value_data(
+            encounter_condition, name="encntr cndtn vlu for pkmn encntrs"
+        )
+        location_area1 = self.setup_location_area_data(name="lctn1 area for encntrs")
+        location_area2 = self.setup_location_area_data(name="lctn2 area for encntrs")
+
+        encounter1 = self.setup_encounter_data(
+            location_area=location_area1,
+            encounter_slot=self.setup_encounter_slot_data(
+                encounter_method, slot=1, rarity=30
+            ),
+            pokemon=pokemon,
+            version=version,
+            min_level=2,
+            max_level=4,
+        )
+        self.setup_encounter_condition_value_map_data(
+            encounter1, encounter_condition_value
+        )
+        self.setup_encounter_data(
+            location_area=location_area1,
+            encounter_slot=self.setup_encounter_slot_data(
+                encounter_method, slot=2, rarity=20
+            ),
+            pokemon=pokemon,
+            version=version,
+        )
+        self.setup_encounter_data(
+            location_area=location_area2,
+            encounter_slot=self.setup_encounter_slot_data(
+                encounter_method, slot=1, rarity=50
+            ),
+            pokemon=pokemon,
+            version=version,
+        )
+
+        response = self.client.get(
+            "{}/pokemon/{}/encounters".format(API_V2, pokemon.pk)
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(response.data[0]["location_area"]["name"], location_area1.name)
+        self.assertEqual(
+            response.data[0]["location_area"]["url"],
+            "{}{}/location-area/{}/".format(TEST_HOST, API_V2, location_area1.pk),
+        )
+
+        version_details = response.data[0]["version_details"]
+        self.assertEqual(len(version_details), 1)
+        self.assertEqual(version_details[0]["version"]["name"], version.name)
+        self.assertEqual(version_details[0]["max_chance"], 50)
+
+        encounter_details = version_details[0]["encounter_details"]
+        self.assertEqual(len(encounter_details), 2)
+        self.assertEqual(encounter_details[0]["chance"], 30)
+        self.assertEqual(encounter_details[0]["min_level"], 2)
+        self.assertEqual(encounter_details[0]["max_level"], 4)
+        self.assertEqual(encounter_details[0]["method"]["name"], encounter_method.name)
+        self.assertEqual(
+            encounter_details[0]["condition_values"][0]["name"],
+            encounter_condition_value.name,
+        )
+        self.assertEqual(encounter_details[1]["condition_values"], [])
+
+        self.assertEqual(response.data[1]["version_details"][0]["max_chance"], 50)
+
+        # unknown pokemon
+        response = self.client.get("{}/pokemon/{}/encounters".format(API_V2, 9999))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_encounters_query_count(self):
+        encounter_method = self.setup_encounter_method_data(
+            name="encntr mthd for qry cnt"
+        )
+        encounter_condition = self.setup_encounter_condition_data(
+            name="encntr cndtn for qry cnt"
+        )
+
+        def setup_area_with_encounters(name, encounter_count):
+            location_area = self.setup_location_area_data(name=name)
+            pokemon = self.setup_pokemon_data(name="pkmn for " + name)
+
+            for index in range(encounter_count):
+                encounter = self.setup_encounter_data(
+                    location_area=location_area,
+                    encounter_slot=self.setup_encounter_slot_data(
+                        encounter_method, slot=index, rarity=10
+                    ),
+                    pokemon=self.setup_pokemon_data(
+                        name="pkmn {} for {}".format(index, name)
+                    ),
+                    version=self.setup_version_data(
+                        name="ver {} for {}".format(index, name)
+                    ),
+                )
+                self.setup_encounter_condition_value_map_data(
+                    encounter,
+                    self.setup_encounter_condition_value_data(
+                        encounter_condition,
+                        name="encntr cndtn vlu {} for {}".format(index, name),
+                    ),
+                )
+                self.setup_encounter_data(
+                    location_area=self.setup_location_area_data(
+                        name="lctn area {} for {}".format(index, name)
+                    ),
+                    pokemon=pokemon,
+                )
+
+            return location_area, pokemon
+
+        def count_queries(url):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(queries)
+
+        small_area, small_pokemon = setup_area_with_encounters("sml area", 1)
+        large_area, large_pokemon = setup_area_with_encounters("lrg area", 8)
+
+        self.assertEqual(
+            count_queries("{}/location-area/{}/".format(API_V2, small_area.pk)),
+            count_queries("{}/location-area/{}/".format(API_V2, large_area.pk)),
+        )
+        self.assertEqual(
+            count_queries("{}/pokemon/{}/encounters".format(API_V2, small_pokemon.pk)),
+            count_queries("{}/pokemon/{}/encounters".format(API_V2, large_pokemon.pk)),
+        )
+
+    def test_evolution_chain_materialized_tree(self):
+        party_type = self.setup_type_data(name="tp for evltn chn tree")
+
+        def setup_chain(name, length):
+            evolution_chain = self.setup_evolution_chain_data()
+            species = self.setup_pokemon_species_data(
+                name="{} 0".format(name), evolution_chain=evolution_chain
+            )
+
+            for index in range(1, length):
+                species = self.setup_pokemon_species_data(
+                    name="{} {}".format(name, index),
+                    evolves_from_species=species,
+                    evolution_chain=evolution_chain,
+                )
+                self.setup_pokemon_evolution_data(
+                    evolved_species=species, party_type=party_type, min_level=index
+                )
+
+            return evolution_chain
+
+        def get_chain(evolution_chain):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(
+                    "{}/evolution-chain/{}/".format(API_V2, evolution_chain.pk)
+                )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(queries), response.data["chain"]
+
+        short_chain = setup_chain("shrt chn spcs", 2)
+        long_chain = setup_chain("lng chn spcs", 5)
+
+        # the first request materializes the tree, later ones only read it
+        get_chain(short_chain)
+        get_chain(long_chain)
+        self.assertEqual(EvolutionChainTree.objects.count(), 2)
+
+        short_count, _ = get_chain(short_chain)
+        long_count, chain = get_chain(long_chain)
+
+        self.assertEqual(short_count, long_count)
+
+        self.assertEqual(
+            chain["species"]["url"],
+            "{}{}/pokemon-species/{}/".format(
+                TEST_HOST,
+                API_V2,
+                PokemonSpecies.objects.get(name="lng chn spcs 0").pk,
+            ),
+        )
+
+        link = chain
+        for index in range(5):
+            self.assertEqual(link["species"]["name"], "lng chn spcs {}".format(index))
+            if index == 0:
+                self.assertEqual(link["evolution_details"], [])
+            else:
+                self.assertEqual(link["evolution_details"][0]["min_level"], index)
+                self.assertEqual(
+                    link["evolution_details"][0]["party_type"]["name"],
+                    party_type.name,
+                )
+            link = link["evolves_to"][0] if link["evolves_to"] else None
+
+        # renaming a type through the writable api rebuilds the chains using it
+        response = self.client.patch(
+            "{}/writable-type/{}/".format(API_V2, party_type.pk),
+            {"name": "rnmd tp for evltn chn tree"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        _, chain = get_chain(long_chain)
+
+        self.assertEqual(
+            chain["evolves_to"][0]["evolution_details"][0]["party_type"]["name"],
+            "rnmd tp for evltn chn tree",
+        )
+
+    def test_type_matchup_api(self):
+        generation = self.setup_generation_data(name="gen for tp mtchp")
+        newer_generation = self.setup_generation_data(name="nwr gen for tp mtchp")
+
+        attacking = self.setup_type_data(name="atk tp", generation=generation)
+        defending_a = self.setup_type_data(name="def tp a", generation=generation)
+        defending_b = self.setup_type_data(name="def tp b", generation=generation)
+        newer = self.setup_type_data(name="nwr atk tp", generation=newer_generation)
+
+        TypeEfficacy.objects.create(
+            damage_type=attacking, target_type=defending_a, damage_factor=200
+        )
+        TypeEfficacy.objects.create(
+            damage_type=attacking, target_type=defending_b, damage_factor=50
+        )
+        TypeEfficacy.objects.create(
+            damage_type=newer, target_type=defending_a, damage_factor=0
+        )
+        # attacking type used to deal double damage to the second type
+        TypeEfficacyPast.objects.create(
+            damage_type=attacking,
+            target_type=defending_b,
+            damage_factor=200,
+            generation=generation,
+        )
+
+        response = self.client.get(
+            "{}/type-matchup/".format(API_V2),
+            {
+                "attacking": "{},{}".format(attacking.name, newer.pk),
+                "defending": "{},{}".format(defending_a.name, defending_b.name),
+            },
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data["generation"])
+        self.assertEqual(
+            [type["name"] for type in response.data["defending_types"]],
+            [defending_a.name, defending_b.name],
+        )
+
+        matchups = response.data["matchups"]
+        self.assertEqual(matchups[0]["attacking_type"]["name"], attacking.name)
+        self.assertEqual(matchups[0]["damage_factors"], [200, 50])
+        self.assertEqual(matchups[0]["multiplier"], 1.0)
+        self.assertEqual(matchups[1]["attacking_type"]["name"], newer.name)
+        self.assertEqual(matchups[1]["damage_factors"], [0, 100])
+        self.assertEqual(matchups[1]["multiplier"], 0.0)
+
+        # past generation, attacking with every type around at the time
+        response = self.client.get(
+            "{}/type-matchup/".format(API_V2),
+            {"defending": defending_b.pk, "generation": generation.name},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["generation"]["name"], generation.name)
+        self.assertEqual(
+            response.data["generation"]["url"],
+            "{}{}/generation/{}/".format(TEST_HOST, API_V2, generation.pk),
+        )
+        self.assertEqual(len(response.data["matchups"]), 1)
+        self.assertEqual(response.data["matchups"][0]["damage_factors"], [200])
+        self.assertEqual(response.data["matchups"][0]["multiplier"], 2.0)
+
+        # invalid requests
+        for params in (
+            {},
+            {"defending": "{},{},{}".format(defending_a.pk, defending_b.pk, newer.pk)},
+            {"defending": "unknown tp"},
+            {"defending": newer.name, "generation": generation.pk},
+            {"defending": defending_a.name, "generation": "unknown gen"},
+        ):
+            response = self.client.get("{}/type-matchup/".format(API_V2), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(CACHES=LOCAL_MEMORY_CACHES)
+    def test_type_chart_data_version(self):
+        cache.clear()
+        attacking = self.setup_type_data(name="atk tp dt vrsn")
+        defending = self.setup_type_data(name="def tp dt vrsn")
+
+        def get_factors():
+            response = self.client.get(
+                "{}/type-matchup/".format(API_V2),
+                {"attacking": attacking.pk, "defending": defending.pk},
+            )
+            return response.data["matchups"][0]["damage_factors"]
+
+        self.assertEqual(get_factors(), [100])
+
+        # written by a build in another process, which can't clear this cache
+        TypeEfficacy.objects.create(
+            damage_type=attacking, target_type=defending, damage_factor=200
+        )
+        self.assertEqual(get_factors(), [100])
+
+        state = BuildState.objects.create(
+            table=TypeEfficacy._meta.db_table, inputs={}, reads=[], build="b" * 32
+        )
+        try:
+            versions.refresh_data_version()
+            self.assertEqual(get_factors(), [200])
+        finally:
+            state.delete()
+            versions.refresh_data_version()
+
+    def test_type_query_count(self):
+        def setup_type_with_relations(name, relation_count):
+            generation = self.setup_generation_data(name="gen for " + name)
+            type = self.setup_type_data(name=name, generation=generation)
+            self.setup_type_sprites_data(type=type)
+
+            for index in range(relation_count):
+                other = self.setup_type_data(
+                    name="tp {} for {}".format(index, name), generation=generation
+                )
+                TypeEfficacy.objects.create(
+                    damage_type=type, target_type=other, damage_factor=200
+                )
+                TypeEfficacy.objects.create(
+                    damage_type=other, target_type=type, damage_factor=50
+                )
+                TypeEfficacyPast.objects.create(
+                    damage_type=type,
+                    target_type=other,
+                    damage_factor=100,
+                    generation=generation,
+                )
+
+            return type
+
+        def count_queries(type):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get("{}/type/{}/".format(API_V2, type.pk))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(queries), response.data
+
+        small_count, _ = count_queries(setup_type_with_relations("sml tp", 1))
+        large_count, data = count_queries(setup_type_with_relations("lrg tp", 6))
+
+        self.assertEqual(small_count, large_count)
+        self.assertEqual(len(data["damage_relations"]["double_damage_to"]), 6)
+        self.assertEqual(len(data["damage_relations"]["half_damage_from"]), 6)
+        self.assertEqual(
+            data["past_damage_relations"][0]["damage_relations"]["double_damage_to"],
+            [],
+        )
+
+    @override_settings(CACHES=LOCAL_MEMORY_CACHES)
+    def test_etags(self):
+        cache.clear()
+        ability = self.setup_ability_data(name="ablty for etgs")
+        url = "{}/ability/{}/".format(API_V2, ability.pk)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+
+        # a matching If-None-Match is answered without touching the database
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(len(queries), 0)
+
+        # stored etags are per document
+        response = self.client.get(
+            "{}/ability/".format(API_V2), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+        # the body is hashed again when the stored etag is gone
+        cache.clear()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # writes drop stored etags
+        response = self.client.patch(
+            "{}/writable-ability/{}/".format(API_V2, ability.pk),
+            {"name": "rnmd ablty for etgs"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["name"], "rnmd ablty for etgs")
+
+        cache.clear()
+
+    @override_settings(CACHES=LOCAL_MEMORY_CACHES)
+    def test_response_cache(self):
+        cache.clear()
+        generation = self.setup_generation_data(name="gen for rspns cch")
+        ability = self.setup_ability_data(
+            name="ablty for rspns cch", generation=generation
+        )
+        other_ability = self.setup_ability_data(name="othr ablty for rspns cch")
+
+        generation_url = "{}/generation/{}/".format(API_V2, generation.pk)
+        other_ability_url = "{}/ability/{}/".format(API_V2, other_ability.pk)
+        list_url = "{}/ability/?limit=100".format(API_V2)
+
+        def get(url):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(queries), json.loads(response.content)
+
+        for url in (generation_url, other_ability_url, list_url):
+            get(url)
+
+        # cached documents are served without touching the database
+        query_count, data = get(generation_url)
+        self.assertEqual(query_count, 0)
+        self.assertEqual(data["abilities"][0]["name"], ability.name)
+
+        # renaming an ability drops the documents embedding it, and only those
+        response = self.client.patch(
+            "{}/writable-ability/{}/".format(API_V2, ability.pk),
+            {"name": "rnmd ablty for rspns cch"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        query_count, data = get(generation_url)
+        self.assertNotEqual(query_count, 0)
+        self.assertEqual(data["abilities"][0]["name"], "rnmd ablty for rspns cch")
+
+        query_count, data = get(other_ability_url)
+        self.assertEqual(query_count, 0)
+
+        # creating an ability drops the list pages and the documents of the
+        # rows it points to
+        response = self.client.post(
+            "{}/writable-ability/".format(API_V2),
+            {"name": "nw ablty for rspns cch", "generation_id": generation.pk},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        query_count, data = get(generation_url)
+        self.assertNotEqual(query_count, 0)
+        self.assertEqual(len(data["abilities"]), 2)
+
+        query_count, data = get(list_url)
+        self.assertNotEqual(query_count, 0)
+        self.assertIn(
+            "nw ablty for rspns cch", [result["name"] for result in data["results"]]
+        )
+
+        query_count, data = get(other_ability_url)
+        self.assertEqual(query_count, 0)
+
+        # responses rendered, and not only served, vary on the Accept header
+        cache.clear()
+        response = self.client.get(other_ability_url)
+        self.assertIn("Accept", response["Vary"])
+
+        # the versions of the tags are those of when the rows were read, so
+        # a write racing with the render leaves the entry stale
+        key = get_url_response_key("{}{}".format(TEST_HOST, other_ability_url), "")
+        with record_tags() as tags:
+            Ability.objects.get(pk=other_ability.pk)
+        invalidate_tags({get_row_tag(Ability, other_ability.pk)})
+        store_response(key, "etag", b"{}", "application/json", tags)
+        self.assertIsNone(get_cached_response(key))
+
+        # a write committing after a row is read but before it is recorded
+        # stores nothing, since the write version was read before
+        cache.delete(key)
+        write_version = get_write_version()
+        invalidate_tags({get_row_tag(Ability, other_ability.pk)})
+        with record_tags() as tags:
+            Ability.objects.get(pk=other_ability.pk)
+        store_response(key, "etag", b"{}", "application/json", tags, write_version)
+        self.assertIsNone(cache.get(key))
+
+        # past MAX_TAGS, the rows are recorded by the tags of their tables
+        with mock.patch.object(responsecache, "MAX_TAGS", 1), record_tags() as tags:
+            list(Ability.objects.order_by("pk"))
+        self.assertEqual(
+            set(tags),
+            {
+                get_row_tag(Ability, Ability.objects.order_by("pk")[0].pk),
+                get_table_tag(Ability),
+            },
+        )
+
+        cache.clear()
+
+    def test_export_static_api(self):
+        abilities = [
+            self.setup_ability_data(name="ablty {} for exprt".format(index))
+            for index in range(22)
+        ]
+
+        with tempfile.TemporaryDirectory() as directory:
+            call_command(
+                "export_static_api",
+                directory,
+                base_url=TEST_HOST,
+                processes=1,
+                resources="ability",
+                stdout=open(os.devnull, "w"),
+            )
+
+            def read(*parts):
+                with open(os.path.join(directory, *parts, "index.json")) as file:
+                    return json.load(file)
+
+            for ability in abilities[:2]:
+                self.assertEqual(
+                    read("api", "v2", "ability", str(ability.pk)),
+                    json.loads(
+                        self.client.get(
+                            "{}/ability/{}/".format(API_V2, ability.pk)
+                        ).content
+                    ),
+                )
+
+            first_page = read("api", "v2", "ability")
+            self.assertEqual(first_page["count"], 22)
+            self.assertEqual(
+                first_page["next"],
+                "{}{}/ability/?limit=20&offset=20".format(TEST_HOST, API_V2),
+            )
+
+            # the pages the pagination links point to are exported too
+            second_page = read("api", "v2", "ability", "limit=20&offset=20")
+            self.assertEqual(second_page["results"][1]["name"], abilities[21].name)
+            self.assertEqual(
+                second_page["previous"],
+                "{}{}/ability/?limit=20".format(TEST_HOST, API_V2),
+            )
+            self.assertEqual(read("api", "v2", "ability", "limit=20"), first_page)
+
+    def test_keyset_pagination(self):
+        abilities = [
+            self.setup_ability_data(name="ablty {} for kyst".format(index))
+            for index in range(5)
+        ]
+
+        response = self.client.get("{}/ability/?after=&limit=2".format(API_V2))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", response.data)
+        self.assertEqual(
+            [result["name"] for result in response.data["results"]],
+            [ability.name for ability in abilities[:2]],
+        )
+
+        # rows created while crawling don't shift the pages
+        new_ability = self.setup_ability_data(name="nw ablty for kyst")
+
+        names = [result["name"] for result in response.data["results"]]
+        next_url = response.data["next"]
+        while next_url:
+            response = self.client.get(next_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            names += [result["name"] for result in response.data["results"]]
+            next_url = response.data["next"]
+
+        self.assertEqual(
+            names, [ability.name for ability in abilities] + [new_ability.name]
+        )
+
+        # the q filter still applies
+        response = self.client.get("{}/ability/?after=&q=nw".format(API_V2))
+        self.assertEqual(
+            [result["name"] for result in response.data["results"]],
+            [new_ability.name],
+        )
+        self.assertIsNone(response.data["next"])
+
+        response = self.client.get("{}/ability/?after=not-a-cursor".format(API_V2))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        # lists without after are paginated with limit and offset
+        response = self.client.get("{}/ability/?limit=2&offset=4".format(API_V2))
+        self.assertEqual(response.data["count"], 6)
+        self.assertEqual(response.data["results"][1]["name"], new_ability.name)
+
+    @override_settings(CACHES=LOCAL_MEMORY_CACHES)
+    def test_list_count_cache(self):
+        cache.clear()
+        for index in range(3):
+            self.setup_ability_data(name="ablty {} for cnt".format(index))
+
+        def get(url):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get("{}/ability/{}".format(API_V2, url))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            counted = any("COUNT(" in query["sql"] for query in queries)
+            return counted, response.data["count"]
+
+        self.assertEqual(get("?limit=1"), (True, 3))
+
+        # the other pages reuse the count
+        self.assertEqual(get("?limit=1&offset=1"), (False, 3))
+
+        # each filter has its own count
+        self.assertEqual(get("?limit=1&q=1"), (True, 1))
+        self.assertEqual(get("?limit=1&offset=1&q=1"), (False, 1))
+
+        # writes drop the counts
+        response = self.client.post(
+            "{}/writable-ability/".format(API_V2),
+            {"name": "ablty 4 for cnt"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(get("?limit=1&offset=2"), (True, 4))
+        self.assertEqual(get("?limit=1&offset=2&q=1"), (True, 1))
+
+        cache.clear()
+
+    def test_sparse_fieldsets(self):
+        pokemon = self.setup_pokemon_data(name="pkmn for fldsts")
+        self.setup_pokemon_stat_data(pokemon, base_stat=45)
+        PokemonSprites.objects.create(
+            pokemon=pokemon,
+            sprites={
+                "front_default": "front.png",
+                "other": {"home": {"front_default": "home.png"}},
+            },
+        )
+        self.setup_pokemon_cries_data(pokemon)
+        url = "{}/pokemon/{}/".format(API_V2, pokemon.pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                url + "?fields=name,stats.base_stat,sprites.other.home"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            {
+                "name": pokemon.name,
+                "stats": [{"base_stat": 45}],
+                "sprites": {"other": {"home": {"front_default": "home.png"}}},
+            },
+        )
+
+        # the fields left out don't query anything
+        for table in ("pokemonmove", "pokemonitem", "encounter", "pokemonability"):
+            self.assertFalse(
+                any("pokemon_v2_" + table in query["sql"] for query in queries)
+            )
+
+        response = self.client.get(url + "?omit=moves,sprites.other,stats.effort")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("moves", response.data)
+        self.assertIn("abilities", response.data)
+        self.assertEqual(response.data["sprites"], {"front_default": "front.png"})
+        self.assertEqual(response.data["stats"][0]["base_stat"], 45)
+        self.assertNotIn("effort", response.data["stats"][0])
+
+        # without any path, nothing is filtered
+        response = self.client.get(url + "?fields=&omit=,")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("moves", response.data)
+        self.assertEqual(response.data["name"], pokemon.name)
+
+        # lists too
+        self.setup_ability_data(name="ablty for fldsts")
+        response = self.client.get("{}/ability/?fields=name".format(API_V2))
+        self.assertEqual(response.data["results"], [{"name": "ablty for fldsts"}])
+
+    @override_settings(CACHES=LOCAL_MEMORY_CACHES)
+    def test_expand(self):
+        cache.clear()
+        generation = self.setup_generation_data(name="gen for expnd")
+        abilities = [
+            self.setup_ability_data(
+                name="ablty {} for expnd".format(index), generation=generation
+            )
+            for index in range(3)
+        ]
+        generation_url = "{}/generation/{}/".format(API_V2, generation.pk)
+
+        response = self.client.get(
+            "{}/ability/{}/?expand=generation".format(API_V2, abilities[0].pk)
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        generation_document = json.loads(self.client.get(generation_url).content)
+        self.assertEqual(
+            json.loads(response.content)["generation"], generation_document
+        )
+
+        # the items of a list page are expanded on the way
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                "{}/ability/?q=expnd&expand=generation.main_region".format(API_V2)
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = json.loads(response.content)["results"]
+        self.assertEqual(
+            [result["name"] for result in results],
+            [ability.name for ability in abilities],
+        )
+        for result in results:
+            self.assertEqual(result["generation"]["name"], generation.name)
+            self.assertEqual(
+                result["generation"]["main_region"]["name"],
+                generation.region.name,
+            )
+
+        # the generation document came from the response cache
+        self.assertFalse(
+            any("pokemon_v2_generationname" in query["sql"] for query in queries)
+        )
+
+        cache.clear()
+
+    def test_expand_query_count(self):
+        for group, count in (("fw", 2), ("mny", 6)):
+            for index in range(count):
+                generation = self.setup_generation_data(
+                    name="gen {} {} for expnd".format(group, index)
+                )
+                self.setup_generation_name_data(
+                    generation, name="nm {} {} for expnd".format(group, index)
+                )
+
+        def count_queries(group):
+            with cachalot_disabled():
+                response = self.client.get(
+                    "{}/generation/".format(API_V2),
+                    {"q": "gen {} ".format(group), "expand": "names.language"},
+                )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            for result in response.data["results"]:
+                self.assertIn("iso639", result["names"][0]["language"])
+            return response.wsgi_request.query_stats.count
+
+        # the first request builds the name index of the generations
+        count_queries("fw")
+
+        # the generations, and then their languages, are serialized together
+        # with their relations prefetched
+        self.assertEqual(count_queries("fw"), count_queries("mny"))
+
+    def test_batch_retrieval(self):
+        abilities = [
+            self.setup_ability_data(name="ablty {} for btch".format(index))
+            for index in range(4)
+        ]
+
+        response = self.client.get(
+            "{}/ability/?id__in={},{}&name__in=ABLTY 3 FOR BTCH".format(
+                API_V2, abilities[0].pk, abilities[2].pk
+            )
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(
+            [result["name"] for result in response.data["results"]],
+            [abilities[0].name, abilities[2].name, abilities[3].name],
+        )
+
+        # the results are detail documents
+        detail_response = self.client.get(
+            "{}/ability/{}/".format(API_V2, abilities[0].pk)
+        )
+        self.assertEqual(
+            json.loads(response.content)["results"][0],
+            json.loads(detail_response.content),
+        )
+
+        for query in ("id__in=1,x", "name__in=a/b", "id__in=99999999999"):
+            response = self.client.get("{}/ability/?{}".format(API_V2, query))
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # resources without names can only be looked up by id
+        response = self.client.get("{}/characteristic/?name__in=a".format(API_V2))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # a batch larger than the default page comes in one page
+        languages = [
+            self.setup_language_data(name="lang {} for btch".format(index))
+            for index in range(25)
+        ]
+        response = self.client.get(
+            "{}/language/".format(API_V2),
+            {"id__in": ",".join(str(language.pk) for language in languages)},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 25)
+        self.assertIsNone(response.data["next"])
+
+    def test_batch_retrieval_query_count(self):
+        generations = [
+            self.setup_generation_data(name="gen {} for btch".format(index))
+            for index in range(6)
+        ]
+        for generation in generations:
+            self.setup_generation_name_data(
+                generation, name="nm of {}".format(generation.name)
+            )
+            self.setup_ability_data(
+                name="ablty of {}".format(generation.name), generation=generation
+            )
+            self.setup_version_group_data(
+                name="ver grp of {}".format(generation.name), generation=generation
+            )
+
+        def count_queries(count):
+            # cachalot would answer the queries of the second batch
+            with cachalot_disabled():
+                response = self.client.get(
+                    "{}/generation/".format(API_V2),
+                    {"id__in": ",".join(str(row.pk) for row in generations[:count])},
+                )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data["results"]), count)
+            return response.wsgi_request.query_stats.count
+
+        # the relations of the whole batch are prefetched at once
+        self.assertEqual(count_queries(2), count_queries(6))
+
+    def test_orjson_renderer_and_parser(self):
+        ability = self.setup_ability_data(name="ablty \u00e9\u2028 for jsn")
+        response = self.client.get("{}/ability/{}/".format(API_V2, ability.pk))
+
+        content = ORJSONRenderer().render(response.data)
+        self.assertEqual(content, JSONRenderer().render(response.data))
+        self.assertIn(b"\\u2028", content)
+        self.assertEqual(
+            ORJSONParser().parse(io.BytesIO(content)),
+            JSONParser().parse(io.BytesIO(content)),
+        )
+
+        # indented output is left to JSONRenderer
+        self.assertEqual(
+            ORJSONRenderer().render(response.data, "application/json; indent=4"),
+            JSONRenderer().render(response.data, "application/json; indent=4"),
+        )
+
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"name": NaN}'))
+
+        # out of range floats are null rather than an error
+        with self.assertRaises(ValueError):
+            JSONRenderer().render({"rate": float("nan")})
+        self.assertEqual(
+            ORJSONRenderer().render({"rate": float("nan")}), b'{"rate":null}'
+        )
+
+        call_command(
+            "benchmark_json",
+            resources="ability",
+            documents=1,
+            repeat=1,
+            base_url=TEST_HOST,
+            stdout=open(os.devnull, "w"),
+        )
+
+    def test_ndjson_export(self):
+        abilities = [
+            self.setup_ability_data(name="ablty {}".format(i)) for i in range(3)
+        ]
+        url = "{}/ability/export.ndjson".format(API_V2)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+        content = b"".join(response.streaming_content)
+        lines = content.split(b"\n")
+        self.assertEqual(lines.pop(), b"")
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [
+                self.client.get("{}/ability/{}/".format(API_V2, ability.pk)).json()
+                for ability in abilities
+            ],
+        )
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="deflate, gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), content)
+
+        # only the read-only resources are exported
+        response = self.client.get("{}/writable-pokemon/export.ndjson".format(API_V2))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get("{}/nothing/export.ndjson".format(API_V2))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(CACHES=LOCAL_MEMORY_CACHES)
+    def test_name_search(self):
+        cache.clear()
+        abilities = [
+            self.setup_ability_data(name=name)
+            for name in ("Fire Body", "body guard", "Ab%_\\x")
+        ]
+
+        def search(q):
+            response = self.client.get("{}/ability/".format(API_V2), {"q": q})
+            return sorted(result["name"] for result in response.data["results"])
+
+        self.assertEqual(search("BODY"), ["Fire Body", "body guard"])
+        # kept by the process, even though the tests don't cache anything
+        index = get_name_index(Ability, "default")
+        self.assertEqual(search("re bo"), ["Fire Body"])
+        self.assertIs(get_name_index(Ability, "default"), index)
+        # shorter than an n-gram
+        self.assertEqual(search("y"), ["Fire Body", "body guard"])
+        # like wildcards are matched as they are
+        self.assertEqual(search("%_"), ["Ab%_\\x"])
+        self.assertEqual(search("b%x"), [])
+
+        response = self.client.get("{}/ability/fire body/".format(API_V2))
+        self.assertEqual(response.data["id"], abilities[0].pk)
+        response = self.client.get(
+            "{}/ability/".format(API_V2), {"name__in": "fIRE bODY,Body Guard"}
+        )
+        self.assertEqual(
+            sorted(result["id"] for result in response.data["results"]),
+            [abilities[0].pk, abilities[1].pk],
+        )
+
+        # the names written through the API are searchable straight away
+        response = self.client.post(
+            "{}/writable-ability/".format(API_V2), {"name": "Body Bash"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(search("body b"), ["Body Bash"])
+        self.assertIsNot(get_name_index(Ability, "default"), index)
+
+    def test_search(self):
+        ability = self.setup_ability_data(name="flash-fire")
+        for name in ("Flash Fire", "Torche", "Feuerfänger"):
+            self.setup_ability_name_data(ability, name=name)
+        self.setup_type_name_data(self.setup_type_data(name="fire"), name="Feuer")
+        egg_group = self.setup_egg_group_data(name="monster")
+        self.setup_egg_group_name_data(egg_group, name="Monstruo")
+        refresh_search_index()
+
+        def search(**params):
+            response = self.client.get("{}/search/".format(API_V2), params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return [
+                (result["resource"], result["name"])
+                for result in response.data["results"]
+            ]
+
+        # equal names first, then the shortest
+        self.assertEqual(
+            search(q="FEUER"), [("type", "Feuer"), ("ability", "Feuerfänger")]
+        )
+        self.assertEqual(search(q="feuerfanger"), [("ability", "Feuerfänger")])
+        self.assertEqual(search(q="fire fl"), [("ability", "Flash Fire")])
+        self.assertEqual(search(q="feuer", resource="type"), [("type", "Feuer")])
+        self.assertEqual(
+            search(q="feuer", lang="lang for Feuerfänger"),
+            [("ability", "Feuerfänger")],
+        )
+        self.assertEqual(search(q="feuer", limit=1), [("type", "Feuer")])
+        self.assertEqual(search(q="fire feuer"), [])
+
+        response = self.client.get("{}/search/".format(API_V2), {"q": "monstru"})
+        self.assertEqual(
+            response.data["results"],
+            [
+                {
+                    "resource": "egg-group",
+                    "name": "Monstruo",
+                    "language": "lang for Monstruo",
+                    "url": "{}{}/egg-group/{}/".format(TEST_HOST, API_V2, egg_group.pk),
+                }
+            ],
+        )
+
+        for params in (
+            {"q": " ."},
+            {"q": "feuer", "resource": "x"},
+            {"q": "feuer", "limit": 0},
+        ):
+            response = self.client.get("{}/search/".format(API_V2), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # other writes can't change names, and leave the index alone
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                "{}/writable-ability/{}/".format(API_V2, ability.pk),
+                {"name": "flash-fire-2"},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([query for query in queries if "searchtoken" in query["sql"]])
+        self.assertEqual(
+            search(q="feuer"), [("type", "Feuer"), ("ability", "Feuerfänger")]
+        )
+
+        # deleting the ability deletes its names from the index
+        response = self.client.delete(
+            "{}/writable-ability/{}/".format(API_V2, ability.pk)
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(search(q="feuer"), [("type", "Feuer")])
+
+    def test_query_instrumentation(self):
+        ability = self.setup_ability_data(name="ablty for qrs")
+        url = "{}/ability/{}/".format(API_V2, ability.pk)
+
+        with self.assertLogs("pokemon_v2.middleware", "INFO") as logs:
+            response = self.client.get(url)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(logs.records[0].levelname, "INFO")
+        self.assertEqual(record["path"], url)
+        self.assertFalse(record["over_budget"])
+        self.assertEqual(
+            record["queries"],
+            sum(scope["queries"] for scope in record["scopes"].values()),
+        )
+        # the queries are attributed to the method field making them
+        self.assertIn("view", record["scopes"])
+        self.assertIn("AbilityDetailSerializer.get_ability_pokemon", record["scopes"])
+
+        self.assertTrue(
+            response["Server-Timing"].startswith(
+                'db;desc="{} queries";'.format(record["queries"])
+            )
+        )
+        self.assertIn(
+            "db.AbilityDetailSerializer.get_ability_pokemon;", response["Server-Timing"]
+        )
+
+        other_ability = self.setup_ability_data(name="othr ablty for qrs")
+        with override_settings(QUERY_BUDGET=1):
+            with self.assertLogs("pokemon_v2.middleware", "INFO") as logs:
+                self.client.get("{}/ability/{}/".format(API_V2, other_ability.pk))
+
+        self.assertEqual(logs.records[0].levelname, "WARNING")
+        self.assertTrue(json.loads(logs.records[0].getMessage())["over_budget"])
+
+    def test_metrics(self):
+        ability = self.setup_ability_data(name="ablty for mtrcs")
+
+        with tempfile.TemporaryDirectory() as directory, mock.patch.object(
+            metrics, "METRICS_DIR", directory
+        ):
+            metrics.collector.reset()
+            self.client.get("{}/ability/{}/".format(API_V2, ability.pk))
+            self.client.get("{}/ability/{}/".format(API_V2, ability.pk))
+            # written by a thread, not by the requests
+            self.assertTrue(metrics.collector.flusher.is_alive())
+
+            # a worker that exited
+            dead_pid = 2**22 + 1
+            metrics.write_json(
+                os.path.join(directory, "worker-{}.json".format(dead_pid)),
+                {
+                    "pid": dead_pid,
+                    "rss": 1,
+                    "counters": [
+                        [
+                            "pokeapi_requests_total",
+                            [
+                                ["method", "GET"],
+                                ["route", "ability-detail"],
+                                ["status", "200"],
+                            ],
+                            3,
+                        ]
+                    ],
+                    "histograms": [],
+                },
+            )
+            metrics.archive_worker(dead_pid)
+
+            response = self.client.get("/metrics")
+            self.assertEqual(response["Content-Type"], metrics.CONTENT_TYPE)
+            lines = response.content.decode().splitlines()
+
+        self.assertIn(
+            "pokeapi_requests_total"
+            '{method="GET",route="ability-detail",status="200"} 5',
+            lines,
+        )
+        self.assertIn(
+            "pokeapi_request_duration_seconds_bucket"
+            '{route="ability-detail",le="+Inf"} 2',
+            lines,
+        )
+        self.assertIn(
+            'pokeapi_response_size_bytes_count{route="ability-detail"} 2', lines
+        )
+        self.assertTrue(
+            any(
+                line.startswith('pokeapi_db_queries_total{route="ability-detail"} ')
+                for line in lines
+            )
+        )
+        self.assertIn(
+            'pokeapi_cache_lookups_total{cache="response",result="miss"} 2', lines
+        )
+        self.assertTrue(
+            any(
+                line.startswith(
+                    'pokeapi_worker_rss_bytes{{pid="{}"}} '.format(os.getpid())
+                )
+                for line in lines
+            )
+        )
+        self.assertFalse(any('pid="{}"'.format(dead_pid) in line for line in lines))
+
+    def test_metrics_outside_server(self):
+        ability = self.setup_ability_data(name="ablty for no mtrcs")
+
+        # the management commands, which gunicorn didn't fork
+        with tempfile.TemporaryDirectory() as directory, mock.patch.object(
+            metrics, "METRICS_DIR", directory
+        ), mock.patch.object(metrics.collector, "enabled", False):
+            metrics.collector.reset()
+            self.client.get("{}/ability/{}/".format(API_V2, ability.pk))
+            metrics.collector.flush()
+
+            self.assertEqual(metrics.collector.counters, {})
+            self.assertEqual(os.listdir(directory), [])
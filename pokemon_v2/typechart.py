@@ -0,0 +1,179 @@
+import numpy as np
+from django.core.cache import cache
+
+from .models import Generation, Type, TypeEfficacy, TypeEfficacyPast
+from .versions import get_data_version
+
+################
+#  TYPE CHART  #
+################
+
+# Type efficacies are a handful of rows that every /type/{id}/ response and
+# every /type-matchup/ request needs in full, so they are loaded once into a
+# damage factor matrix, indexed [attacking type, defending type], and kept in
+# the cache until a type is written or the data is rebuilt. It is keyed on the
+# data version (see pokemon_v2/versions.py), which a rebuild in another
+# process changes.
+#
+# A TypeEfficacyPast row holds the damage factor that was used up to and
+# including its generation, so the matrix of a past generation is the current
+# one overridden by every past row of that generation or a later one, the
+# earliest of them winning.
+
+TYPE_CHART_CACHE_KEY = "pokemon_v2.typechart"
+
+NEUTRAL_DAMAGE_FACTOR = 100
+
+DAMAGE_FACTOR_PREFIXES = {0: "no", 50: "half", 200: "double"}
+
+
+class TypeChart:
+    """
+    Damage factors between every pair of types, for the current
+    generation and for each past one.
+    """
+
+    def __init__(self, types, generations, efficacies, past_efficacies):
+        self.type_ids = [type_id for type_id, _, _ in types]
+        self.type_names = [name for _, name, _ in types]
+        self.index = {type_id: i for i, type_id in enumerate(self.type_ids)}
+        self.name_index = {name.lower(): i for i, name in enumerate(self.type_names)}
+
+        # types without a generation have always been around
+        self.type_generations = np.array(
+            [generation_id or 0 for _, _, generation_id in types], dtype=np.int32
+        )
+
+        self.generations = list(generations)
+
+        size = len(self.type_ids)
+        self.factors = np.full((size, size), NEUTRAL_DAMAGE_FACTOR, dtype=np.int16)
+        self.has_efficacy = np.zeros(size, dtype=bool)
+
+        for damage_type_id, target_type_id, damage_factor in efficacies:
+            damage, target = self.index[damage_type_id], self.index[target_type_id]
+            self.factors[damage, target] = damage_factor
+            self.has_efficacy[damage] = True
+
+        # (damage type, target type, damage factor, generation id) in row order
+        self.past_rows = [
+            (self.index[damage_type_id], self.index[target_type_id], factor, gen_id)
+            for damage_type_id, target_type_id, factor, gen_id in past_efficacies
+        ]
+
+        self.past_factors = {}
+        for generation_id, _ in self.generations:
+            factors = self.factors.copy()
+            for damage, target, damage_factor, _ in sorted(
+                self.applicable_rows(generation_id),
+                key=lambda row: row[3],
+                reverse=True,
+            ):
+                factors[damage, target] = damage_factor
+            self.past_factors[generation_id] = factors
+
+    @classmethod
+    def load(cls):
+        types = Type.objects.order_by("id").values_list("id", "name", "generation_id")
+        generations = Generation.objects.order_by("id").values_list("id", "name")
+        efficacies = (
+            TypeEfficacy.objects.exclude(damage_factor=None)
+            .exclude(damage_type=None)
+            .exclude(target_type=None)
+            .order_by("id")
+            .values_list("damage_type_id", "target_type_id", "damage_factor")
+        )
+        past_efficacies = (
+            TypeEfficacyPast.objects.exclude(damage_factor=None)
+            .exclude(damage_type=None)
+            .exclude(target_type=None)
+            .exclude(generation=None)
+            .order_by("id")
+            .values_list(
+                "damage_type_id", "target_type_id", "damage_factor", "generation_id"
+            )
+        )
+
+        return cls(list(types), generations, efficacies, past_efficacies)
+
+    def applicable_rows(self, generation_id):
+        """Past rows that were still in effect in the given generation."""
+
+        return [row for row in self.past_rows if row[3] >= generation_id]
+
+    def get_factors(self, generation_id=None):
+        """The damage factor matrix of a generation, or the current one."""
+
+        if generation_id is None:
+            return self.factors
+        return self.past_factors.get(generation_id, self.factors)
+
+    def get_present(self, generation_id=None):
+        """Mask of the types that existed in a generation."""
+
+        if generation_id is None:
+            return np.ones(len(self.type_ids), dtype=bool)
+        return self.type_generations <= generation_id
+
+    def find_type(self, value):
+        """Index of the type with the given id or name, or None."""
+
+        if value.isdigit():
+            return self.index.get(int(value))
+        return self.name_index.get(value.lower())
+
+    def find_generation(self, value):
+        """Id of the generation with the given id or name, or None."""
+
+        for generation_id, name in self.generations:
+            if value == str(generation_id) or value.lower() == name.lower():
+                return generation_id
+        return None
+
+    def get_matchups(self, attacking, defending, generation_id=None):
+        """
+        Damage factors of every attacking type against every defending
+        type, and the multiplier each attacking type deals to a Pokémon
+        of all the defending types at once.
+        """
+
+        factors = self.get_factors(generation_id)[np.ix_(attacking, defending)]
+        multipliers = (factors / NEUTRAL_DAMAGE_FACTOR).prod(axis=1)
+
+        return factors, multipliers
+
+    def get_past_generations(self, type_id):
+        """Ids of the generations in which a type had different relations."""
+
+        i = self.index[type_id]
+        return sorted(
+            {
+                generation_id
+                for damage, target, _, generation_id in self.past_rows
+                if i in (damage, target)
+            }
+        )
+
+
+def get_type_chart(type_id=None):
+    """
+    The cached TypeChart, reloaded if it is missing or if it does not know
+    about ``type_id`` yet.
+    """
+
+    key = get_type_chart_key()
+    chart = cache.get(key)
+
+    if chart is None or (type_id is not None and type_id not in chart.index):
+        chart = TypeChart.load()
+        cache.set(key, chart, None)
+
+    return chart
+
+
+def get_type_chart_key():
+    return "{}.{}".format(TYPE_CHART_CACHE_KEY, get_data_version())
+
+
+def invalidate_type_chart():
+    cache.delete(get_type_chart_key())
@@ -76,10 +76,26 @@ router.register(r"writable-type", WritableTypeResource)
 ###########################
 
 urlpatterns = [
+    # ahead of the router, whose detail urls with a format suffix match it too
+    url(
+        r"^api/v2/(?P<resource>[a-z-]+)/export\.ndjson$",
+        ResourceExportView.as_view(),
+        name="resource_export",
+    ),
     url(r"^api/v2/", include(router.urls)),
     url(
         r"^api/v2/pokemon/(?P<pokemon_id>\d+)/encounters",
         PokemonEncounterView.as_view(),
         name="pokemon_encounters",
     ),
+    url(
+        r"^api/v2/type-matchup/$",
+        TypeMatchupView.as_view(),
+        name="type_matchup",
+    ),
+    url(
+        r"^api/v2/search/$",
+        SearchView.as_view(),
+        name="search",
+    ),
 ]
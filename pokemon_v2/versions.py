@@ -0,0 +1,103 @@
+import hashlib
+import json
+import time
+import uuid
+
+from cachalot.api import cachalot_disabled, invalidate
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from .models import BuildState
+
+##################
+#  DATA VERSION  #
+##################
+
+# The data is rebuilt by data/v2/build.py, in a process of its own, so clearing
+# the caches from the build only reaches the processes sharing its cache, and
+# none of them with the default LocMemCache.
+#
+# The build records its id in the BuildState row of every table it rebuilds,
+# so the rows in the database tell every process when the data changed. Each
+# process reads them at most every DATA_VERSION_INTERVAL seconds, without
+# cachalot since its cache may be as stale, and derives the data version from
+# them. The caches built from the data key their entries on it, and the
+# queries cachalot cached in this process are dropped when it changes.
+#
+# The versions that writes through the API replace are kept in the cache when
+# the processes share it, and in each process otherwise.
+
+DATA_VERSION_INTERVAL = 5.0
+
+# the version and when it was read, for this process
+_data_version = {"version": None, "read": 0.0}
+
+# key -> version, for the versions kept in this process
+_local_versions = {}
+
+
+def new_version():
+    return uuid.uuid4().hex
+
+
+def is_cache_shared():
+    """Whether the other processes see what this one stores in the cache."""
+
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], (DummyCache, LocMemCache))
+
+
+def get_version(key):
+    """
+    The version stored under ``key``, in the cache if the other processes
+    share it, in this process otherwise, since DummyCache keeps nothing.
+    """
+
+    if is_cache_shared():
+        return cache.get_or_set(key, new_version, None)
+    return _local_versions.setdefault(key, new_version())
+
+
+def replace_version(key):
+    if is_cache_shared():
+        cache.set(key, new_version(), None)
+    else:
+        _local_versions[key] = new_version()
+
+
+def read_data_version():
+    with cachalot_disabled():
+        builds = list(
+            BuildState.objects.order_by("table").values_list("table", "build")
+        )
+
+    return hashlib.sha256(json.dumps(builds).encode("utf-8")).hexdigest()[:32]
+
+
+def refresh_data_version():
+    """Read the data version again, dropping cachalot's cache if it changed."""
+
+    previous = _data_version["version"]
+    version = read_data_version()
+
+    if previous is not None and version != previous:
+        invalidate()
+
+    _data_version.update(version=version, read=time.monotonic())
+    return version
+
+
+def get_data_version():
+    """
+    Version of the built data, read again if it's older than
+    DATA_VERSION_INTERVAL seconds, or never again if that is None.
+    """
+
+    version = _data_version["version"]
+    if version is None or (
+        DATA_VERSION_INTERVAL is not None
+        and time.monotonic() - _data_version["read"] >= DATA_VERSION_INTERVAL
+    ):
+        version = refresh_data_version()
+
+    return version